@@ -0,0 +1,71 @@
+"""Throughput benchmark for categorize_expense over the generated expense CSV.
+
+    python -m backend.benchmarks.categorizer --seconds 2
+
+Compares the keyword automaton against the original if/elif substring cascade
+and reports how many rows land in the category recorded in the CSV.
+"""
+import argparse
+import csv
+import os
+import time
+
+from backend.expenses.categories import categorize_expense
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "Generated Data", "Expense of user.csv")
+
+
+def legacy_categorize(description: str) -> str:
+    """The pre-automaton cascade, kept here only as a baseline."""
+    description = description.lower()
+    if any(word in description for word in ['food', 'restaurant', 'hotel', 'ate', 'dinner', 'lunch', 'breakfast', 'airport']):
+        return "Food & Dining"
+    elif any(word in description for word in ['transport', 'uber', 'taxi', 'bus', 'train', 'flight', 'plane']):
+        return "Transportation"
+    elif any(word in description for word in ['clothes', 'shirt', 'shoes', 'umbrella', 'personal', 'headset', 'headphone']):
+        return "Personal Items"
+    elif any(word in description for word in ['medicine', 'doctor', 'hospital', 'health']):
+        return "Healthcare"
+    elif any(word in description for word in ['movie', 'entertainment', 'game', 'cinema']):
+        return "Entertainment"
+    elif any(word in description for word in ['grocery', 'shopping', 'market']):
+        return "Shopping"
+    return "Other"
+
+
+def _load_rows(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [(row["Description"], row["Category"]) for row in csv.DictReader(f)]
+
+
+def _rate(fn, descriptions, seconds: float) -> float:
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        for description in descriptions:
+            fn(description)
+        count += len(descriptions)
+    return count / (time.perf_counter() - started)
+
+
+def _same_category(expected: str, actual: str) -> bool:
+    # The generated data calls food "Food & Drinks"; the backend calls it "Food & Dining"
+    return expected == actual or (expected.startswith("Food") and actual.startswith("Food"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--csv", default=CSV_PATH)
+    args = parser.parse_args()
+
+    rows = _load_rows(args.csv)
+    descriptions = [description for description, _ in rows]
+    for name, fn in (("automaton", categorize_expense), ("legacy", legacy_categorize)):
+        agreed = sum(_same_category(expected, fn(description)) for description, expected in rows)
+        rate = _rate(fn, descriptions, args.seconds)
+        print(f"{name:>10}: {rate:>10.0f} descriptions/sec, {agreed}/{len(rows)} match the CSV category")
+
+
+if __name__ == "__main__":
+    main()
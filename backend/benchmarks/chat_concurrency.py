@@ -0,0 +1,93 @@
+"""Measure /chat throughput and /health latency under concurrent load.
+
+Runs fully offline against the fake model backend:
+
+    python -m backend.benchmarks.chat_concurrency --requests 200 --concurrency 50
+
+Requires httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+# Measure the serving path, not admission control
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "0")
+os.environ.setdefault("LLM_MAX_QUEUE", "100000")
+os.environ.setdefault("LLM_QUEUE_TIMEOUT_SECONDS", "120")
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _run(total: int, concurrency: int):
+    import httpx
+    from backend.main import app
+
+    chat_latencies = []
+    health_latencies = []
+    gate = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one_chat(i):
+            async with gate:
+                start = time.perf_counter()
+                r = await client.post("/chat", json={"message": f"how do I start a SIP? #{i}"})
+                r.raise_for_status()
+                chat_latencies.append(time.perf_counter() - start)
+
+        async def probe_health(stop):
+            while not stop.is_set():
+                start = time.perf_counter()
+                r = await client.get("/health")
+                r.raise_for_status()
+                health_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe_health(stop))
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(one_chat(i) for i in range(total)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await prober
+        finally:
+            # A failed request must not leave the prober polling /health forever
+            if not prober.done():
+                prober.cancel()
+                await asyncio.gather(prober, return_exceptions=True)
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "chat_rps": round(total / elapsed, 1),
+        "chat_p50_ms": round(statistics.median(chat_latencies) * 1000, 1),
+        "chat_p99_ms": round(_percentile(chat_latencies, 99) * 1000, 1),
+        "health_p50_ms": round(statistics.median(health_latencies) * 1000, 2),
+        "health_p99_ms": round(_percentile(health_latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    result = asyncio.run(_run(args.requests, args.concurrency))
+    for key, value in result.items():
+        print(f"{key:>15}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Measure backend cold start: module import plus the first request, in fresh interpreters.
+
+    python -m backend.benchmarks.cold_start --runs 5 --path /health --path /daily-tip
+
+Each run starts a new Python process, imports backend.main and drives one ASGI
+request per path (with lifespan startup) without an HTTP client, so nothing but
+the app itself is timed. ``--warmup genai,pandas`` repeats the measurement with
+those dependencies preloaded at startup (``WARMUP_MODULES``, not in background).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = r'''
+import asyncio, json, sys, time
+paths = json.loads(sys.argv[1])
+started = time.perf_counter()
+import backend.main as main
+imported = time.perf_counter()
+
+async def call(app, scope, messages):
+    queue = list(messages)
+    sent = []
+    async def receive():
+        return queue.pop(0) if queue else {"type": "http.disconnect"}
+    async def send(message):
+        sent.append(message)
+    await app(scope, receive, send)
+    return sent
+
+async def run():
+    timings = {}
+    startup_queue = asyncio.Queue()
+    await startup_queue.put({"type": "lifespan.startup"})
+    started_up = asyncio.Event()
+    async def lifespan_receive():
+        return await startup_queue.get()
+    async def lifespan_send(message):
+        if message["type"].startswith("lifespan.startup"):
+            started_up.set()
+    t = time.perf_counter()
+    lifespan = asyncio.create_task(main.app({"type": "lifespan", "asgi": {"version": "3.0"}}, lifespan_receive, lifespan_send))
+    await started_up.wait()
+    timings["startup"] = time.perf_counter() - t
+    for path in paths:
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+                 "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+                 "root_path": "", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80)}
+        t = time.perf_counter()
+        sent = await call(main.app, scope, [{"type": "http.request", "body": b"", "more_body": False}])
+        timings[path] = time.perf_counter() - t
+        status = next(m["status"] for m in sent if m["type"] == "http.response.start")
+        timings[path + " status"] = status
+    await startup_queue.put({"type": "lifespan.shutdown"})
+    await lifespan
+    return timings
+
+timings = asyncio.run(run())
+timings["import"] = imported - started
+print(json.dumps(timings))
+'''
+
+
+def _run_once(paths, env) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", CHILD, json.dumps(paths)],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _report(label: str, runs: list, paths):
+    print(f"{label}:")
+    for key in ["import", "startup", *paths]:
+        values = [run[key] * 1000 for run in runs]
+        status = f" (HTTP {runs[0][key + ' status']})" if key in paths else ""
+        print(f"  {key:<12} median {statistics.median(values):>8.1f} ms  max {max(values):>8.1f} ms{status}")
+    total = [run["import"] + run["startup"] + sum(run[p] for p in paths) for run in runs]
+    print(f"  {'total':<12} median {statistics.median(total) * 1000:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--warmup", default="genai,pandas", help="WARMUP_MODULES for the comparison run ('' to skip)")
+    args = parser.parse_args()
+    paths = args.paths or ["/health"]
+
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    base_env = dict(os.environ, PYTHONPATH=root, LLM_BACKEND=os.environ.get("LLM_BACKEND", "fake"), WARMUP_MODULES="")
+    configs = [("lazy (default)", base_env)]
+    if args.warmup:
+        configs.append((f"warm-up {args.warmup}", dict(base_env, WARMUP_MODULES=args.warmup, WARMUP_IN_BACKGROUND="false")))
+    for label, env in configs:
+        _report(label, [_run_once(paths, env) for _ in range(args.runs)], paths)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark the streaming XLSX writer against the old pandas/openpyxl report path.
+
+    python -m backend.benchmarks.excel_report --rows 1000 10000 100000
+
+Reports wall time and peak traced Python memory for each writer. The legacy
+writer is skipped above --legacy-max-rows because it gets very slow.
+"""
+import argparse
+import io
+import time
+import tracemalloc
+
+from backend.expenses.models import ExpenseItem
+from backend.reports.excel import create_excel_response, write_expense_report
+
+
+def legacy_create_excel_response(expenses):
+    """The pre-streaming implementation, kept here only as a baseline."""
+    import pandas as pd
+    from openpyxl.styles import Font, PatternFill, Alignment
+
+    df = pd.DataFrame([{
+        'Date': expense.date,
+        'Description': expense.description,
+        'Amount (₹)': expense.amount,
+        'Category': expense.category
+    } for expense in expenses])
+
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Expenses', index=False)
+        worksheet = writer.sheets['Expenses']
+        header_font = Font(bold=True, color="FFFFFF")
+        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        for cell in worksheet[1]:
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = Alignment(horizontal="center")
+        for column in worksheet.columns:
+            max_length = 0
+            column_letter = column[0].column_letter
+            for cell in column:
+                if len(str(cell.value)) > max_length:
+                    max_length = len(str(cell.value))
+            worksheet.column_dimensions[column_letter].width = min(max_length + 2, 50)
+        total_row = len(df) + 2
+        worksheet[f'C{total_row}'] = "Total:"
+        worksheet[f'D{total_row}'] = f"₹{df['Amount (₹)'].sum():.2f}"
+        worksheet[f'C{total_row}'].font = Font(bold=True)
+        worksheet[f'D{total_row}'].font = Font(bold=True)
+    return output.getvalue()
+
+
+def _expenses(count: int):
+    categories = ["Food & Dining", "Transportation", "Shopping", "Entertainment"]
+    for i in range(count):
+        yield ExpenseItem(
+            date=f"2025-08-{i % 28 + 1:02d}",
+            description=f"Expense item number {i}",
+            amount=float(i % 5000) + 0.5,
+            category=categories[i % len(categories)],
+        )
+
+
+def _measure(fn, rows: int):
+    # Time untraced first; tracemalloc slows allocation-heavy code considerably
+    started = time.perf_counter()
+    data = fn(rows)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--legacy-max-rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    writers = {
+        # Streaming path consumes a generator, so rows are never all in memory
+        "streaming": lambda n: create_excel_response(_expenses(n)),
+        "legacy": lambda n: legacy_create_excel_response(list(_expenses(n))),
+    }
+    for rows in args.rows:
+        for name, fn in writers.items():
+            if name == "legacy" and rows > args.legacy_max_rows:
+                continue
+            elapsed, peak, size = _measure(fn, rows)
+            print(f"{rows:>7} rows {name:>9}: {elapsed * 1000:>9.1f} ms, "
+                  f"peak {peak / 1024 / 1024:>7.1f} MiB, file {size / 1024:>8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
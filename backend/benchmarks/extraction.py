@@ -0,0 +1,56 @@
+"""Micro-benchmark for extract_expenses_from_text.
+
+    python -m backend.benchmarks.extraction --seconds 2
+
+Reports messages/sec for short chat messages, 10 KB pasted inputs and a
+pathological input with many anchors and no amounts.
+"""
+import argparse
+import time
+
+from backend.expenses.extractor import extract_expenses_from_text
+
+SHORT_MESSAGES = [
+    "took flight for 4000 rs and ate at airport for 1200 rs",
+    "I spent 150 on books yesterday",
+    "bought headphones for 2000 rs",
+    "paid 300 rs for uber and spent ₹200 on snacks and coffee",
+    "movie ticket for 250",
+    "how do I start a SIP with 500 rupees a month?",
+    "hello, can you help me budget?",
+]
+
+
+def _pad(text: str, size: int) -> str:
+    out = text
+    while len(out) < size:
+        out += " " + text
+    return out[:size]
+
+
+def _rate(messages, seconds: float) -> float:
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        for message in messages:
+            extract_expenses_from_text(message, "")
+            count += 1
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    cases = {
+        "short": SHORT_MESSAGES,
+        "10kb": [_pad(". ".join(SHORT_MESSAGES), 10 * 1024)],
+        "10kb_adversarial": [_pad("flight for airport food ate at", 10 * 1024)],
+    }
+    for name, messages in cases.items():
+        print(f"{name:>17}: {_rate(messages, args.seconds):>10.1f} messages/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Offline stand-in for the Gemini REST API, for load tests and benchmarks.
+
+    python -m backend.benchmarks.fake_gemini --port 8765 --latency-ms 200 --token-delay-ms 20
+
+then start the backend with ``GEMINI_API_ENDPOINT=http://127.0.0.1:8765`` (and any
+non-empty ``GEMINI_API_KEY``) so the real SDK call path runs against it.
+
+Serves ``models/{model}:generateContent`` and ``:streamGenerateContent`` with a
+configurable time to first token, per-chunk delay, jitter and error rate.
+JSON-mode requests get the same ``{"key": n}`` answers as ``LLM_BACKEND=fake``.
+``GET /stats`` reports the calls received.
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from backend.llm.client import FakeBackend
+
+
+class FakeGeminiServer:
+    def __init__(self, latency_ms: float = 200, token_delay_ms: float = 20, jitter_ms: float = 0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.token_delay_ms = token_delay_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._replies = FakeBackend()
+        self.calls = {"generate": 0, "stream": 0, "errors": 0}
+        self.app = Starlette(routes=[
+            Route("/v1beta/models/{target}", self._model_call, methods=["POST"]),
+            Route("/stats", self._stats, methods=["GET"]),
+        ])
+        self._server = None
+        self._thread = None
+        self.port = None
+
+    def _delay(self, ms: float) -> float:
+        if self.jitter_ms:
+            ms += self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, ms) / 1000.0
+
+    def _reply(self, body: dict) -> str:
+        contents = body.get("contents") or [{}]
+        prompt = "".join(part.get("text", "") for part in contents[-1].get("parts", []))
+        config = body.get("generationConfig") or {}
+        if config.get("responseMimeType") == "application/json":
+            return self._replies._json_reply(prompt)
+        return self._replies._reply(prompt)
+
+    @staticmethod
+    def _candidate(text: str, finished: bool = True) -> dict:
+        candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+        if finished:
+            candidate["finishReason"] = "STOP"
+        return {"candidates": [candidate]}
+
+    async def _model_call(self, request: Request):
+        target = request.path_params["target"]
+        model, _, method = target.partition(":")
+        body = await request.json()
+        streaming = method == "streamGenerateContent"
+        self.calls["stream" if streaming else "generate"] += 1
+
+        await asyncio.sleep(self._delay(self.latency_ms))
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.calls["errors"] += 1
+            return JSONResponse(
+                {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}},
+                status_code=503,
+            )
+
+        text = self._reply(body)
+        if not streaming:
+            return JSONResponse(self._candidate(text))
+
+        async def chunks():
+            # The REST transport expects one streamed JSON array of responses
+            words = text.split(" ")
+            yield "["
+            for i, word in enumerate(words):
+                last = i == len(words) - 1
+                yield ("," if i else "") + json.dumps(self._candidate(word if last else word + " ", last))
+                if not last:
+                    await asyncio.sleep(self._delay(self.token_delay_ms))
+            yield "]"
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    async def _stats(self, request: Request):
+        return JSONResponse({**self.calls, "model_latency_ms": self.latency_ms})
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve from a daemon thread; returns the base URL."""
+        import uvicorn
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        self.port = sock.getsockname()[1]
+        config = uvicorn.Config(self.app, log_level="warning", access_log=False, lifespan="off",
+                                backlog=2048, limit_concurrency=None)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [sock]}, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake Gemini server did not start")
+            time.sleep(0.01)
+        return f"http://{host}:{self.port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=200, help="time to first token")
+    parser.add_argument("--token-delay-ms", type=float, default=20, help="delay between streamed chunks")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 503")
+    args = parser.parse_args()
+
+    import uvicorn
+    server = FakeGeminiServer(args.latency_ms, args.token_delay_ms, args.jitter_ms, args.error_rate)
+    uvicorn.run(server.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Throughput benchmark for the bank SMS parser on a synthetic inbox.
+
+    python -m backend.benchmarks.sms_parser --messages 100000
+
+Generates a seeded corpus in the formats of the built-in templates (plus
+unknown-bank messages for the generic scan, and OTPs, promotions and chat text
+that must be rejected), then reports messages/sec and field accuracy for the
+indexed parser, for trying every template in turn, and for the conversational
+``extract_expenses_from_text`` the batch endpoint used before. ``--extra-templates``
+registers layouts for other banks (none of which occur in the corpus) to show
+how each approach scales with the size of the registry.
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from backend.expenses.extractor import extract_expenses_from_text
+from backend.expenses.sms import (ACCOUNT, AMOUNT, CREDIT, DATE, DEBIT, RS, TEMPLATES, SmsParser, SmsTemplate,
+                                  _clean_merchant, parse_generic)
+
+MERCHANTS = ["AMAZON", "SWIGGY", "ZOMATO", "FLIPKART", "UBER", "BIGBASKET", "DMART", "BOOKMYSHOW",
+             "APOLLO PHARMACY", "RELIANCE TRENDS", "IRCTC", "NETFLIX", "STARBUCKS", "BMTC BUS"]
+PEOPLE = ["RAHUL SHARMA", "PRIYA NAIR", "ANKIT VERMA", "SNEHA IYER"]
+
+# (template, sender, direction, format); fields: a=amount, c=account, m=merchant, plus date styles
+LAYOUTS = [
+    ("hdfc_card_spent", "VM-HDFCBK", DEBIT,
+     "Rs.{a} spent on HDFC Bank Card x{c} at {m} on {iso}:10:15:32.Not You? To Block+Reissue Call 18002586161"),
+    ("hdfc_upi_sent", "AD-HDFCBK", DEBIT,
+     "Sent Rs.{a}\nFrom HDFC Bank A/C *{c}\nTo {m}\nOn {dmy_slash}\nRef 523412345678\nNot You?\nCall 18002586161"),
+    ("hdfc_deposit", "VM-HDFCBK", CREDIT,
+     "Update! INR {a} deposited in HDFC Bank A/c XX{c} on {dmony_dash} for NEFT Cr-SBIN0001234-{p}."
+     "Avl bal INR 12,345.67. Cheque deposits in A/C are subject to clearing"),
+    ("sbi_upi_debit", "BZ-SBIUPI", DEBIT,
+     "Dear UPI user A/C X{c} debited by {a} on date {dmony} trf to {m} Refno 523412345678. "
+     "If not u? call 1800111109. -SBI"),
+    ("sbi_credit", "AD-SBIINB", CREDIT,
+     "Dear SBI User, your A/c X{c}-credited by Rs.{a} on {dmony} transfer from {p} Ref No 523412345678 -SBI"),
+    ("icici_upi_debit", "JD-ICICIB", DEBIT,
+     "ICICI Bank Acct XX{c3} debited for Rs {a} on {dmony_dash}; {m} credited. UPI:523412345678. "
+     "Call 18002662 for dispute."),
+    ("icici_card_spent", "JD-ICICIT", DEBIT,
+     "INR {a} spent using ICICI Bank Card XX{c} on {dmony_dash} on {m}. Avl Limit: INR 50,000.00."),
+    ("axis_debit_on_at", "AX-AXISBK", DEBIT,
+     "INR {a} debited from A/c no. XX{c} on {dmy} at {m}. Avl Bal INR 10,000.00 - Axis Bank"),
+    ("axis_debit_at_on", "AX-AXISBK", DEBIT, "INR {a} debited from A/c XX{c} at {m} on {dmy}"),
+    ("axis_credit", "AX-AXISBK", CREDIT,
+     "INR {a} credited to A/c no. XX{c} on {dmy} by {p}. Avl Bal INR 12,000.00 - Axis Bank"),
+    ("kotak_upi_sent", "VK-KOTAKB", DEBIT,
+     "Sent Rs.{a} from Kotak Bank AC X{c} to {vpa}@axis on {dmy}.UPI Ref 523412345678. Not you, https://kotak.com/"),
+    ("kotak_received", "VK-KOTAKB", CREDIT,
+     "Received Rs.{a} in your Kotak Bank AC X{c} from {vpa}@okicici on {dmy}.UPI Ref 523412345678."),
+    ("generic", "CP-CANBNK", DEBIT,
+     "Rs.{a} paid thru A/C XX{c} on {dmy} to {m}, UPI Ref 523412345678. If not done, SMS BLOCK to 9901771222.-Canara Bank"),
+    ("generic", "VM-PNBSMS", DEBIT,
+     "Your a/c no. XXXXXXXX{c} is debited for Rs.{a} on {dmy_long} and credited to a/c no. XXXX5678 "
+     "(UPI Ref no 523412345678)"),
+    # Bare amounts and account numbers next to the date, and month names in the date
+    ("generic", "AD-IDFCFB", DEBIT, "Rs {a} debited from A/c {c} on {dmy} at {m}. Avl bal Rs 1,234.00 -IDFC FIRST"),
+    ("generic", "VM-YESBNK", DEBIT, "Rs.{a} paid from a/c {c} to {m} on {iso}"),
+    ("generic", "JD-RBLBNK", DEBIT, "₹ {a} spent on card ending {c} at {m} on {d_mon_yy}."),
+    ("generic", "BZ-BOBTXN", DEBIT, "INR {a} withdrawn from A/c no. XX{c} on {d_month_yyyy} at {m}. -Bank of Baroda"),
+]
+
+NOISE = [
+    ("VM-HDFCBK", "{otp} is your OTP for txn of Rs {a} at {m} on HDFC Bank card x{c}. Valid for 5 mins."),
+    ("AD-FLPKRT", "Big Billion Days are here! Get Rs 500 off on your next purchase. T&C apply."),
+    ("JD-JIOINF", "Your data pack of 2GB/day expires tomorrow. Recharge now with Rs 299."),
+    (None, "took flight for 4000 rs and ate at airport for 1200 rs"),
+    (None, "hey, are we still on for dinner tonight?"),
+]
+
+
+def _fields(rng: random.Random) -> dict:
+    day = date(2025, 1, 1) + timedelta(days=rng.randrange(365))
+    if rng.random() < 0.5:
+        amount = round(rng.uniform(10, 25000), 2)
+        text = f"{amount:,.2f}"
+    else:
+        # Plain integers ("Rs 2500") look like years and day-month pairs to a loose date scan
+        amount = float(rng.randrange(10, 25000))
+        text = str(int(amount))
+    merchant = rng.choice(MERCHANTS)
+    account = f"{rng.randrange(10000):04d}"
+    return {
+        "amount": amount,
+        "a": text,
+        "c": account,
+        "c3": account[1:],
+        "m": merchant,
+        "p": rng.choice(PEOPLE),
+        "vpa": merchant.lower().replace(" ", ""),
+        "otp": f"{rng.randrange(1000000):06d}",
+        "date": day.isoformat(),
+        "iso": day.isoformat(),
+        "dmy": day.strftime("%d-%m-%y"),
+        "dmy_long": day.strftime("%d-%m-%Y"),
+        "dmy_slash": day.strftime("%d/%m/%y"),
+        "dmony": day.strftime("%d%b%y"),
+        "dmony_dash": day.strftime("%d-%b-%y").upper(),
+        "d_mon_yy": f"{day.day}-{day.strftime('%b-%y')}",
+        "d_month_yyyy": f"{day.day} {day.strftime('%B %Y')}",
+    }
+
+
+def build_corpus(count: int, noise: float = 0.2, no_sender: float = 0.1, seed: int = 7):
+    """``(sender, body, expected)`` triples; ``expected`` is None for non-transactions."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        fields = _fields(rng)
+        if rng.random() < noise:
+            sender, layout = rng.choice(NOISE)
+            corpus.append((sender, layout.format(**fields), None))
+            continue
+        name, sender, direction, layout = rng.choice(LAYOUTS)
+        if rng.random() < no_sender:
+            sender = None
+        merchant = fields["vpa"] if "{vpa}" in layout else (fields["p"] if "{p}" in layout else fields["m"])
+        expected = {
+            "template": name,
+            "amount": fields["amount"],
+            "direction": direction,
+            "merchant": merchant if "{m}" in layout or "{p}" in layout or "{vpa}" in layout else None,
+            "date": fields["date"],
+            "account": fields["c3"] if "{c3}" in layout else fields["c"],
+        }
+        corpus.append((sender, layout.format(**fields), expected))
+    return corpus
+
+
+def extra_templates(count: int, seed: int = 7):
+    """Layouts of ``count`` made-up banks, sharing the real templates' leading words."""
+    rng = random.Random(seed)
+    leads = [("inr", RS), ("rs", RS), ("dear", "dear customer, " + RS), ("sent", "sent " + RS)]
+    templates = []
+    for i in range(count):
+        keyword, lead = rng.choice(leads)
+        templates.append(SmsTemplate(
+            f"bank{i}_debit", f"Bank {i}", [f"BNK{i:03d}"], [keyword], DEBIT,
+            lead + AMOUNT + rf" debited from bank{i} a/c " + ACCOUNT + r" on " + DATE + r" at (?P<merchant>.+?)\.",
+        ))
+    return templates
+
+
+def linear_parser(templates):
+    """Baseline without the index: every template in registration order, then the generic scan."""
+    def parse(body: str, sender=None):
+        body = body.strip()
+        for template in templates:
+            transaction = template.parse(body)
+            if transaction is not None:
+                return transaction
+        return parse_generic(body)
+    return parse
+
+
+def _correct(transaction, expected) -> bool:
+    if expected is None:
+        return transaction is None
+    if transaction is None:
+        return False
+    merchant = _clean_merchant(expected["merchant"]) if expected["merchant"] else None
+    return (transaction.amount == expected["amount"] and transaction.direction == expected["direction"]
+            and transaction.date == expected["date"] and transaction.account == expected["account"]
+            and (merchant is None or (transaction.merchant or "").lower() == merchant.lower()))
+
+
+def _run(name: str, parse, corpus):
+    started = time.perf_counter()
+    results = [parse(body, sender) for sender, body, _ in corpus]
+    elapsed = time.perf_counter() - started
+    correct = sum(_correct(result, expected) for result, (_, _, expected) in zip(results, corpus))
+    print(f"{name:>22}: {len(corpus) / elapsed:>10.0f} messages/sec  {correct / len(corpus):>7.2%} correct")
+    return results
+
+
+def _run_extractor(corpus):
+    started = time.perf_counter()
+    correct = 0
+    for sender, body, expected in corpus:
+        expenses = extract_expenses_from_text(body, "")
+        if expected is None:
+            correct += not expenses
+        elif expected["direction"] == DEBIT:
+            correct += len(expenses) == 1 and expenses[0].amount == expected["amount"]
+    elapsed = time.perf_counter() - started
+    print(f"{'conversational':>22}: {len(corpus) / elapsed:>10.0f} messages/sec  "
+          f"{correct / len(corpus):>7.2%} correct (amount only)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--noise", type=float, default=0.2, help="fraction of OTP/promo/chat messages")
+    parser.add_argument("--no-sender", type=float, default=0.1, help="fraction of bank SMS without a sender ID")
+    parser.add_argument("--extra-templates", type=int, default=0, help="register this many other-bank layouts")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skip-extractor", action="store_true", help="skip the conversational extractor run")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.messages, args.noise, args.no_sender, args.seed)
+    templates = extra_templates(args.extra_templates, args.seed) + list(TEMPLATES)
+    random.Random(args.seed).shuffle(templates)
+    print(f"{len(corpus)} messages, {len(templates)} templates")
+    results = _run("indexed", SmsParser(templates).parse, corpus)
+    _run("every template", linear_parser(templates), corpus)
+    if not args.skip_extractor:
+        _run_extractor(corpus)
+
+    misses = {}
+    for result, (_, _, expected) in zip(results, corpus):
+        if not _correct(result, expected):
+            key = expected["template"] if expected else "noise"
+            misses[key] = misses.get(key, 0) + 1
+    for key, count in sorted(misses.items(), key=lambda item: -item[1]):
+        print(f"  wrong: {key} x{count}")
+
+
+if __name__ == "__main__":
+    main()
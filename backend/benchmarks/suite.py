@@ -0,0 +1,338 @@
+"""Offline load test and micro-benchmarks with a JSON results file and regression checks.
+
+    python -m backend.benchmarks.suite --output bench.json
+    python -m backend.benchmarks.suite --baseline bench.json --max-regression 0.15
+
+The backend runs under uvicorn in a child process with the real Gemini SDK
+pointed at the local stand-in server (``fake_gemini``), so nothing leaves the
+machine. Each scenario sends ``--requests`` requests at ``--concurrency`` and
+records throughput, latency percentiles and errors. The micro-benchmarks time
+extraction, categorization and report generation in-process.
+
+With ``--baseline`` the run is compared against an earlier results file. If
+throughput drops, or p95 latency rises, by more than ``--max-regression``, or new
+errors appear, it prints the offending metrics and exits with status 1.
+
+Requires httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from backend.benchmarks.fake_gemini import FakeGeminiServer
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+BENCH_USER = "bench"
+
+CHAT_MESSAGES = [
+    "I spent {n} on lunch and 40 on bus fare today",
+    "how do I start a SIP with {n} rupees a month?",
+    "paid {n} for groceries at the market and 120 for a movie",
+    "what is a good emergency fund for a student spending {n} a month?",
+]
+
+# name -> (method, path, JSON body for request i or None, response is streamed)
+SCENARIOS = {
+    "chat": ("POST", "/chat", lambda i: {"message": CHAT_MESSAGES[i % 4].format(n=100 + i)}, False),
+    "chat_stream": ("POST", "/chat/stream", lambda i: {"message": CHAT_MESSAGES[i % 4].format(n=100 + i)}, True),
+    "daily_tip": ("GET", "/daily-tip", None, False),
+    "daily_tip_category": ("POST", "/daily-tip", lambda i: {"category": ("saving", "budgeting", "investing")[i % 3]}, False),
+    "generate_excel": ("POST", "/generate-excel", lambda i: {"message": f"spent {100 + i} on dinner and {20 + i} on taxi"}, False),
+    "download_excel": ("GET", f"/download/excel?user_id={BENCH_USER}", None, False),
+    "download_csv": ("GET", f"/download/csv?user_id={BENCH_USER}", None, True),
+}
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+
+def _start_backend(model_url: str, workdir: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "LLM_BACKEND": "gemini",
+        "GEMINI_API_ENDPOINT": model_url,
+        "LEDGER_DB_PATH": os.path.join(workdir, "ledger.db"),
+        "SHARED_CACHE_PATH": os.path.join(workdir, "shared_cache.db"),
+    })
+    env.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    # Measure the serving path, not admission control
+    env.setdefault("RATE_LIMIT_PER_MINUTE", "0")
+    env.setdefault("LLM_MAX_QUEUE", "100000")
+    env.setdefault("LLM_QUEUE_TIMEOUT_SECONDS", "120")
+    return subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "uvicorn", "backend.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env,
+    )
+
+
+async def _wait_ready(client, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Backend did not become ready")
+        await asyncio.sleep(0.1)
+
+
+async def _seed_ledger(client, rows: int):
+    batch = []
+    for i in range(rows):
+        batch.append({
+            "date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "description": ("lunch", "bus fare", "groceries", "movie ticket", "medicine")[i % 5],
+            "amount": 10 + i % 490,
+        })
+        if len(batch) == 1000 or i == rows - 1:
+            r = await client.post("/expenses", json={"user_id": BENCH_USER, "expenses": batch})
+            r.raise_for_status()
+            batch = []
+
+
+async def _run_scenario(client, name: str, total: int, concurrency: int) -> dict:
+    method, path, body, streamed = SCENARIOS[name]
+    gate = asyncio.Semaphore(concurrency)
+    latencies, first_bytes, statuses = [], [], {}
+
+    async def one(i):
+        async with gate:
+            started = time.perf_counter()
+            first = None
+            try:
+                async with client.stream(method, path, json=body(i) if body else None) as r:
+                    async for _ in r.aiter_raw():
+                        if first is None:
+                            first = time.perf_counter() - started
+                status = r.status_code
+            except Exception:
+                status = "error"
+            latencies.append(time.perf_counter() - started)
+            if streamed and first is not None:
+                first_bytes.append(first)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    errors = sum(count for status, count in statuses.items() if status == "error" or status >= 400)
+    result = {
+        "requests": total,
+        "concurrency": concurrency,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "error_rate": round(errors / total, 4),
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+    }
+    if first_bytes:
+        result["ttfb_p50_ms"] = round(statistics.median(first_bytes) * 1000, 2)
+    return result
+
+
+async def _load_test(base_url: str, names, total: int, concurrency: int, ledger_rows: int,
+                     seed: bool) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await _wait_ready(client)
+        if seed:
+            await _seed_ledger(client, ledger_rows)
+        results = {}
+        for name in names:
+            # A few unmeasured requests first so lazy imports and pools are warm
+            await _run_scenario(client, name, min(total, concurrency), concurrency)
+            results[name] = await _run_scenario(client, name, total, concurrency)
+            print(f"{name:>20}: {results[name]['rps']:>8.1f} req/s  p50 {results[name]['p50_ms']:>8.1f} ms  "
+                  f"p95 {results[name]['p95_ms']:>8.1f} ms  errors {results[name]['error_rate']:.1%}")
+        return results
+
+
+def _time_call(fn, repeat: int, min_seconds: float = 0.2) -> dict:
+    """Best-of-``repeat`` timing, each round running ``fn`` enough times to last ``min_seconds``."""
+    fn()
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        if time.perf_counter() - started >= min_seconds / 4:
+            break
+        iterations *= 2
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        rounds.append((time.perf_counter() - started) / iterations)
+    best = min(rounds)
+    return {
+        "ops_per_sec": round(1 / best, 1),
+        "best_us": round(best * 1e6, 2),
+        "median_us": round(statistics.median(rounds) * 1e6, 2),
+    }
+
+
+def _micro_benchmarks(repeat: int) -> dict:
+    from backend.expenses.categories import categorize_expense
+    from backend.expenses.extractor import extract_expenses_from_text
+    from backend.expenses.models import ExpenseItem
+    from backend.reports.excel import create_excel_response
+
+    message = "Yesterday I spent 250 on lunch, 40 on bus fare and paid 1200 for new shoes at the market"
+    descriptions = ["dinner at restaurant", "uber to airport", "doctor visit", "cinema tickets", "misc"]
+    expenses = [ExpenseItem(date="2025-01-01", description=f"item {i}", amount=10 + i, category="Other")
+                for i in range(100)]
+
+    benchmarks = {
+        "extract_expenses_from_text": lambda: extract_expenses_from_text(message, ""),
+        "categorize_expense": lambda: [categorize_expense(d) for d in descriptions],
+        "create_excel_response_100_rows": lambda: create_excel_response(expenses),
+    }
+    results = {}
+    for name, fn in benchmarks.items():
+        results[name] = _time_call(fn, repeat)
+        print(f"{name:>32}: {results[name]['ops_per_sec']:>12.1f} ops/s  best {results[name]['best_us']:>10.1f} us")
+    return results
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> list:
+    """Metrics that regressed by more than ``max_regression`` (a fraction) against ``baseline``."""
+    failures = []
+
+    def check(label, now, before, higher_is_better):
+        if not before:
+            return
+        change = (now - before) / before
+        if (-change if higher_is_better else change) > max_regression:
+            failures.append(f"{label}: {before} -> {now} ({change:+.1%})")
+
+    for name, before in baseline.get("scenarios", {}).items():
+        now = current.get("scenarios", {}).get(name)
+        if now is None:
+            continue
+        check(f"{name} rps", now["rps"], before["rps"], True)
+        check(f"{name} p95_ms", now["p95_ms"], before["p95_ms"], False)
+        if now["error_rate"] > before["error_rate"] + 0.01:
+            failures.append(f"{name} error_rate: {before['error_rate']} -> {now['error_rate']}")
+    for name, before in baseline.get("micro", {}).items():
+        now = current.get("micro", {}).get(name)
+        if now is not None:
+            check(f"{name} ops_per_sec", now["ops_per_sec"], before["ops_per_sec"], True)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scenario", action="append", dest="scenarios", choices=sorted(SCENARIOS),
+                        help="repeatable; default is every scenario")
+    parser.add_argument("--ledger-rows", type=int, default=5000, help="expenses seeded for the download scenarios")
+    parser.add_argument("--model-latency-ms", type=float, default=200)
+    parser.add_argument("--model-token-delay-ms", type=float, default=20)
+    parser.add_argument("--model-jitter-ms", type=float, default=0)
+    parser.add_argument("--model-error-rate", type=float, default=0.0)
+    parser.add_argument("--base-url", help="load-test an already running backend instead of starting one")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5, help="micro-benchmark rounds (best is kept)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "model_latency_ms": args.model_latency_ms,
+            "model_token_delay_ms": args.model_token_delay_ms,
+        },
+        "scenarios": {},
+        "micro": {},
+    }
+
+    if not args.skip_load:
+        names = args.scenarios or list(SCENARIOS)
+        if args.base_url:
+            results["scenarios"] = asyncio.run(_load_test(
+                args.base_url, names, args.requests, args.concurrency, args.ledger_rows, seed=False,
+            ))
+        else:
+            model = FakeGeminiServer(args.model_latency_ms, args.model_token_delay_ms,
+                                     args.model_jitter_ms, args.model_error_rate)
+            model_url = model.start()
+            port = _free_port()
+            with tempfile.TemporaryDirectory() as workdir:
+                backend = _start_backend(model_url, workdir, port)
+                try:
+                    results["scenarios"] = asyncio.run(_load_test(
+                        f"http://127.0.0.1:{port}", names, args.requests, args.concurrency,
+                        args.ledger_rows, seed=True,
+                    ))
+                finally:
+                    backend.terminate()
+                    backend.wait(timeout=30)
+                    model.stop()
+            results["meta"]["model_calls"] = model.calls
+
+    if not args.skip_micro:
+        results["micro"] = _micro_benchmarks(args.repeat)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures = compare(results, baseline, args.max_regression)
+        if failures:
+            print(f"Regressions beyond {args.max_regression:.0%} against {args.baseline}:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.max_regression:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Compare refilling every tip pool one call per tip against batched JSON refills.
+
+    LLM_BACKEND=fake python -m backend.benchmarks.tip_refresh --pool-size 5
+
+Uses the fake LLM backend (forced here) so only call counts and simulated
+latency are measured.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ["LLM_BACKEND"] = "fake"
+# The pools live in the shared cache; keep benchmark tips out of the real one
+os.environ.setdefault("SHARED_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "shared_cache.db"))
+
+from backend.tips.pool import TipPool  # noqa: E402
+from backend.tips.service import CATEGORY_PROMPTS  # noqa: E402
+
+
+class _DistinctPool(TipPool):
+    # The fake backend repeats itself; make single-call tips unique so dedup doesn't skew counts
+    def add(self, category: str, tip: str) -> bool:
+        return super().add(category, f"{tip} #{self.model_calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pool-size", type=int, default=5)
+    args = parser.parse_args()
+
+    for batch in (False, True):
+        pool = _DistinctPool(CATEGORY_PROMPTS, size=args.pool_size, batch=batch,
+                             namespace=f"tip_pool_bench_{'batched' if batch else 'per_tip'}")
+        started = time.perf_counter()
+        asyncio.run(pool.refill())
+        elapsed = time.perf_counter() - started
+        stats = pool.stats()
+        print(f"{'batched' if batch else 'per-tip':>8}: {stats['generated']:>3} tips, "
+              f"{stats['model_calls']:>3} model calls, {stats['calls_saved']:>3} saved, {elapsed * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# chat package
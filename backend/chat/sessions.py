@@ -0,0 +1,202 @@
+"""Conversation state for the WebSocket chat channel.
+
+A session keeps the last ``CHAT_SESSION_MAX_TURNS`` exchanges, replayed to the
+model so follow-ups ("and 200 for the cab back") keep their context, and one
+running expense report: each turn's expenses are appended and the totals updated
+in place, and the workbook is only rebuilt when the client asks for it after the
+expenses changed. Sessions idle for ``CHAT_SESSION_IDLE_SECONDS`` are evicted
+and at most ``CHAT_SESSION_MAX_SESSIONS`` are kept per process. A snapshot is
+written to the shared cache after every turn, so a client that reconnects to
+another worker resumes the same session.
+"""
+import asyncio
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from backend.config import CHAT_SESSION_MAX_TURNS, CHAT_SESSION_IDLE_SECONDS, CHAT_SESSION_MAX_SESSIONS
+from backend.expenses.models import ExpenseItem
+from backend.shared_cache import shared_cache
+
+SESSION_NAMESPACE = "chat_session"
+# Longer messages and replies are cut down before they are kept in the history
+MAX_TURN_CHARS = 2000
+
+
+class ChatSession:
+    def __init__(self, session_id: str, user_id: str, max_turns: int = CHAT_SESSION_MAX_TURNS):
+        self.id = session_id
+        self.user_id = user_id
+        self.history: Deque[Tuple[str, str]] = deque(maxlen=max(0, max_turns))
+        self.expenses: List[ExpenseItem] = []
+        self.total_amount = 0.0
+        self.by_category: Dict[str, float] = {}
+        # Report built from the current expenses; cleared whenever they change
+        self.report_id: Optional[str] = None
+        self.last_active = time.monotonic()
+        # One turn at a time, even if the session is open on two connections
+        self.lock = asyncio.Lock()
+
+    def prompt(self, message: str) -> str:
+        """``message`` preceded by the kept history, for the model."""
+        if not self.history:
+            return message
+        lines = ["Conversation so far:"]
+        for user_text, reply in self.history:
+            lines.append(f"User: {user_text}")
+            lines.append(f"Assistant: {reply}")
+        lines.append("")
+        lines.append(f"User: {message}")
+        return "\n".join(lines)
+
+    def add_turn(self, message: str, reply: str):
+        self.history.append((message[:MAX_TURN_CHARS], reply[:MAX_TURN_CHARS]))
+
+    def add_expenses(self, expenses: List[ExpenseItem]):
+        """Merge a turn's expenses into the running report."""
+        if not expenses:
+            return
+        self.expenses.extend(expenses)
+        for expense in expenses:
+            self.total_amount += expense.amount
+            category = expense.category or "Other"
+            self.by_category[category] = self.by_category.get(category, 0.0) + expense.amount
+        self.report_id = None
+
+    @property
+    def last_expense_date(self) -> Optional[str]:
+        return self.expenses[-1].date if self.expenses else None
+
+    def reset(self):
+        self.history.clear()
+        self.expenses = []
+        self.total_amount = 0.0
+        self.by_category = {}
+        self.report_id = None
+
+    def summary(self) -> dict:
+        return {
+            "session_id": self.id,
+            "turns": len(self.history),
+            "count": len(self.expenses),
+            "total_amount": round(self.total_amount, 2),
+            "by_category": {name: round(amount, 2) for name, amount in self.by_category.items()},
+            "report_id": self.report_id,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "history": [list(turn) for turn in self.history],
+            "expenses": [
+                {"date": e.date, "description": e.description, "amount": e.amount, "category": e.category}
+                for e in self.expenses
+            ],
+            "report_id": self.report_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, max_turns: int = CHAT_SESSION_MAX_TURNS) -> "ChatSession":
+        session = cls(data["id"], data["user_id"], max_turns)
+        session.history.extend((user_text, reply) for user_text, reply in data.get("history", []))
+        session.add_expenses([ExpenseItem(**expense) for expense in data.get("expenses", [])])
+        session.report_id = data.get("report_id")
+        return session
+
+
+class ChatSessionStore:
+    def __init__(self, max_sessions: int = CHAT_SESSION_MAX_SESSIONS, idle_seconds: float = CHAT_SESSION_IDLE_SECONDS,
+                 max_turns: int = CHAT_SESSION_MAX_TURNS, shared=shared_cache):
+        self.max_sessions = max(1, max_sessions)
+        self.idle_seconds = idle_seconds
+        self.max_turns = max_turns
+        self.shared = shared
+        # Least recently active first
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.resumed = 0
+        self.evicted = 0
+
+    def _evict(self, now: float):
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if len(self._sessions) <= self.max_sessions and now - oldest.last_active < self.idle_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def _load_shared(self, session_id: str) -> Optional[ChatSession]:
+        try:
+            data = self.shared.get_json(SESSION_NAMESPACE, session_id)
+        except sqlite3.Error as e:
+            print(f"Error reading shared chat session: {e}")
+            return None
+        if not isinstance(data, dict):
+            return None
+        try:
+            return ChatSession.from_dict(data, self.max_turns)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Discarding unreadable chat session {session_id}: {e}")
+            return None
+
+    def open(self, session_id: Optional[str], user_id: str) -> ChatSession:
+        """Resume ``session_id`` if it exists for ``user_id``, else start a new session."""
+        now = time.monotonic()
+        session = None
+        if session_id:
+            with self._lock:
+                session = self._sessions.get(session_id)
+            if session is None:
+                session = self._load_shared(session_id)
+            if session is not None and session.user_id != user_id:
+                session = None
+        if session is not None:
+            self.resumed += 1
+        else:
+            session = ChatSession(secrets.token_urlsafe(16), user_id, self.max_turns)
+            self.created += 1
+        session.last_active = now
+        with self._lock:
+            self._sessions[session.id] = session
+            self._sessions.move_to_end(session.id)
+            self._evict(now)
+        return session
+
+    def touch(self, session: ChatSession):
+        now = time.monotonic()
+        session.last_active = now
+        with self._lock:
+            if session.id in self._sessions:
+                self._sessions.move_to_end(session.id)
+            else:
+                # Evicted while its connection stayed open
+                self._sessions[session.id] = session
+            self._evict(now)
+
+    def save(self, session: ChatSession):
+        """Snapshot the session for other workers; blocking."""
+        try:
+            self.shared.set_json(SESSION_NAMESPACE, session.id, session.to_dict(), ttl=self.idle_seconds)
+        except sqlite3.Error as e:
+            print(f"Error saving chat session: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            active = len(self._sessions)
+        return {
+            "active": active,
+            "max_sessions": self.max_sessions,
+            "idle_seconds": self.idle_seconds,
+            "max_turns": self.max_turns,
+            "created": self.created,
+            "resumed": self.resumed,
+            "evicted": self.evicted,
+        }
+
+
+chat_sessions = ChatSessionStore()
@@ -1,13 +1,112 @@
 from dotenv import load_dotenv
 import os
-import google.generativeai as genai
 
 # Load environment variables
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Alternative Gemini-compatible endpoint reached over the REST transport, e.g. the
+# offline stand-in server in backend/benchmarks/fake_gemini.py
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-else:
+# LLM call path: "gemini" talks to the real API, "fake" uses a local stand-in
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+# Calls beyond LLM_MAX_CONCURRENCY queue (up to LLM_MAX_QUEUE, for at most
+# LLM_QUEUE_TIMEOUT_SECONDS) and are otherwise rejected with 429
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "200"))
+FAKE_LLM_TOKEN_DELAY_MS = float(os.getenv("FAKE_LLM_TOKEN_DELAY_MS", "20"))
+
+# Model per use case; MODEL_CONFIG_FILE (JSON {"chat": ..., "tips": ...}) overrides
+# these and is re-read when it changes
+CHAT_MODEL_NAME = os.getenv("CHAT_MODEL_NAME", "gemini-2.5-flash-lite")
+TIP_MODEL_NAME = os.getenv("TIP_MODEL_NAME", "gemini-1.5-flash")
+MODEL_CONFIG_FILE = os.getenv("MODEL_CONFIG_FILE")
+MODEL_CONFIG_CHECK_SECONDS = float(os.getenv("MODEL_CONFIG_CHECK_SECONDS", "5"))
+
+# Circuit breaker for model calls: open after N consecutive failures, probe again after the reset time
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+BREAKER_HALF_OPEN_MAX_CALLS = int(os.getenv("BREAKER_HALF_OPEN_MAX_CALLS", "1"))
+# Deadline for tip generation calls; tips always have a fallback, so fail fast
+TIP_TIMEOUT_SECONDS = float(os.getenv("TIP_TIMEOUT_SECONDS", "8"))
+
+# Per-client token buckets on the chat endpoints (RATE_LIMIT_PER_MINUTE=0 disables)
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "10"))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+
+# Per-message budget for expense extraction
+EXPENSE_MAX_CHARS = int(os.getenv("EXPENSE_MAX_CHARS", "20000"))
+EXPENSE_MAX_ITEMS = int(os.getenv("EXPENSE_MAX_ITEMS", "200"))
+EXPENSE_TIME_BUDGET_MS = float(os.getenv("EXPENSE_TIME_BUDGET_MS", "50"))
+
+# Optional JSON keyword table merged over backend/data/expense_categories.json
+EXPENSE_CATEGORIES_FILE = os.getenv("EXPENSE_CATEGORIES_FILE")
+
+# Bulk extraction: worker processes (-1 = one per CPU, 0 = in-process threads)
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "-1"))
+EXTRACT_CHUNK_SIZE = int(os.getenv("EXTRACT_CHUNK_SIZE", "256"))
+EXTRACT_BATCH_MAX_MESSAGES = int(os.getenv("EXTRACT_BATCH_MAX_MESSAGES", "200000"))
+
+# Generated reports: in-memory LRU/TTL store, optionally mirrored to disk
+REPORT_STORE_DIR = os.getenv("REPORT_STORE_DIR")
+REPORT_STORE_MAX_ITEMS = int(os.getenv("REPORT_STORE_MAX_ITEMS", "256"))
+REPORT_STORE_MAX_BYTES = int(os.getenv("REPORT_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+REPORT_TTL_SECONDS = float(os.getenv("REPORT_TTL_SECONDS", "3600"))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "128"))
+# Background export jobs: worker processes (0 runs them on one background thread),
+# unfinished jobs allowed per server process, and how long records and results are kept
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+REPORT_JOB_MAX_PENDING = int(os.getenv("REPORT_JOB_MAX_PENDING", "16"))
+REPORT_JOB_RESULT_TTL_SECONDS = float(os.getenv("REPORT_JOB_RESULT_TTL_SECONDS", "3600"))
+
+# Local SQLite ledger of extracted expenses
+LEDGER_DB_PATH = os.getenv("LEDGER_DB_PATH", os.path.join(os.path.dirname(__file__), "data", "ledger.db"))
+
+# SQLite cache shared by all worker processes (daily tip, reports, report summaries);
+# a worker computing an entry holds a lease for at most SHARED_CACHE_LEASE_SECONDS
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", os.path.join(os.path.dirname(__file__), "data", "shared_cache.db"))
+SHARED_CACHE_MAX_BYTES = int(os.getenv("SHARED_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+SHARED_CACHE_LEASE_SECONDS = float(os.getenv("SHARED_CACHE_LEASE_SECONDS", "30"))
+
+# After a failed daily-tip generation, serve the fallback tip for this long before retrying
+DAILY_TIP_RETRY_SECONDS = float(os.getenv("DAILY_TIP_RETRY_SECONDS", "300"))
+
+# Varied tips are served from per-category pools topped up in the background
+TIP_POOL_SIZE = int(os.getenv("TIP_POOL_SIZE", "5"))
+TIP_POOL_LOW_WATER = int(os.getenv("TIP_POOL_LOW_WATER", "2"))
+TIP_POOL_REFILL_SECONDS = float(os.getenv("TIP_POOL_REFILL_SECONDS", "300"))
+TIP_POOL_DEDUP_WINDOW = int(os.getenv("TIP_POOL_DEDUP_WINDOW", "100"))
+# Refill short pools with one multi-category JSON call instead of one call per tip
+TIP_BATCH_ENABLED = os.getenv("TIP_BATCH_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Opt-in /chat response cache (messages with expense data are never cached)
+CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+CHAT_CACHE_MAX_ITEMS = int(os.getenv("CHAT_CACHE_MAX_ITEMS", "1024"))
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+CHAT_CACHE_MAX_MESSAGE_CHARS = int(os.getenv("CHAT_CACHE_MAX_MESSAGE_CHARS", "500"))
+CHAT_CACHE_DIR = os.getenv("CHAT_CACHE_DIR")
+
+# Identical in-flight /chat requests share one model call; a finished result stays
+# shareable for CHAT_COALESCE_WINDOW_MS. Keys are "exact" or "normalized" messages
+CHAT_COALESCE_ENABLED = os.getenv("CHAT_COALESCE_ENABLED", "true").lower() in ("1", "true", "yes")
+CHAT_COALESCE_WINDOW_MS = float(os.getenv("CHAT_COALESCE_WINDOW_MS", "0"))
+CHAT_COALESCE_KEY = os.getenv("CHAT_COALESCE_KEY", "exact").lower()
+
+# WebSocket chat sessions (/chat/ws): turns replayed to the model, idle eviction and a
+# per-process cap (least recently used sessions are dropped first)
+CHAT_SESSION_MAX_TURNS = int(os.getenv("CHAT_SESSION_MAX_TURNS", "10"))
+CHAT_SESSION_IDLE_SECONDS = float(os.getenv("CHAT_SESSION_IDLE_SECONDS", "1800"))
+CHAT_SESSION_MAX_SESSIONS = int(os.getenv("CHAT_SESSION_MAX_SESSIONS", "1000"))
+
+# Comma-separated dependencies to preload at startup (see backend/warmup.py), e.g. "genai,pandas"
+WARMUP_MODULES = [name.strip() for name in os.getenv("WARMUP_MODULES", "").split(",") if name.strip()]
+# Serve requests while warming up instead of holding startup until it finishes
+WARMUP_IN_BACKGROUND = os.getenv("WARMUP_IN_BACKGROUND", "true").lower() in ("1", "true", "yes")
+
+if not GEMINI_API_KEY:
     print("Warning: GEMINI_API_KEY environment variable not set (backend.config)")
@@ -0,0 +1 @@
+# expenses package
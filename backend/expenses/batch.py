@@ -0,0 +1,228 @@
+"""Bulk expense extraction fanned out across a process pool.
+
+Chunks are dispatched while the request body is still being read, and each
+chunk's results are streamed back as soon as it finishes. At most a few chunks
+per worker are in flight, so reading pauses when the pool falls behind instead
+of buffering the whole body. Reading never waits for the client to take the
+output, since many clients only read the response once the upload is done.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+from backend.config import EXTRACT_WORKERS, EXTRACT_CHUNK_SIZE, EXTRACT_BATCH_MAX_MESSAGES
+from backend.expenses.extractor import extract_expenses_from_text
+from backend.expenses.sms import CREDIT, parse_sms
+from backend.metrics import expenses_extracted_total
+
+_pool: Optional[ProcessPoolExecutor] = None
+_workers = 1
+# Chunks being extracted per pool worker before reading more of the body waits
+PENDING_CHUNKS_PER_WORKER = 2
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Lazily start the shared extraction pool; ``None`` when EXTRACT_WORKERS is 0."""
+    global _pool, _workers
+    if _pool is None and EXTRACT_WORKERS != 0:
+        _workers = EXTRACT_WORKERS if EXTRACT_WORKERS > 0 else (os.cpu_count() or 1)
+        # spawn, not fork: the server process has threads, SQLite connections and locks
+        # that a forked child would inherit mid-use
+        _pool = ProcessPoolExecutor(max_workers=_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_process_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def extract_chunk(chunk: List[Tuple[int, object]]) -> List[dict]:
+    """Extract expenses for ``(index, item)`` pairs; one failing message never sinks the chunk."""
+    results = []
+    for index, item in chunk:
+        result = {"index": index}
+        try:
+            if isinstance(item, str):
+                message, item_id, date, sender = item, None, None, None
+            elif isinstance(item, dict):
+                message = item.get("message") or item.get("body") or item.get("text")
+                item_id, date = item.get("id"), item.get("date")
+                # "address" is what Android's SMS inbox calls the sender
+                sender = item.get("sender") or item.get("address")
+                if not isinstance(message, str):
+                    raise ValueError("item has no 'message', 'body' or 'text' string")
+            else:
+                raise ValueError(f"unsupported item type: {type(item).__name__}")
+
+            if item_id is not None:
+                result["id"] = item_id
+            transaction = parse_sms(message, sender if isinstance(sender, str) else None)
+            if transaction is not None:
+                # Bank SMS: the template's fields are exact, and credits are not expenses
+                result["transaction"] = transaction._asdict()
+                received = date[:10] if isinstance(date, str) and date else None
+                expenses = [] if transaction.direction == CREDIT else [transaction.to_expense(received)]
+            else:
+                expenses = extract_expenses_from_text(message, "")
+                if isinstance(date, str) and date:
+                    # An explicit timestamp (e.g. SMS received date) beats relative words in the text
+                    for expense in expenses:
+                        expense.date = date[:10]
+            result["expenses"] = [
+                {
+                    "date": expense.date,
+                    "description": expense.description,
+                    "amount": expense.amount,
+                    "category": expense.category,
+                }
+                for expense in expenses
+            ]
+        except Exception as e:
+            result["error"] = str(e)
+        results.append(result)
+    return results
+
+
+class _InvalidLine:
+    def __init__(self, error: str):
+        self.error = error
+
+
+async def read_request_items(request) -> AsyncIterator[object]:
+    """Batch items from an NDJSON stream (read lazily) or a JSON array/``{"messages": [...]}`` body.
+
+    A JSON body is parsed here, so a malformed or oversized one raises ValueError
+    before any response is sent.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return _iter_ndjson(request)
+
+    body = await request.json()
+    if isinstance(body, dict):
+        body = body.get("messages", [])
+    if not isinstance(body, list):
+        raise ValueError("expected a JSON array of messages")
+    if len(body) > EXTRACT_BATCH_MAX_MESSAGES:
+        raise ValueError(f"batch exceeds {EXTRACT_BATCH_MAX_MESSAGES} messages")
+    return _iter_list(body)
+
+
+async def _iter_list(items: Iterable[object]) -> AsyncIterator[object]:
+    for item in items:
+        yield item
+
+
+async def _iter_ndjson(request) -> AsyncIterator[object]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return _InvalidLine(f"invalid JSON line: {e}")
+
+
+def _line(payload: dict) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _resolved(loop, results: List[dict]) -> asyncio.Future:
+    future = loop.create_future()
+    future.set_result(results)
+    return future
+
+
+async def stream_extraction(items: AsyncIterator[object]) -> AsyncIterator[bytes]:
+    """Emit one NDJSON line per message as soon as its chunk finishes, then a summary line.
+
+    A reader task consumes ``items`` (the request body) and hands each chunk to the pool
+    as soon as it fills, while finished chunks are written out here; the reader waits
+    while ``PENDING_CHUNKS_PER_WORKER`` chunks per worker are still being extracted.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    slots = asyncio.Semaphore(PENDING_CHUNKS_PER_WORKER * (_workers if pool is not None else 1))
+    finished: asyncio.Queue = asyncio.Queue()
+    unfinished = set()
+
+    def on_done(future: asyncio.Future):
+        unfinished.discard(future)
+        slots.release()
+        finished.put_nowait(future)
+
+    async def dispatch(make_future):
+        await slots.acquire()
+        future = make_future()
+        unfinished.add(future)
+        future.add_done_callback(on_done)
+
+    async def read():
+        try:
+            chunk = []
+            count = 0
+            async for item in items:
+                if count >= EXTRACT_BATCH_MAX_MESSAGES:
+                    error = f"batch exceeds {EXTRACT_BATCH_MAX_MESSAGES} messages; the rest was ignored"
+                    await dispatch(lambda: _resolved(loop, [{"error": error}]))
+                    break
+                if isinstance(item, _InvalidLine):
+                    await dispatch(lambda: _resolved(loop, [{"index": count, "error": item.error}]))
+                else:
+                    chunk.append((count, item))
+                    if len(chunk) >= EXTRACT_CHUNK_SIZE:
+                        full, chunk = chunk, []
+                        await dispatch(lambda: loop.run_in_executor(pool, extract_chunk, full))
+                count += 1
+            if chunk:
+                await dispatch(lambda: loop.run_in_executor(pool, extract_chunk, chunk))
+            if unfinished:
+                await asyncio.wait(set(unfinished))
+        finally:
+            finished.put_nowait(None)
+
+    messages = expenses = failed = 0
+    reader = asyncio.ensure_future(read())
+    try:
+        while True:
+            future = await finished.get()
+            if future is None:
+                break
+            try:
+                results = future.result()
+            except Exception as e:
+                # A crashed worker loses its whole chunk; report it and keep going
+                failed += 1
+                yield _line({"error": f"chunk failed: {e}"})
+                continue
+            for result in results:
+                # Batch-level errors carry no index and are not messages
+                messages += "index" in result
+                if "error" in result:
+                    failed += 1
+                else:
+                    expenses += len(result["expenses"])
+                yield _line(result)
+        # Surfaces a failed body read (e.g. the client went away)
+        await reader
+    finally:
+        reader.cancel()
+        for future in list(unfinished):
+            future.cancel()
+    expenses_extracted_total.inc(expenses, source="batch")
+    yield _line({"done": True, "messages": messages, "expenses": expenses, "errors": failed})
@@ -0,0 +1,146 @@
+"""Data-driven expense categorizer.
+
+Keywords come from ``backend/data/expense_categories.json`` (plus an optional user
+file named by ``EXPENSE_CATEGORIES_FILE``) and are compiled once into an
+Aho-Corasick automaton, so classifying a description is a single linear scan no
+matter how many keywords or categories exist.
+"""
+import json
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.config import EXPENSE_CATEGORIES_FILE
+
+DEFAULT_CATEGORIES_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "expense_categories.json")
+DEFAULT_CATEGORY = "Other"
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over lowercase keywords with word-boundary checks."""
+
+    def __init__(self, keywords: Iterable[Tuple[str, int]]):
+        # keywords: (keyword, payload); a trailing "*" allows the word to continue
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, bool, int]]] = [[]]
+        for keyword, payload in keywords:
+            prefix = keyword.endswith("*")
+            word = keyword.rstrip("*").strip().lower()
+            if word:
+                self._add(word, prefix, payload)
+        self._build_failure_links()
+
+    def _add(self, word: str, prefix: bool, payload: int):
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(word), prefix, payload))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        # Fold failure links into a full transition table (BFS order guarantees the
+        # fail state is complete first), so scanning never has to backtrack
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])]
+        self._delta.extend({} for _ in range(len(self._goto) - 1))
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            table = dict(self._delta[self._fail[state]])
+            table.update(self._goto[state])
+            self._delta[state] = table
+            queue.extend(self._goto[state].values())
+
+    def iter_matches(self, text: str):
+        """Yield ``(start, payload)`` for every keyword occurrence that sits on word boundaries."""
+        delta, out = self._delta, self._out
+        state = 0
+        length = len(text)
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for size, prefix, payload in out[state]:
+                start = i - size + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if not prefix and i + 1 < length and text[i + 1].isalnum():
+                    continue
+                yield start, payload
+
+
+class ExpenseCategorizer:
+    """Maps descriptions to categories; the highest-priority match wins, ties go to the earliest."""
+
+    def __init__(self, categories: List[dict]):
+        self.categories = sorted(categories, key=lambda c: -c.get("priority", 0))
+        self._names = [c["name"] for c in self.categories]
+        self._priorities = [c.get("priority", 0) for c in self.categories]
+        self._top_priority = self._priorities[0] if self._priorities else 0
+        self._automaton = KeywordAutomaton(
+            (keyword, index)
+            for index, category in enumerate(self.categories)
+            for keyword in category.get("keywords", [])
+        )
+
+    @classmethod
+    def from_files(cls, *paths: Optional[str]) -> "ExpenseCategorizer":
+        """Load and merge keyword tables; later files extend or override earlier ones by name."""
+        merged: Dict[str, dict] = {}
+        for path in paths:
+            if not path:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                table = json.load(f)
+            for category in table.get("categories", []):
+                name = category["name"]
+                current = merged.setdefault(name, {"name": name, "priority": 0, "keywords": []})
+                if "priority" in category:
+                    current["priority"] = category["priority"]
+                current["keywords"].extend(category.get("keywords", []))
+        return cls(list(merged.values()))
+
+    def categorize(self, description: str) -> str:
+        best = None
+        for _, index in self._automaton.iter_matches(description.lower()):
+            if best is None or self._priorities[index] > self._priorities[best]:
+                best = index
+                if self._priorities[best] == self._top_priority:
+                    break
+        return self._names[best] if best is not None else DEFAULT_CATEGORY
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._names)
+
+
+def _load_default() -> ExpenseCategorizer:
+    try:
+        return ExpenseCategorizer.from_files(DEFAULT_CATEGORIES_FILE, EXPENSE_CATEGORIES_FILE)
+    except Exception as e:
+        print(f"Error loading custom expense categories, using defaults: {e}")
+        return ExpenseCategorizer.from_files(DEFAULT_CATEGORIES_FILE)
+
+
+categorizer = _load_default()
+
+
+def categorize_expense(description: str) -> str:
+    """Categorize expense based on description"""
+    return categorizer.categorize(description)
@@ -0,0 +1,209 @@
+"""Single-pass expense extraction.
+
+The message is lowercased once and split into tokens by one precompiled scanner
+regex (no nested or lazy quantifiers, so matching is linear in the input). A small
+state machine then walks the tokens sentence by sentence and turns every amount
+into an expense, using the words around it to pick a description.
+"""
+import re
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from backend.config import EXPENSE_MAX_CHARS, EXPENSE_MAX_ITEMS, EXPENSE_TIME_BUDGET_MS
+from backend.expenses.categories import categorize_expense
+from backend.expenses.models import ExpenseItem
+
+NUM, CUR, WORD, STOP = "num", "cur", "word", "stop"
+
+_TOKEN_RE = re.compile(
+    r"(?P<num>\d+(?:,\d{3})*(?:\.\d{1,2})?)"
+    r"|(?P<cur>₹|\$|rs\.(?=\s*\d)|rs\b|rupees?\b|inr\b|dollars?\b)"
+    r"|(?P<word>[a-z]+)"
+    r"|(?P<stop>[.!?;\n]+)"
+)
+
+# Words that, directly before a number, mark it as a money amount
+AMOUNT_LEADS = frozenset(['for', 'of', 'cost', 'costs', 'price', 'paid', 'spent', 'me', 'was', 'worth'])
+# "bought X for N" / "movie ticket for N": the word joining an item to its price
+PRICE_LINKS = frozenset(['for', 'of', 'cost', 'costs', 'price', 'worth'])
+# "spent N on X" / "paid N for X": the word joining a price to its item
+ITEM_LINKS = frozenset(['on', 'for'])
+PURCHASE_VERBS = frozenset(['bought', 'purchased', 'got'])
+ACTION_VERBS = frozenset(['bought', 'purchased', 'got', 'spent', 'paid', 'took', 'ate'])
+DATE_WORDS = frozenset(['yesterday', 'today', 'last'])
+DINING_PLACES = frozenset(['airport', 'restaurant', 'hotel', 'cafe', 'canteen'])
+FILLER_WORDS = frozenset([
+    'i', 'we', 'me', 'my', 'it', 'a', 'an', 'the', 'and', 'then', 'also', 'which', 'that',
+    'was', 'is', 'paid', 'spent', 'cost', 'amount', 'some', 'to', 'at', 'in', 'with',
+])
+
+_BUDGET_CHECK_EVERY = 256
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    return [(m.lastgroup, m.group()) for m in _TOKEN_RE.finditer(text)]
+
+
+def _words(tokens) -> List[str]:
+    return [value for kind, value in tokens if kind == WORD]
+
+
+def _trim(words: List[str]) -> List[str]:
+    start, end = 0, len(words)
+    while start < end and words[start] in FILLER_WORDS:
+        start += 1
+    while end > start and words[end - 1] in FILLER_WORDS:
+        end -= 1
+    return words[start:end]
+
+
+def _is_amount(sentence, i: int, implicit: bool = False) -> bool:
+    """A number counts as money when a currency marker or an amount lead word touches it
+    (or, with ``implicit``, when an item link follows it: "and 200 for the cab")."""
+    if i + 1 < len(sentence) and sentence[i + 1][0] == CUR:
+        return True
+    j = i - 1
+    if j >= 0 and sentence[j][0] == CUR:
+        return True
+    if j >= 0 and sentence[j][0] == WORD and sentence[j][1] in AMOUNT_LEADS:
+        return True
+    return implicit and i + 1 < len(sentence) and sentence[i + 1][0] == WORD and sentence[i + 1][1] in ITEM_LINKS
+
+
+def _item_after(sentence, i: int) -> Tuple[List[str], int]:
+    """Words of "on X" / "for X" following an amount, and the index where they end."""
+    j = i + 1
+    if j < len(sentence) and sentence[j][0] == CUR:
+        j += 1
+    if j >= len(sentence) or sentence[j][0] != WORD or sentence[j][1] not in ITEM_LINKS:
+        return [], j
+    j += 1
+    words = []
+    while j < len(sentence) and sentence[j][0] == WORD and \
+            sentence[j][1] not in ACTION_VERBS and sentence[j][1] not in DATE_WORDS:
+        words.append(sentence[j][1])
+        j += 1
+    return _trim(words), j
+
+
+def _describe(before: List[str], after: List[str], index: int) -> Tuple[str, Optional[str]]:
+    """Pick a description (and a fixed category, if any) for one amount."""
+    if 'flight' in before:
+        return 'Flight Ticket', 'Transportation'
+
+    if 'ate' in before or 'food' in before:
+        for word in before:
+            if word in DINING_PLACES:
+                return f"{word.title()} Food", 'Food & Dining'
+
+    # "bought a shirt for 800"
+    if before and before[-1] in PRICE_LINKS:
+        for k in range(len(before) - 1, -1, -1):
+            if before[k] in PURCHASE_VERBS:
+                item = _trim(before[k + 1:-1])
+                if item:
+                    return ' '.join(item).title(), None
+                break
+
+    # "spent 150 on books", "paid 300 for uber"
+    if after:
+        return ' '.join(after).title(), None
+
+    # "movie ticket for 250": up to two words in front of the price link
+    if before and before[-1] in PRICE_LINKS:
+        k = len(before) - 2
+        while k >= 0 and before[k] in FILLER_WORDS:
+            k -= 1
+        item = []
+        while k >= 0 and before[k] not in FILLER_WORDS and len(item) < 2:
+            item.insert(0, before[k])
+            k -= 1
+        if item:
+            return ' '.join(item).title(), None
+
+    # "took a cab ... 120 rs"
+    for k in range(len(before) - 1, -1, -1):
+        if before[k] in ACTION_VERBS or before[k] in PURCHASE_VERBS:
+            item = [w for w in before[k + 1:] if w not in AMOUNT_LEADS]
+            item = _trim(item)
+            if len(' '.join(item)) > 2:
+                return ' '.join(item).title(), None
+            break
+
+    return f"Expense {index}", None
+
+
+def _extract_date(words_seen: set, default: Optional[str] = None) -> str:
+    now = datetime.now()
+    if 'yesterday' in words_seen:
+        return (now - timedelta(days=1)).strftime("%Y-%m-%d")
+    if 'today' in words_seen:
+        return now.strftime("%Y-%m-%d")
+    if 'last week' in words_seen:
+        return (now - timedelta(weeks=1)).strftime("%Y-%m-%d")
+    return default or now.strftime("%Y-%m-%d")
+
+
+def extract_expenses_from_text(text: str, ai_response: str = "", implicit_amounts: bool = False,
+                               default_date: Optional[str] = None) -> List[ExpenseItem]:
+    """Extract expenses from user input in a single linear pass.
+
+    Follow-ups in a conversation that is already about expenses can pass
+    ``implicit_amounts`` (bare "200 for X" counts as money) and ``default_date``
+    (used when the text names no day). Input beyond ``EXPENSE_MAX_CHARS`` is ignored, at most ``EXPENSE_MAX_ITEMS`` expenses are
+    returned and scanning stops once ``EXPENSE_TIME_BUDGET_MS`` has elapsed.
+    """
+    started = time.perf_counter()
+    budget = EXPENSE_TIME_BUDGET_MS / 1000.0
+    tokens = _tokenize(text[:EXPENSE_MAX_CHARS].lower())
+
+    items = []
+    date_words = set()
+    sentence = []
+
+    def flush(sentence):
+        segment_start = 0
+        i = 0
+        while i < len(sentence):
+            kind, value = sentence[i]
+            if kind == WORD:
+                if value in ('yesterday', 'today'):
+                    date_words.add(value)
+                elif value in ('week', 'month') and i > 0 and sentence[i - 1][1] == 'last':
+                    date_words.add('last ' + value)
+            if kind == NUM and _is_amount(sentence, i, implicit_amounts):
+                before = _words(sentence[segment_start:i])
+                after, resume = _item_after(sentence, i)
+                description, category = _describe(before, after, len(items) + 1)
+                items.append((description, float(value.replace(',', '')), category))
+                if len(items) >= EXPENSE_MAX_ITEMS:
+                    return False
+                segment_start = i = resume
+                continue
+            i += 1
+        return True
+
+    for n, token in enumerate(tokens):
+        if n % _BUDGET_CHECK_EVERY == 0 and n and time.perf_counter() - started > budget:
+            break
+        if token[0] == STOP:
+            if not flush(sentence):
+                sentence = []
+                break
+            sentence = []
+        else:
+            sentence.append(token)
+    if sentence:
+        flush(sentence)
+
+    extracted_date = _extract_date(date_words, default_date)
+    return [
+        ExpenseItem(
+            date=extracted_date,
+            description=description,
+            amount=amount,
+            category=category or categorize_expense(description),
+        )
+        for description, amount, category in items
+    ]
@@ -0,0 +1,8 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class ExpenseItem(BaseModel):
+    date: str
+    description: str
+    amount: float
+    category: Optional[str] = "Other"
@@ -0,0 +1,300 @@
+"""Bank SMS parsing with per-bank templates.
+
+Each template is one anchored regex for a known message layout, with named
+groups for the amount, account suffix, merchant and date. Templates are indexed
+by sender code (``VM-HDFCBK`` -> ``HDFCBK``) and by the message's leading word,
+so a message is only tried against the few templates that can match it. Messages
+no template recognises go through a generic, bank-agnostic field scan that
+still requires an account reference, so ordinary chat text is never mistaken
+for a transaction.
+"""
+import re
+from datetime import date as Date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from backend.expenses.categories import categorize_expense
+from backend.expenses.models import ExpenseItem
+
+DEBIT, CREDIT = "debit", "credit"
+
+# Bank messages are short; anything longer is not worth scanning in full
+MAX_SMS_CHARS = 1000
+# Sender codes and candidate lists are memoised up to this many entries each
+MAX_CACHED_KEYS = 10000
+
+AMOUNT = r"(?P<amount>\d[\d,]*(?:\.\d{1,2})?)"
+ACCOUNT = r"[x*]*(?P<account>\d{3,6})"
+DATE = r"(?P<date>\d{4}-\d{2}-\d{2}|\d{1,2}[-/ ]?(?:\d{1,2}|[a-z]{3})[-/ ]?\d{2,4})"
+RS = r"(?:rs\.?|inr|₹)\s?"
+
+MONTHS = {name: i for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+_DATE_PARTS_RE = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})|(\d{1,2})[-/ ]?(\d{1,2}|[a-z]{3,9})[-/ ]?,?\s?(\d{2,4})", re.I)
+# Parsed dates further than this from the received date are taken as misreads
+MAX_DATE_SKEW_DAYS = 366
+
+_SENDER_PREFIX_RE = re.compile(r"^[a-z]{2}-", re.I)
+_LEAD_WORD_RE = re.compile(r"[a-z]+", re.I)
+
+# Generic fallback: each field is found on its own, in one pass apiece
+_GENERIC_AMOUNT_RE = re.compile(RS + AMOUNT, re.I)
+_GENERIC_ACCOUNT_RE = re.compile(r"\b(?:a/c|acct|ac|account|card)\s*(?:no\.?\s*)?(?:ending\s*)?" + ACCOUNT, re.I)
+_GENERIC_DIRECTION_RE = re.compile(
+    r"\b(?P<debit>debited|spent|withdrawn|paid|sent|purchase)\b|\b(?P<credit>credited|received|deposited|refunded)\b",
+    re.I)
+_GENERIC_MERCHANT_RE = re.compile(
+    r"\b(?:at|to|towards|info:?)\s+(?:vpa\s+)?(?P<merchant>[a-z0-9&@_-]+(?:\.[a-z0-9&@_-]+)*(?: [a-z0-9&_-]+(?:\.[a-z0-9&_-]+)*){0,3}?)"
+    r"(?= on\b| ref| avl| upi|[.,;(]|\s*$)", re.I)
+# Only dates introduced by "on"/"date", with separators or a month name, so bare
+# amounts ("Rs 2500") and account numbers are never read as days and years
+_GENERIC_DATE_RE = re.compile(
+    r"\b(?:on|date)[:\s]+(?:date\s+)?(?P<date>\d{4}-\d{2}-\d{2}|\d{1,2}[-/]\d{1,2}[-/]\d{2,4}"
+    r"|\d{1,2}[- ]?[a-z]{3,9}[- ]?,?\s?\d{2,4})\b", re.I)
+_SKIP_RE = re.compile(r"\botp\b|one time password|verification code", re.I)
+
+
+class SmsTransaction(NamedTuple):
+    amount: float
+    direction: str
+    merchant: Optional[str]
+    date: Optional[str]
+    account: Optional[str]
+    bank: Optional[str]
+    template: str
+
+    def to_expense(self, fallback_date: Optional[str] = None) -> ExpenseItem:
+        """``fallback_date`` (e.g. the SMS received date) is used when the message has no usable date."""
+        description = self.merchant.title() if self.merchant else (f"{self.bank} transaction" if self.bank else "Bank transaction")
+        return ExpenseItem(
+            date=_plausible_date(self.date, fallback_date) or fallback_date or Date.today().isoformat(),
+            description=description,
+            amount=self.amount,
+            category=categorize_expense(self.merchant or ""),
+        )
+
+
+class SmsTemplate:
+    """One message layout of one bank; ``pattern`` is matched case-insensitively at the start."""
+
+    def __init__(self, name: str, bank: str, senders: Iterable[str], keywords: Iterable[str],
+                 direction: str, pattern: str):
+        self.name = name
+        self.bank = bank
+        self.senders = tuple(s.upper() for s in senders)
+        self.keywords = tuple(k.lower() for k in keywords)
+        self.direction = direction
+        self.regex = re.compile(pattern, re.I)
+
+    def parse(self, body: str) -> Optional[SmsTransaction]:
+        match = self.regex.match(body)
+        if match is None:
+            return None
+        fields = match.groupdict()
+        return SmsTransaction(
+            amount=_parse_amount(fields["amount"]),
+            direction=self.direction,
+            merchant=_clean_merchant(fields.get("merchant")),
+            date=parse_sms_date(fields.get("date")),
+            account=fields.get("account"),
+            bank=self.bank,
+            template=self.name,
+        )
+
+
+TEMPLATES = [
+    SmsTemplate("hdfc_card_spent", "HDFC Bank", ["HDFCBK"], ["rs"], DEBIT,
+                RS + AMOUNT + r" spent on hdfc bank card " + ACCOUNT + r" at (?P<merchant>.+?) on " + DATE),
+    SmsTemplate("hdfc_upi_sent", "HDFC Bank", ["HDFCBK"], ["sent"], DEBIT,
+                r"sent " + RS + AMOUNT + r"\s+from hdfc bank a/c " + ACCOUNT
+                + r"\s+to (?P<merchant>[^\n]+?)\s+on " + DATE),
+    SmsTemplate("hdfc_deposit", "HDFC Bank", ["HDFCBK"], ["update"], CREDIT,
+                r"update! " + RS + AMOUNT + r" deposited in hdfc bank a/c " + ACCOUNT + r" on " + DATE
+                + r" for (?:[a-z]+ cr-[a-z0-9]+-)?(?P<merchant>[^.]+)"),
+    SmsTemplate("sbi_upi_debit", "SBI", ["SBIINB", "SBIUPI", "SBIPSG", "ATMSBI"], ["dear"], DEBIT,
+                r"dear upi user a/c " + ACCOUNT + r" debited by " + AMOUNT + r" on date " + DATE
+                + r" trf to (?P<merchant>.+?) refno"),
+    SmsTemplate("sbi_credit", "SBI", ["SBIINB", "SBIUPI", "SBIPSG"], ["dear"], CREDIT,
+                r"dear sbi user, your a/c " + ACCOUNT + r"-credited by " + RS + AMOUNT + r" on " + DATE
+                + r" transfer from (?P<merchant>.+?) ref no"),
+    SmsTemplate("icici_upi_debit", "ICICI Bank", ["ICICIB", "ICICIT"], ["icici"], DEBIT,
+                r"icici bank acct " + ACCOUNT + r" debited for " + RS + AMOUNT + r" on " + DATE
+                + r"; (?P<merchant>.+?) credited"),
+    SmsTemplate("icici_card_spent", "ICICI Bank", ["ICICIB", "ICICIT"], ["inr"], DEBIT,
+                RS + AMOUNT + r" spent using icici bank card " + ACCOUNT + r" on " + DATE
+                + r" on (?P<merchant>.+?)\. avl"),
+    SmsTemplate("axis_debit_on_at", "Axis Bank", ["AXISBK"], ["inr"], DEBIT,
+                RS + AMOUNT + r" debited from a/c (?:no\. )?" + ACCOUNT + r" on " + DATE
+                + r" at (?P<merchant>.+?)\. avl"),
+    SmsTemplate("axis_debit_at_on", "Axis Bank", ["AXISBK"], ["inr"], DEBIT,
+                RS + AMOUNT + r" debited from a/c (?:no\. )?" + ACCOUNT + r" at (?P<merchant>.+?) on " + DATE),
+    SmsTemplate("axis_credit", "Axis Bank", ["AXISBK"], ["inr"], CREDIT,
+                RS + AMOUNT + r" credited to a/c (?:no\. )?" + ACCOUNT + r" on " + DATE
+                + r" (?:by|from) (?P<merchant>.+?)\. avl"),
+    SmsTemplate("kotak_upi_sent", "Kotak Bank", ["KOTAKB"], ["sent"], DEBIT,
+                r"sent " + RS + AMOUNT + r" from kotak bank ac " + ACCOUNT + r" to (?P<merchant>\S+) on " + DATE),
+    SmsTemplate("kotak_received", "Kotak Bank", ["KOTAKB"], ["received"], CREDIT,
+                r"received " + RS + AMOUNT + r" in your kotak bank ac " + ACCOUNT + r" from (?P<merchant>\S+) on "
+                + DATE),
+]
+
+
+def _parse_amount(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def _clean_merchant(text: Optional[str]) -> Optional[str]:
+    if not text:
+        return None
+    merchant = " ".join(text.split()).strip(" .,;:-")
+    if "@" in merchant:
+        # UPI handle: "uber@axis" -> "uber"
+        merchant = merchant.split("@", 1)[0]
+    return merchant or None
+
+
+def _plausible_date(parsed: Optional[str], received: Optional[str]) -> Optional[str]:
+    if not parsed or not received:
+        return parsed
+    try:
+        skew = abs((Date.fromisoformat(parsed) - Date.fromisoformat(received[:10])).days)
+    except ValueError:
+        return parsed
+    return parsed if skew <= MAX_DATE_SKEW_DAYS else None
+
+
+def parse_sms_date(text: Optional[str]) -> Optional[str]:
+    """Normalise ``2025-08-21``, ``21-08-25``, ``21/08/2025``, ``21Aug25``, ``21-Aug-25`` or
+    ``5 September 2025`` to ISO."""
+    if not text:
+        return None
+    match = _DATE_PARTS_RE.match(text)
+    if match is None:
+        return None
+    try:
+        if match.group(1):
+            return Date(int(match.group(1)), int(match.group(2)), int(match.group(3))).isoformat()
+        day, month, year = match.group(4), match.group(5), match.group(6)
+        month_number = int(month) if month.isdigit() else MONTHS.get(month[:3].lower())
+        if month_number is None:
+            return None
+        year_number = int(year) + (2000 if len(year) == 2 else 0)
+        return Date(year_number, month_number, int(day)).isoformat()
+    except ValueError:
+        return None
+
+
+def normalize_sender(sender: Optional[str]) -> str:
+    """``VM-HDFCBK`` / ``AD-HDFCBK-S`` -> ``HDFCBK``."""
+    if not sender:
+        return ""
+    code = _SENDER_PREFIX_RE.sub("", sender.strip())
+    return code.split("-", 1)[0].upper()
+
+
+def _lead_word(body: str) -> str:
+    if body.startswith("₹"):
+        return "rs"
+    match = _LEAD_WORD_RE.match(body, 0, 16)
+    return match.group(0).lower() if match else ""
+
+
+def parse_generic(body: str) -> Optional[SmsTransaction]:
+    """Bank-agnostic scan: needs an amount, a debit/credit verb and an account reference."""
+    if _SKIP_RE.search(body):
+        return None
+    direction = _GENERIC_DIRECTION_RE.search(body)
+    if direction is None:
+        return None
+    account = _GENERIC_ACCOUNT_RE.search(body)
+    if account is None:
+        return None
+    amount = _GENERIC_AMOUNT_RE.search(body)
+    if amount is None:
+        return None
+    merchant = _GENERIC_MERCHANT_RE.search(body, direction.start())
+    found_date = None
+    taken = (amount.span("amount"), account.span("account"))
+    for candidate in _GENERIC_DATE_RE.finditer(body):
+        start, end = candidate.span("date")
+        if not any(start < taken_end and taken_start < end for taken_start, taken_end in taken):
+            found_date = parse_sms_date(candidate.group("date"))
+            if found_date:
+                break
+    return SmsTransaction(
+        amount=_parse_amount(amount.group("amount")),
+        direction=DEBIT if direction.group("debit") else CREDIT,
+        merchant=_clean_merchant(merchant.group("merchant")) if merchant else None,
+        date=found_date,
+        account=account.group("account"),
+        bank=None,
+        template="generic",
+    )
+
+
+class SmsParser:
+    """Template registry indexed by sender code and leading word."""
+
+    def __init__(self, templates: Iterable[SmsTemplate] = ()):
+        self.templates: List[SmsTemplate] = []
+        self._by_sender: Dict[str, List[SmsTemplate]] = {}
+        self._by_keyword: Dict[str, List[SmsTemplate]] = {}
+        self._candidates: Dict[Tuple[str, str], Tuple[SmsTemplate, ...]] = {}
+        # Inboxes hold a handful of distinct sender IDs, so normalise each once
+        self._senders: Dict[str, str] = {}
+        for template in templates:
+            self.register(template)
+
+    def register(self, template: SmsTemplate):
+        self.templates.append(template)
+        for sender in template.senders:
+            self._by_sender.setdefault(sender, []).append(template)
+        for keyword in template.keywords:
+            self._by_keyword.setdefault(keyword, []).append(template)
+        self._candidates.clear()
+
+    def candidates(self, sender: str, lead_word: str) -> Tuple[SmsTemplate, ...]:
+        """Templates worth trying: the sender's that start with ``lead_word`` (or all of the
+        sender's), else every template starting with ``lead_word``."""
+        key = (sender, lead_word)
+        found = self._candidates.get(key)
+        if found is None:
+            by_sender = self._by_sender.get(sender)
+            if by_sender:
+                found = tuple(t for t in by_sender if lead_word in t.keywords) or tuple(by_sender)
+            else:
+                found = tuple(self._by_keyword.get(lead_word, ()))
+            # Keys come from message text, so stop memoising rather than grow without bound
+            if len(self._candidates) < MAX_CACHED_KEYS:
+                self._candidates[key] = found
+        return found
+
+    def parse(self, body: str, sender: Optional[str] = None) -> Optional[SmsTransaction]:
+        """The transaction described by a bank SMS, or None for OTPs, promotions and other text."""
+        body = body[:MAX_SMS_CHARS].strip()
+        if not body:
+            return None
+        code = ""
+        if sender:
+            code = self._senders.get(sender)
+            if code is None:
+                code = normalize_sender(sender)
+                if len(self._senders) < MAX_CACHED_KEYS:
+                    self._senders[sender] = code
+        # A template only matches its own transaction layout, so OTPs and promotions
+        # can only reach the generic scan, which screens them out
+        for template in self.candidates(code, _lead_word(body)):
+            transaction = template.parse(body)
+            if transaction is not None:
+                # Only the sender ID says which bank sent it; a matching layout alone does not
+                if code not in template.senders:
+                    transaction = transaction._replace(bank=None)
+                return transaction
+        return parse_generic(body)
+
+
+sms_parser = SmsParser(TEMPLATES)
+
+
+def parse_sms(body: str, sender: Optional[str] = None) -> Optional[SmsTransaction]:
+    return sms_parser.parse(body, sender)
@@ -0,0 +1,185 @@
+"""Local SQLite ledger of extracted expenses.
+
+Rows are indexed by (user, date) and (user, category, date) and read with keyset
+pagination on ``(date, id)``, so paging deep into a long history costs the same
+as reading the first page.
+"""
+import base64
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from backend.config import LEDGER_DB_PATH
+
+DEFAULT_USER_ID = "default"
+MAX_PAGE_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    description TEXT NOT NULL,
+    amount REAL NOT NULL,
+    category TEXT NOT NULL,
+    source TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_expenses_user_date ON expenses (user_id, date, id);
+CREATE INDEX IF NOT EXISTS idx_expenses_user_category_date ON expenses (user_id, category, date, id);
+"""
+
+
+class Ledger:
+    def __init__(self, path: str = LEDGER_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are per thread; handlers reach the ledger from the threadpool
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def add_expenses(self, expenses: Iterable, user_id: str = DEFAULT_USER_ID, source: Optional[str] = None) -> int:
+        """Bulk insert ExpenseItem-like objects or dicts in one transaction."""
+        now = datetime.utcnow().isoformat()
+        rows = []
+        for expense in expenses:
+            if isinstance(expense, dict):
+                date, description = expense["date"], expense["description"]
+                amount, category = expense["amount"], expense.get("category") or "Other"
+            else:
+                date, description = expense.date, expense.description
+                amount, category = expense.amount, expense.category or "Other"
+            rows.append((user_id, date, description, float(amount), category, source, now))
+        if not rows:
+            return 0
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO expenses (user_id, date, description, amount, category, source, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def _where(self, user_id: str, start_date: Optional[str], end_date: Optional[str],
+               category: Optional[str]) -> Tuple[str, list]:
+        clauses, params = ["user_id = ?"], [user_id]
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+        if start_date:
+            clauses.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("date <= ?")
+            params.append(end_date)
+        return " AND ".join(clauses), params
+
+    def query_expenses(self, user_id: str = DEFAULT_USER_ID, start_date: Optional[str] = None,
+                       end_date: Optional[str] = None, category: Optional[str] = None,
+                       limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """One page of expenses, newest first, and the cursor for the next page (or None)."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        where, params = self._where(user_id, start_date, end_date, category)
+        if cursor:
+            last_date, last_id = decode_cursor(cursor)
+            # Row-value comparison lets SQLite seek the index; the OR form rescans the prefix
+            where += " AND (date, id) < (?, ?)"
+            params += [last_date, last_id]
+        rows = self._connection().execute(
+            f"SELECT id, date, description, amount, category FROM expenses WHERE {where} "
+            "ORDER BY date DESC, id DESC LIMIT ?",
+            params + [limit + 1],
+        ).fetchall()
+        page = [dict(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(page[-1]["date"], page[-1]["id"]) if len(rows) > limit else None
+        return page, next_cursor
+
+    def iter_expenses(self, user_id: str = DEFAULT_USER_ID, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None, category: Optional[str] = None,
+                      batch_size: int = 500) -> Iterator[dict]:
+        """Every matching expense, oldest first, fetched in keyset batches."""
+        where, params = self._where(user_id, start_date, end_date, category)
+        last = None
+        while True:
+            clause, extra = where, []
+            if last is not None:
+                clause += " AND (date, id) > (?, ?)"
+                extra = [last[0], last[1]]
+            rows = self._connection().execute(
+                f"SELECT id, date, description, amount, category FROM expenses WHERE {clause} "
+                "ORDER BY date, id LIMIT ?",
+                params + extra + [batch_size],
+            ).fetchall()
+            for row in rows:
+                yield dict(row)
+            if len(rows) < batch_size:
+                return
+            last = (rows[-1]["date"], rows[-1]["id"])
+
+    def count(self, user_id: str = DEFAULT_USER_ID, start_date: Optional[str] = None,
+              end_date: Optional[str] = None, category: Optional[str] = None) -> int:
+        where, params = self._where(user_id, start_date, end_date, category)
+        return self._connection().execute(f"SELECT COUNT(*) FROM expenses WHERE {where}", params).fetchone()[0]
+
+    def summarize(self, user_id: str = DEFAULT_USER_ID, start_date: Optional[str] = None,
+                  end_date: Optional[str] = None, category: Optional[str] = None) -> dict:
+        """Totals by category, day and month, aggregated inside SQLite."""
+        where, params = self._where(user_id, start_date, end_date, category)
+        conn = self._connection()
+        total, count = conn.execute(
+            f"SELECT COALESCE(SUM(amount), 0), COUNT(*) FROM expenses WHERE {where}", params
+        ).fetchone()
+        by_category = conn.execute(
+            f"SELECT category, SUM(amount) AS total, COUNT(*) AS count FROM expenses WHERE {where} "
+            "GROUP BY category ORDER BY total DESC",
+            params,
+        ).fetchall()
+        by_day = conn.execute(
+            f"SELECT date, SUM(amount) AS total FROM expenses WHERE {where} GROUP BY date ORDER BY date",
+            params,
+        ).fetchall()
+        by_month = conn.execute(
+            f"SELECT substr(date, 1, 7) AS month, SUM(amount) AS total FROM expenses WHERE {where} "
+            "GROUP BY month ORDER BY month",
+            params,
+        ).fetchall()
+        return {
+            "count": count,
+            "total": round(total, 2),
+            "currency": "INR",
+            "by_category": [
+                {"category": row["category"], "total": round(row["total"], 2), "count": row["count"]}
+                for row in by_category
+            ],
+            "by_day": [{"date": row["date"], "total": round(row["total"], 2)} for row in by_day],
+            "by_month": [{"month": row["month"], "total": round(row["total"], 2)} for row in by_month],
+        }
+
+
+def encode_cursor(date: str, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([date, row_id]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        date, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(date), int(row_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+ledger = Ledger()
@@ -0,0 +1,103 @@
+"""Circuit breaker shared by every call to the model API.
+
+After ``BREAKER_FAILURE_THRESHOLD`` consecutive failures the breaker opens and
+calls are refused immediately (callers serve their fallbacks) for
+``BREAKER_RESET_SECONDS``. It then lets ``BREAKER_HALF_OPEN_MAX_CALLS`` probe
+calls through: a success closes it again, a failure re-opens it.
+"""
+import threading
+import time
+from typing import Optional
+
+from backend.config import BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS, BREAKER_HALF_OPEN_MAX_CALLS
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS, half_open_max_calls: int = BREAKER_HALF_OPEN_MAX_CALLS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self.short_circuited = 0
+        self._probes = 0
+        # Used from the event loop and from threadpool workers (sync tip calls)
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; every allowed call must be followed by ``record()``."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    self.short_circuited += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    self.short_circuited += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def record(self, success: Optional[bool]):
+        """Report an allowed call's outcome; ``None`` means it never reached the model."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+            if success is None:
+                return
+            if success:
+                self.consecutive_failures = 0
+                if self.state != CLOSED:
+                    self.state = CLOSED
+                    self.opened_at = None
+                return
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker will let a probe through (0 when closed)."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def stats(self) -> dict:
+        retry_after = self.retry_after()
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "trips": self.trips,
+                "short_circuited": self.short_circuited,
+                "retry_after_seconds": round(retry_after, 1),
+            }
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Whether a failed call says the model service is unhealthy: timeouts, 5xx, 429 and
+    transport errors. Bad requests (400s) and blocked or empty responses (``.text``
+    raising ValueError) are the caller's problem and must not trip the breaker."""
+    if isinstance(error, (TimeoutError, OSError)):
+        # Includes asyncio.TimeoutError, ConnectionError and requests' transport errors
+        return True
+    # google.api_core errors carry the HTTP status; RetryError means retries ran out
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    return type(error).__name__ == "RetryError"
+
+
+model_breaker = CircuitBreaker()
@@ -0,0 +1,187 @@
+"""Response cache for repeated chat prompts.
+
+Keys are the normalized message plus generation parameters. Entries live in an
+in-memory LRU with a TTL and, when ``CHAT_CACHE_DIR`` is set, in a directory of
+small JSON files that survives restarts. The directory is pruned to the same TTL
+and (roughly) the same item count, and its reads and writes run on the
+threadpool. Callers decide what is cacheable; the chat endpoint never caches
+messages carrying expense data.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from backend.config import (
+    CHAT_CACHE_ENABLED,
+    CHAT_CACHE_MAX_ITEMS,
+    CHAT_CACHE_TTL_SECONDS,
+    CHAT_CACHE_MAX_MESSAGE_CHARS,
+    CHAT_CACHE_DIR,
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# The cache directory is pruned at least this often, and after every quarter of max_items writes
+DISK_PRUNE_INTERVAL_SECONDS = 60
+
+
+def normalize_message(message: str) -> str:
+    """Case- and whitespace-insensitive form of a message, ignoring trailing punctuation."""
+    return _WHITESPACE.sub(" ", message.lower()).strip().rstrip("?!. ")
+
+
+class ResponseCache:
+    def __init__(self, enabled: bool = CHAT_CACHE_ENABLED, max_items: int = CHAT_CACHE_MAX_ITEMS,
+                 ttl_seconds: float = CHAT_CACHE_TTL_SECONDS, max_message_chars: int = CHAT_CACHE_MAX_MESSAGE_CHARS,
+                 directory: Optional[str] = CHAT_CACHE_DIR):
+        self.enabled = enabled
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.max_message_chars = max_message_chars
+        self.directory = directory
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._next_prune = 0.0
+        self._writes_since_prune = 0
+        if enabled and directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, message: str, max_tokens: Optional[int], temperature: Optional[float]) -> Optional[str]:
+        """Cache key for a request, or None when it must bypass the cache."""
+        if not self.enabled or len(message) > self.max_message_chars:
+            self.bypassed += 1
+            return None
+        material = json.dumps([normalize_message(message), max_tokens, temperature])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def bypass(self):
+        """Count a request the caller decided not to cache."""
+        self.bypassed += 1
+
+    async def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                response, created_at = entry
+                if not self._expired(created_at):
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._items[key]
+        if self.directory:
+            response = await run_in_threadpool(self._read_disk, key)
+            if response is not None:
+                self.disk_hits += 1
+                return response
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, response: str):
+        created_at = time.time()
+        with self._lock:
+            self._store_locked(key, response, created_at)
+        if self.directory:
+            await run_in_threadpool(self._write_disk, key, response, created_at)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        with self._lock:
+            items = len(self._items)
+        return {
+            "enabled": self.enabled,
+            "items": items,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _store_locked(self, key: str, response: str, created_at: float):
+        self._items[key] = (response, created_at)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _write_disk(self, key: str, response: str, created_at: float):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"response": response, "created_at": created_at}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Chat cache write error: {e}")
+        with self._lock:
+            self._writes_since_prune += 1
+            now = time.time()
+            due = now >= self._next_prune or self._writes_since_prune >= max(1, self.max_items // 4)
+            if due:
+                self._next_prune = now + DISK_PRUNE_INTERVAL_SECONDS
+                self._writes_since_prune = 0
+        if due:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Delete expired files, then the oldest ones while over ``max_items``."""
+        try:
+            with os.scandir(self.directory) as it:
+                files = [(entry.stat().st_mtime, entry.path) for entry in it
+                         if entry.is_file() and entry.name.endswith((".json", ".tmp"))]
+        except OSError as e:
+            print(f"Chat cache prune error: {e}")
+            return
+        files.sort()
+        # Files are written once, so the mtime is the entry's created_at
+        expired = [path for mtime, path in files if self._expired(mtime)]
+        live = [path for mtime, path in files if not self._expired(mtime)]
+        excess = live[:max(0, len(live) - self.max_items)]
+        for path in expired + excess:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.disk_evictions += 1
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            response, created_at = entry["response"], float(entry["created_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if self._expired(created_at):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        with self._lock:
+            self._store_locked(key, response, created_at)
+        return response
+
+
+chat_cache = ResponseCache()
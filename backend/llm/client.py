@@ -0,0 +1,361 @@
+import asyncio
+import functools
+import json
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from backend.config import (
+    GEMINI_API_KEY,
+    GEMINI_API_ENDPOINT,
+    LLM_BACKEND,
+    LLM_MAX_CONCURRENCY,
+    LLM_TIMEOUT_SECONDS,
+    LLM_MAX_QUEUE,
+    LLM_QUEUE_TIMEOUT_SECONDS,
+    FAKE_LLM_LATENCY_MS,
+    FAKE_LLM_TOKEN_DELAY_MS,
+)
+from backend.llm.breaker import model_breaker, is_upstream_failure
+from backend.llm.registry import get_genai, model_registry
+
+
+class LLMTimeoutError(Exception):
+    """Raised when a model call does not finish within its deadline."""
+
+
+class LLMOverloadedError(Exception):
+    """Raised when a model call cannot get a slot: the wait queue is full or the wait timed out."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMUnavailableError(Exception):
+    """Raised without calling the model while the circuit breaker is open."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+_DONE = object()
+
+
+async def _iterate_in_thread(make_iterator) -> AsyncIterator:
+    """Drive a blocking iterator in a worker thread, handing items to the event loop as they arrive."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def pump():
+        try:
+            for item in make_iterator():
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+    worker = loop.run_in_executor(None, pump)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # An abandoned stream keeps its thread until the upstream response ends
+        if worker.done():
+            await worker
+
+
+def _thread_request_options(timeout: Optional[float]) -> dict:
+    options = {"retry": None}
+    if timeout is not None:
+        options["timeout"] = timeout
+    return options
+
+
+class GeminiBackend:
+    """Calls Gemini through the SDK's native async API, using the registry's shared models.
+
+    With ``GEMINI_API_ENDPOINT`` set the SDK uses its REST transport, whose async
+    client is not implemented, so calls run on worker threads instead. A thread
+    can't be cancelled when the caller's deadline passes, so those calls carry the
+    deadline as the SDK's own request timeout and skip its default retry, which
+    would otherwise keep retrying 503s for up to 10 minutes.
+    """
+
+    name = "gemini"
+
+    def __init__(self, registry=model_registry):
+        self.registry = registry
+
+    @property
+    def configured(self) -> bool:
+        return bool(GEMINI_API_KEY)
+
+    async def generate(self, prompt: str, max_tokens: Optional[int], temperature: Optional[float],
+                       json_mode: bool = False, use_case: str = "chat", timeout: Optional[float] = None) -> str:
+        genai = get_genai()
+        model = self.registry.model(use_case)
+        generation_config = genai.types.GenerationConfig(
+            max_output_tokens=max_tokens,
+            temperature=temperature,
+            response_mime_type="application/json" if json_mode else None,
+        )
+        if GEMINI_API_ENDPOINT:
+            response = await asyncio.to_thread(
+                model.generate_content, prompt, generation_config=generation_config,
+                request_options=_thread_request_options(timeout),
+            )
+        else:
+            response = await model.generate_content_async(prompt, generation_config=generation_config)
+        return response.text
+
+    async def stream(self, prompt: str, max_tokens: Optional[int], temperature: Optional[float],
+                     use_case: str = "chat", timeout: Optional[float] = None) -> AsyncIterator[str]:
+        genai = get_genai()
+        model = self.registry.model(use_case)
+        generation_config = genai.types.GenerationConfig(
+            max_output_tokens=max_tokens,
+            temperature=temperature,
+        )
+        if GEMINI_API_ENDPOINT:
+            chunks = _iterate_in_thread(
+                lambda: model.generate_content(prompt, generation_config=generation_config, stream=True,
+                                               request_options=_thread_request_options(timeout))
+            )
+        else:
+            chunks = await model.generate_content_async(prompt, generation_config=generation_config, stream=True)
+        async for chunk in chunks:
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeBackend:
+    """Local stand-in model used to measure throughput without the network.
+
+    In JSON mode, a prompt whose last line is a ``{"key": n}`` object is answered
+    with ``n`` simulated strings per key; anything else gets ``{}``.
+    """
+
+    name = "fake"
+    configured = True
+
+    def __init__(self, latency_ms: float = FAKE_LLM_LATENCY_MS, token_delay_ms: float = FAKE_LLM_TOKEN_DELAY_MS):
+        self.latency_ms = latency_ms
+        self.token_delay_ms = token_delay_ms
+
+    def _reply(self, prompt: str) -> str:
+        return f"(simulated) Here is some advice about: {prompt[:200]}"
+
+    def _json_reply(self, prompt: str) -> str:
+        try:
+            spec = json.loads(prompt.strip().splitlines()[-1])
+            return json.dumps({
+                key: [f"(simulated) {key} tip {i + 1}" for i in range(int(count))]
+                for key, count in spec.items()
+            })
+        except (ValueError, TypeError, AttributeError, IndexError):
+            return "{}"
+
+    async def generate(self, prompt: str, max_tokens: Optional[int], temperature: Optional[float],
+                       json_mode: bool = False, use_case: str = "chat", timeout: Optional[float] = None) -> str:
+        await asyncio.sleep(self.latency_ms / 1000.0)
+        return self._json_reply(prompt) if json_mode else self._reply(prompt)
+
+    async def stream(self, prompt: str, max_tokens: Optional[int], temperature: Optional[float],
+                     use_case: str = "chat", timeout: Optional[float] = None) -> AsyncIterator[str]:
+        # Time to first token, then one word per tick
+        await asyncio.sleep(self.latency_ms / 1000.0)
+        for word in self._reply(prompt).split(" "):
+            yield word + " "
+            await asyncio.sleep(self.token_delay_ms / 1000.0)
+
+
+class LLMClient:
+    """Runs model calls on the event loop with a cap on in-flight calls and a per-call timeout.
+
+    Calls beyond ``max_concurrency`` wait in a queue of at most ``max_queue`` for up to
+    ``queue_timeout`` seconds; past that they fail fast with LLMOverloadedError, whose
+    ``retry_after`` estimates when a slot should free up.
+    """
+
+    def __init__(self, backend, max_concurrency: int = LLM_MAX_CONCURRENCY, timeout: float = LLM_TIMEOUT_SECONDS,
+                 max_queue: int = LLM_MAX_QUEUE, queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS,
+                 breaker=model_breaker):
+        self.backend = backend
+        self.breaker = breaker
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        # Moving average of call duration, used for Retry-After estimates
+        self.avg_call_seconds = 1.0
+        self._semaphore = None
+        self._loop = None
+
+    @property
+    def configured(self) -> bool:
+        return self.backend.configured
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives belong to one loop; rebuild if the app is served from a new one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    def retry_after(self) -> float:
+        """Rough seconds until a queued call would get a slot."""
+        backlog = (self.waiting + self.in_flight) / self.max_concurrency
+        return max(1.0, math.ceil(self.avg_call_seconds * backlog))
+
+    def overloaded(self) -> bool:
+        """True when a new call would be rejected right away."""
+        semaphore = self._semaphore
+        return (semaphore is not None and semaphore.locked()
+                and self.waiting >= self.max_queue)
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            raise LLMUnavailableError(
+                "Model temporarily unavailable (circuit open)", max(1.0, self.breaker.retry_after())
+            )
+
+    @asynccontextmanager
+    async def _slot(self):
+        semaphore = self._get_semaphore()
+        if semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise LLMOverloadedError("Model call queue is full", self.retry_after())
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise LLMOverloadedError(
+                    f"No model call slot within {self.queue_timeout:.1f}s", self.retry_after()
+                )
+            finally:
+                self.waiting -= 1
+        else:
+            await semaphore.acquire()
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.avg_call_seconds = 0.8 * self.avg_call_seconds + 0.2 * (time.monotonic() - started)
+            semaphore.release()
+
+    async def generate(self, prompt: str, max_tokens: Optional[int] = None,
+                       temperature: Optional[float] = None, timeout: Optional[float] = None,
+                       json_mode: bool = False, use_case: str = "chat") -> str:
+        """Generate a full reply with the ``use_case`` model; ``json_mode`` asks for a JSON document."""
+        deadline = self.timeout if timeout is None else timeout
+        self._check_breaker()
+        success = None
+        try:
+            async with self._slot():
+                try:
+                    result = await asyncio.wait_for(
+                        self.backend.generate(prompt, max_tokens, temperature, json_mode=json_mode, use_case=use_case,
+                                              timeout=deadline),
+                        timeout=deadline,
+                    )
+                except asyncio.TimeoutError:
+                    success = False
+                    raise LLMTimeoutError(f"Model call exceeded {deadline:.1f}s")
+                except Exception as e:
+                    # Bad requests and blocked responses leave the breaker alone
+                    success = False if is_upstream_failure(e) else None
+                    raise
+                success = True
+                return result
+        finally:
+            self.breaker.record(success)
+
+    def generate_blocking(self, prompt: str, **kwargs) -> str:
+        """``generate`` for synchronous code on threadpool workers (``run_in_threadpool``).
+
+        The call is handed back to the serving event loop, so it shares the backend,
+        concurrency cap, queue and breaker with every other model call. Outside a
+        worker thread (scripts) it runs on a private loop.
+        """
+        from anyio import from_thread
+        try:
+            from anyio import NoEventLoopError
+        except ImportError:  # anyio < 4.11
+            NoEventLoopError = RuntimeError
+        call = functools.partial(self.generate, prompt, **kwargs)
+        try:
+            return from_thread.run(call)
+        except NoEventLoopError:
+            return asyncio.run(call())
+
+    async def stream(self, prompt: str, max_tokens: Optional[int] = None,
+                     temperature: Optional[float] = None, timeout: Optional[float] = None,
+                     use_case: str = "chat") -> AsyncIterator[str]:
+        """Yield text chunks as the model produces them; the deadline covers the whole stream."""
+        deadline = self.timeout if timeout is None else timeout
+        self._check_breaker()
+        success = None
+        try:
+            async with self._slot():
+                chunks = self.backend.stream(prompt, max_tokens, temperature, use_case=use_case,
+                                             timeout=deadline).__aiter__()
+                expires_at = time.monotonic() + deadline
+                try:
+                    while True:
+                        remaining = expires_at - time.monotonic()
+                        if remaining <= 0:
+                            success = False
+                            raise LLMTimeoutError(f"Model stream exceeded {deadline:.1f}s")
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=remaining)
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            success = False
+                            raise LLMTimeoutError(f"Model stream exceeded {deadline:.1f}s")
+                        except Exception as e:
+                            success = False if is_upstream_failure(e) else None
+                            raise
+                        yield chunk
+                    success = True
+                finally:
+                    await chunks.aclose()
+        finally:
+            self.breaker.record(success)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "timeout_seconds": self.timeout,
+            **(model_registry.stats() if self.backend.name == "gemini" else {}),
+        }
+
+
+def _build_backend():
+    if LLM_BACKEND == "fake":
+        return FakeBackend()
+    return GeminiBackend()
+
+
+llm_client = LLMClient(_build_backend())
@@ -0,0 +1,94 @@
+"""Single-flight coalescing of identical in-flight chat requests.
+
+The first request for a key starts the model call as its own task; identical
+requests arriving while it runs (or within ``CHAT_COALESCE_WINDOW_MS`` after it
+finishes) await the same result instead of starting another call. The task is
+shielded, so a caller going away does not cancel the call for the others.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+from backend.config import CHAT_COALESCE_ENABLED, CHAT_COALESCE_WINDOW_MS, CHAT_COALESCE_KEY
+from backend.llm.cache import normalize_message
+
+
+class RequestCoalescer:
+    def __init__(self, enabled: bool = CHAT_COALESCE_ENABLED, window_ms: float = CHAT_COALESCE_WINDOW_MS,
+                 key_mode: str = CHAT_COALESCE_KEY):
+        self.enabled = enabled
+        self.window_seconds = max(0.0, window_ms / 1000.0)
+        # "exact" matches retries byte for byte; "normalized" also folds case and whitespace
+        self.key_mode = key_mode
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._recent: "OrderedDict[str, tuple]" = OrderedDict()
+        self._loop = None
+        self.leaders = 0
+        self.coalesced = 0
+        self.window_hits = 0
+
+    def key(self, message: str, max_tokens: Optional[int], temperature: Optional[float]) -> Optional[str]:
+        if not self.enabled:
+            return None
+        text = normalize_message(message) if self.key_mode == "normalized" else message
+        return hashlib.sha256(json.dumps([text, max_tokens, temperature]).encode("utf-8")).hexdigest()
+
+    def _reset_for_loop(self):
+        # Tasks belong to one loop; start over if the app is served from a new one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._inflight.clear()
+            self._recent.clear()
+            self._loop = loop
+
+    async def run(self, key: Optional[str], call: Callable[[], Awaitable[str]]) -> str:
+        """Return ``await call()``, sharing one call among concurrent requests with the same key."""
+        if key is None:
+            return await call()
+        self._reset_for_loop()
+
+        now = time.monotonic()
+        while self._recent:
+            oldest_key, (expires_at, _) = next(iter(self._recent.items()))
+            if expires_at > now:
+                break
+            del self._recent[oldest_key]
+        recent = self._recent.get(key)
+        if recent is not None:
+            self.window_hits += 1
+            return recent[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda finished: self._finish(key, finished))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        # Retrieve the exception so it is not reported as unhandled when nobody is left waiting
+        if task.exception() is None and self.window_seconds > 0:
+            self._recent[key] = (time.monotonic() + self.window_seconds, task.result())
+            self._recent.move_to_end(key)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "window_hits": self.window_hits,
+        }
+
+
+chat_coalescer = RequestCoalescer()
@@ -0,0 +1,117 @@
+"""Shared, pre-configured Gemini model objects per use case.
+
+``genai`` is configured once and each use case ("chat", "tips") maps to one
+reusable ``GenerativeModel``, so requests no longer construct models (and the
+SDK keeps reusing its underlying client connections). Model names come from
+``CHAT_MODEL_NAME``/``TIP_MODEL_NAME`` and may be overridden by the JSON file
+named in ``MODEL_CONFIG_FILE`` (``{"chat": "...", "tips": "..."}``), which is
+re-read when it changes, so models can be switched without a restart.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from backend.config import (
+    GEMINI_API_KEY,
+    GEMINI_API_ENDPOINT,
+    CHAT_MODEL_NAME,
+    TIP_MODEL_NAME,
+    MODEL_CONFIG_FILE,
+    MODEL_CONFIG_CHECK_SECONDS,
+)
+
+_genai = None
+_genai_lock = threading.Lock()
+
+
+def get_genai():
+    """Import and configure google.generativeai on first use; it dominates the backend's import time."""
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                if GEMINI_API_ENDPOINT:
+                    genai.configure(api_key=GEMINI_API_KEY, transport="rest",
+                                    client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+                elif GEMINI_API_KEY:
+                    genai.configure(api_key=GEMINI_API_KEY)
+                _genai = genai
+    return _genai
+
+
+class ModelRegistry:
+    def __init__(self, defaults: Dict[str, str], config_file: Optional[str] = MODEL_CONFIG_FILE,
+                 check_seconds: float = MODEL_CONFIG_CHECK_SECONDS):
+        self.defaults = dict(defaults)
+        self.config_file = config_file
+        self.check_seconds = check_seconds
+        self._names = dict(defaults)
+        self._models: Dict[str, object] = {}
+        self._config_mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self._maybe_reload(force=True)
+
+    def model_name(self, use_case: str) -> str:
+        self._maybe_reload()
+        return self._names.get(use_case) or self._names["chat"]
+
+    def model(self, use_case: str = "chat"):
+        """The shared GenerativeModel for ``use_case``."""
+        name = self.model_name(use_case)
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = get_genai().GenerativeModel(name)
+                    self._models[name] = model
+        return model
+
+    def reload(self) -> Dict[str, str]:
+        """Re-read the model config file now; returns the active names."""
+        self._maybe_reload(force=True)
+        return self.names()
+
+    def names(self) -> Dict[str, str]:
+        return dict(self._names)
+
+    def _maybe_reload(self, force: bool = False):
+        if not self.config_file:
+            return
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        self._next_check = now + self.check_seconds
+        try:
+            mtime = os.path.getmtime(self.config_file)
+        except OSError:
+            mtime = None
+        if mtime == self._config_mtime and not force:
+            return
+        names = dict(self.defaults)
+        if mtime is not None:
+            try:
+                with open(self.config_file, "r", encoding="utf-8") as f:
+                    overrides = json.load(f)
+                names.update({k: v for k, v in overrides.items() if isinstance(v, str) and v})
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"Error loading model config {self.config_file}, keeping current models: {e}")
+                return
+        with self._lock:
+            self._config_mtime = mtime
+            if names != self._names:
+                self._names = names
+                # Models no longer referenced are dropped; the rest stay warm
+                self._models = {name: model for name, model in self._models.items() if name in names.values()}
+                self.reloads += 1
+
+    def stats(self) -> dict:
+        return {"models": self.names(), "reloads": self.reloads, "config_file": self.config_file}
+
+
+model_registry = ModelRegistry({"chat": CHAT_MODEL_NAME, "tips": TIP_MODEL_NAME})
@@ -1,21 +1,34 @@
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
-import google.generativeai as genai
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import ClientDisconnect
+from pydantic import BaseModel, Field, ValidationError
 import os
 import json
-import re
 from typing import Optional, List, Dict
-from dotenv import load_dotenv
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import io
+import math
+import asyncio
+from contextlib import asynccontextmanager
 
-# Load environment variables
-load_dotenv()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_MODULES:
+        warming = asyncio.to_thread(warm_up, WARMUP_MODULES)
+        if WARMUP_IN_BACKGROUND:
+            app.state.warmup_task = asyncio.create_task(warming)
+        else:
+            await warming
+    tip_pool.start()
+    yield
+    await tip_pool.stop()
+    shutdown_process_pool()
+    report_jobs.shutdown()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -28,332 +41,598 @@ app.add_middleware(
 
 try:
     # Preferred: package import when running as a package (python -m backend.main)
-    from backend.config import GEMINI_API_KEY
-    from backend.tips.service import generate_daily_tip
+    from backend.config import GEMINI_API_KEY, WARMUP_MODULES, WARMUP_IN_BACKGROUND
+    from backend.warmup import warm_up
+    from backend.ratelimit import rate_limiter
+    from backend.shared_cache import shared_cache
+    from backend.metrics import registry as metrics_registry, MetricsMiddleware, time_stage, fallbacks_total, expenses_extracted_total
+    from backend.tips.service import generate_daily_tip, get_cached_tip, tip_pool
+    from backend.llm.client import llm_client, LLMTimeoutError, LLMOverloadedError, LLMUnavailableError
+    from backend.llm.registry import model_registry
+    from backend.llm.cache import chat_cache
+    from backend.llm.coalesce import chat_coalescer
+    from backend.chat.sessions import chat_sessions
+    from backend.expenses.models import ExpenseItem
+    from backend.expenses.extractor import extract_expenses_from_text
+    from backend.expenses.categories import categorize_expense
+    from backend.expenses.batch import read_request_items, stream_extraction, shutdown_process_pool
+    from backend.reports.excel import create_excel_response
+    from backend.reports.csv_export import iter_csv
+    from backend.reports.store import report_store, parse_range
+    from backend.reports.summary import summarize_report
+    from backend.reports.jobs import report_jobs, JobQueueFullError, FORMATS as REPORT_JOB_FORMATS, DONE as JOB_DONE
+    from backend.ledger.store import ledger, DEFAULT_USER_ID
 except Exception:
     # Fallback: adjust sys.path when running main.py directly from the backend/ folder
     import sys, os
     repo_root = os.path.dirname(os.path.dirname(__file__))
     if repo_root not in sys.path:
         sys.path.insert(0, repo_root)
-    from backend.config import GEMINI_API_KEY
-    from backend.tips.service import generate_daily_tip
+    from backend.config import GEMINI_API_KEY, WARMUP_MODULES, WARMUP_IN_BACKGROUND
+    from backend.warmup import warm_up
+    from backend.ratelimit import rate_limiter
+    from backend.shared_cache import shared_cache
+    from backend.metrics import registry as metrics_registry, MetricsMiddleware, time_stage, fallbacks_total, expenses_extracted_total
+    from backend.tips.service import generate_daily_tip, get_cached_tip, tip_pool
+    from backend.llm.client import llm_client, LLMTimeoutError, LLMOverloadedError, LLMUnavailableError
+    from backend.llm.registry import model_registry
+    from backend.llm.cache import chat_cache
+    from backend.llm.coalesce import chat_coalescer
+    from backend.chat.sessions import chat_sessions
+    from backend.expenses.models import ExpenseItem
+    from backend.expenses.extractor import extract_expenses_from_text
+    from backend.expenses.categories import categorize_expense
+    from backend.expenses.batch import read_request_items, stream_extraction, shutdown_process_pool
+    from backend.reports.excel import create_excel_response
+    from backend.reports.csv_export import iter_csv
+    from backend.reports.store import report_store, parse_range
+    from backend.reports.summary import summarize_report
+    from backend.reports.jobs import report_jobs, JobQueueFullError, FORMATS as REPORT_JOB_FORMATS, DONE as JOB_DONE
+    from backend.ledger.store import ledger, DEFAULT_USER_ID
+
+app.add_middleware(MetricsMiddleware)
 
 class ChatRequest(BaseModel):
     message: str
-    max_tokens: Optional[int] = 1000
-    temperature: Optional[float] = 0.7
+    # Out-of-range values would only come back from the model API as 400s
+    max_tokens: Optional[int] = Field(1000, ge=1, le=65536)
+    temperature: Optional[float] = Field(0.7, ge=0.0, le=2.0)
+    # Legacy clients can still ask for the report inline as base64
+    include_excel_data: Optional[bool] = False
+    # Ledger the extracted expenses are recorded under; without one they only go into the report
+    user_id: Optional[str] = None
+    # Set to False to always get a fresh reply when the response cache is enabled
+    use_cache: Optional[bool] = True
 
 class ChatResponse(BaseModel):
     response: str
     status: str
     has_expenses: Optional[bool] = False
+    report_id: Optional[str] = None
+    download_url: Optional[str] = None
+    excel_data: Optional[str] = None
+    cached: Optional[bool] = False
+
+class LedgerInsertRequest(BaseModel):
+    user_id: str = Field(..., min_length=1)
+    expenses: List[ExpenseItem]
+
+class ReportJobRequest(BaseModel):
+    format: Optional[str] = "xlsx"  # xlsx, csv or csv.gz
+    user_id: str = Field(..., min_length=1)
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    category: Optional[str] = None
 
 class DailyTipRequest(BaseModel):
     category: Optional[str] = "general"
     notification_type: Optional[str] = "standard"
     excel_data: Optional[str] = None
 
-class ExpenseItem(BaseModel):
-    date: str
-    description: str
-    amount: float
-    category: Optional[str] = "Other"
+# Reply used while the model is unavailable; expense extraction does not need it
+FALLBACK_CHAT_RESPONSE = "The AI assistant is temporarily unavailable, but your expenses have been recorded."
 
-def extract_expenses_from_text(text: str, ai_response: str) -> List[ExpenseItem]:
-    """Extract expenses from user input and AI response using regex patterns"""
-    expenses = []
-    
-    # Enhanced expense patterns
-    patterns = [
-        # Pattern 1: "cost me X" or "amount was X"
-        r'(?:cost\s+me|amount\s+was|for|paid|spent)\s*(?:rs\.?|₹|dollars?|\$)?\s*(\d+(?:\.\d{2})?)',
-        # Pattern 2: "X rs/rupees/dollars"
-        r'(\d+(?:\.\d{2})?)\s*(?:rs\.?|rupees?|dollars?|₹|\$)',
-        # Pattern 3: Currency symbols first
-        r'(?:₹|\$)\s*(\d+(?:\.\d{2})?)',
-        # Pattern 4: "of X rs" format
-        r'of\s+(\d+(?:\.\d{2})?)\s*(?:rs\.?|rupees?)',
-    ]
-    
-    # Extract text for processing - focus on user input primarily
-    user_text = text.lower()
-    
-    # Find expense items with their amounts
-    expense_items = []
-    
-    # Look for specific items mentioned before amounts
-    item_patterns = [
-        (r'(?:took\s+)?flight(?:\s+(?:which|for))?.*?(\d+)(?:\s*rs)?', 'Flight'),
-        (r'ate\s+at\s+(?:airport|restaurant|hotel).*?(?:for|cost).*?(\d+)(?:\s*rs)?', 'Food & Dining'),
-        (r'flight.*?(?:for|cost).*?(\d+)(?:\s*rs)?', 'Flight'),
-        (r'airport.*?food.*?(\d+)(?:\s*rs)?', 'Food & Dining'),
-        (r'bought\s+([^0-9]+?)(?:\s+(?:of|for|cost))\s+(\d+)(?:\s*rs)?', None),  # Dynamic item name
-        (r'(\w+(?:\s+\w+)?)\s+(?:of|for|cost|price)\s+(\d+)(?:\s*rs)?', None),  # Generic item
-        (r'spent.*?₹?(\d+).*?on\s+([^.\n]+)', None),  # "spent 150 on books"
-    ]
-    
-    # Process specific patterns first
-    for pattern, category in item_patterns:
-        matches = re.finditer(pattern, user_text, re.IGNORECASE)
-        for match in matches:
-            if category:
-                # Fixed category items
-                amount = float(match.group(1))
-                description = category.replace('Food & Dining', 'Airport Food')
-                if category == 'Flight':
-                    description = 'Flight Ticket'
-                expense_items.append({
-                    'description': description,
-                    'amount': amount,
-                    'category': category if category != 'Flight' else 'Transportation'
-                })
-            else:
-                # Dynamic item name - handle different group patterns
-                if len(match.groups()) >= 2:
-                    # Check if this is "spent X on Y" pattern
-                    if 'spent' in pattern:
-                        amount = float(match.group(1))
-                        item_name = match.group(2).strip()
-                    else:
-                        item_name = match.group(1).strip()
-                        amount = float(match.group(2))
-                    
-                    expense_items.append({
-                        'description': item_name.title(),
-                        'amount': amount,
-                        'category': categorize_expense(item_name)
-                    })
-    
-    # Additional manual parsing for your specific format
-    # Handle "flight for X rs and ate at airport for Y rs"
-    flight_match = re.search(r'flight.*?for.*?(\d+).*?rs', user_text, re.IGNORECASE)
-    if flight_match and not any(item['description'] in ['Flight Ticket', 'Flight'] for item in expense_items):
-        amount = float(flight_match.group(1))
-        expense_items.append({
-            'description': 'Flight Ticket',
-            'amount': amount,
-            'category': 'Transportation'
-        })
-    
-    airport_food_match = re.search(r'ate.*?airport.*?for.*?(\d+).*?rs', user_text, re.IGNORECASE)
-    if airport_food_match and not any('Airport' in item['description'] for item in expense_items):
-        amount = float(airport_food_match.group(1))
-        expense_items.append({
-            'description': 'Airport Food',
-            'amount': amount,
-            'category': 'Food & Dining'
-        })
-    
-    # If specific patterns didn't work, fall back to general extraction
-    if not expense_items:
-        # Extract all amounts
-        amounts = []
-        for pattern in patterns:
-            matches = re.finditer(pattern, user_text, re.IGNORECASE)
-            for match in matches:
-                amounts.append(float(match.group(1)))
-        
-        # Extract descriptions
-        descriptions = []
-        desc_patterns = [
-            r'(?:bought|purchased|got|ate\s+at|went\s+to|paid\s+for|took)\s+([^0-9₹$]+?)(?:\s+(?:for|amount\s+was|cost|paid|spent|of))',
-            r'(?:i|we)\s+(?:bought|purchased|got|ate\s+at|went\s+to|paid\s+for|took)\s+([^0-9₹$]+)',
-        ]
-        
-        for pattern in desc_patterns:
-            matches = re.finditer(pattern, user_text, re.IGNORECASE)
-            for match in matches:
-                desc = match.group(1).strip()
-                if len(desc) > 2:
-                    descriptions.append(desc)
-        
-        # Combine amounts and descriptions
-        for i, amount in enumerate(amounts):
-            desc = descriptions[i] if i < len(descriptions) else f"Expense {i+1}"
-            expense_items.append({
-                'description': desc.title(),
-                'amount': amount,
-                'category': categorize_expense(desc)
-            })
-    
-    # Try to extract date information
-    date_patterns = [
-        r'yesterday',
-        r'today',
-        r'last (?:week|month)',
-    ]
-    
-    extracted_date = datetime.now().strftime("%Y-%m-%d")  # Default to today
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, user_text, re.IGNORECASE)
-        if match:
-            if 'yesterday' in match.group().lower():
-                extracted_date = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-            elif 'today' in match.group().lower():
-                extracted_date = datetime.now().strftime("%Y-%m-%d")
-            elif 'last week' in match.group().lower():
-                extracted_date = (datetime.now() - timedelta(weeks=1)).strftime("%Y-%m-%d")
-            break
-    
-    # Create expense objects
-    for item in expense_items:
-        expenses.append(ExpenseItem(
-            date=extracted_date,
-            description=item['description'],
-            amount=item['amount'],
-            category=item['category']
-        ))
-    
-    return expenses
+EXPENSE_KEYWORDS = ['spent', 'bought', 'paid', 'cost', 'amount', 'expense', 'money', 'rupees', '₹', '$']
 
-def categorize_expense(description: str) -> str:
-    """Categorize expense based on description"""
-    description = description.lower()
-    
-    if any(word in description for word in ['food', 'restaurant', 'hotel', 'ate', 'dinner', 'lunch', 'breakfast', 'airport']):
-        return "Food & Dining"
-    elif any(word in description for word in ['transport', 'uber', 'taxi', 'bus', 'train', 'flight', 'plane']):
-        return "Transportation"
-    elif any(word in description for word in ['clothes', 'shirt', 'shoes', 'umbrella', 'personal', 'headset', 'headphone']):
-        return "Personal Items"
-    elif any(word in description for word in ['medicine', 'doctor', 'hospital', 'health']):
-        return "Healthcare"
-    elif any(word in description for word in ['movie', 'entertainment', 'game', 'cinema']):
-        return "Entertainment"
-    elif any(word in description for word in ['grocery', 'shopping', 'market']):
-        return "Shopping"
-    else:
-        return "Other"
-
-def create_excel_response(expenses: List[ExpenseItem]) -> bytes:
-    """Create Excel file from expenses list"""
+def message_has_expenses(message: str) -> bool:
+    """Cheap keyword check deciding whether expense extraction is worth running"""
+    lowered = message.lower()
+    return any(keyword in lowered for keyword in EXPENSE_KEYWORDS)
+
+def build_expense_report(message: str, ai_response: str, user_id: Optional[str] = None) -> Optional[dict]:
+    """Extract expenses, record them in ``user_id``'s ledger and build the Excel report plus chat summary.
+
+    Without a ``user_id`` nothing is written to the ledger: a shared anonymous ledger
+    would let any caller read everyone else's expenses.
+    """
+    with time_stage("extract_expenses"):
+        expenses = extract_expenses_from_text(message, ai_response)
     if not expenses:
         return None
+    expenses_extracted_total.inc(len(expenses), source="chat")
     
-    # Create DataFrame
-    df = pd.DataFrame([{
-        'Date': expense.date,
-        'Description': expense.description,
-        'Amount (₹)': expense.amount,
-        'Category': expense.category
-    } for expense in expenses])
+    if user_id and user_id != DEFAULT_USER_ID:
+        try:
+            with time_stage("ledger_write"):
+                ledger.add_expenses(expenses, user_id, source="chat")
+        except Exception as e:
+            print(f"Ledger write error: {str(e)}")
     
-    # Create Excel file in memory
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Expenses', index=False)
-        
-        # Get the workbook and worksheet
-        workbook = writer.book
-        worksheet = writer.sheets['Expenses']
-        
-        # Format the worksheet
-        from openpyxl.styles import Font, PatternFill, Alignment
-        
-        # Header formatting
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        
-        for cell in worksheet[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal="center")
-        
-        # Auto-adjust column widths
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        # Add total row
-        total_row = len(df) + 2
-        worksheet[f'C{total_row}'] = "Total:"
-        worksheet[f'D{total_row}'] = f"₹{df['Amount (₹)'].sum():.2f}"
-        worksheet[f'C{total_row}'].font = Font(bold=True)
-        worksheet[f'D{total_row}'].font = Font(bold=True)
+    with time_stage("excel_report"):
+        excel_bytes = create_excel_response(expenses)
+    if not excel_bytes:
+        return None
+    
+    stored = report_store.put(excel_bytes)
+    total_amount = sum(exp.amount for exp in expenses)
+    expense_summary = f"\n\n📊 **Expense Summary:**\n"
+    expense_summary += f"• Total Amount: ₹{total_amount:.2f}\n"
+    expense_summary += f"• Number of Items: {len(expenses)}\n"
+    expense_summary += "• Expenses extracted and Excel file generated!\n"
+    expense_summary += "Click the download button below to get your expense report."
     
-    output.seek(0)
-    return output.getvalue()
+    return {
+        "expenses": expenses,
+        "total_amount": total_amount,
+        "report_id": stored.report_id,
+        "download_url": report_download_url(stored.report_id),
+        "excel_bytes": excel_bytes,
+        "summary": expense_summary,
+    }
+
+def report_download_url(report_id: str) -> str:
+    return f"/reports/{report_id}"
+
+def _encode_excel(excel_bytes: bytes) -> str:
+    import base64
+    with time_stage("base64_encode"):
+        return base64.b64encode(excel_bytes).decode('utf-8')
+
+def _resolve_report_bytes(request: dict) -> Optional[bytes]:
+    """Report bytes from a ``report_id`` (preferred) or an inline base64 ``excel_data``"""
+    report_id = request.get('report_id')
+    if report_id:
+        stored = report_store.get(report_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail="Report not found or expired")
+        return stored.data
+    excel_data = request.get('excel_data')
+    if excel_data:
+        import base64
+        return base64.b64decode(excel_data)
+    return None
+
+def _client_id(http_request: Request) -> str:
+    client_id = http_request.headers.get("x-client-id")
+    if client_id:
+        return client_id[:128]
+    return http_request.client.host if http_request.client else "unknown"
+
+def _too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+def _admit(http_request: Request):
+    """Per-client rate limit"""
+    retry_after = rate_limiter.check(_client_id(http_request))
+    if retry_after is not None:
+        raise _too_many_requests("Rate limit exceeded", retry_after)
+
+def _reject_if_overloaded():
+    """Fast 429 if the model call queue is already full; only for requests certain to call the model"""
+    if llm_client.overloaded():
+        llm_client.rejected += 1
+        raise _too_many_requests("Server is busy, please retry", llm_client.retry_after())
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 @app.get("/")
 async def root():
     return {"message": "FastAPI backend with Gemini API is running!"}
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_with_gemini(request: ChatRequest):
+async def chat_with_gemini(request: ChatRequest, http_request: Request):
     try:
-        if not GEMINI_API_KEY:
+        if not llm_client.configured:
             raise HTTPException(status_code=500, detail="Gemini API key not configured")
+        _admit(http_request)
         
-        # Initialize the model
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        
-        # Generate response
-        response = model.generate_content(
-            request.message,
-            generation_config=genai.types.GenerationConfig(
-                max_output_tokens=request.max_tokens,
-                temperature=request.temperature,
-            )
-        )
+        # Check if the message contains expense information
+        has_expenses = message_has_expenses(request.message)
         
-        ai_response = response.text
+        # Expense messages are personal and feed the ledger, so they are never cached
+        cache_key = None
+        if has_expenses or not request.use_cache:
+            chat_cache.bypass()
+        else:
+            cache_key = chat_cache.key(request.message, request.max_tokens, request.temperature)
+        ai_response = await chat_cache.get(cache_key) if cache_key else None
+        cached = ai_response is not None
+        degraded = False
         
-        # Check if the message contains expense information
-        expense_keywords = ['spent', 'bought', 'paid', 'cost', 'amount', 'expense', 'money', 'rupees', '₹', '$']
-        has_expenses = any(keyword in request.message.lower() for keyword in expense_keywords)
+        if not cached:
+            # Generate response without blocking the event loop; identical requests
+            # already in flight (client retries) share one model call. Only the leader
+            # takes a model slot, and a full queue rejects it there (LLMOverloadedError)
+            try:
+                with time_stage("model_call"):
+                    ai_response = await chat_coalescer.run(
+                        chat_coalescer.key(request.message, request.max_tokens, request.temperature),
+                        lambda: llm_client.generate(
+                            request.message,
+                            max_tokens=request.max_tokens,
+                            temperature=request.temperature,
+                        ),
+                    )
+            except LLMTimeoutError as e:
+                raise HTTPException(status_code=504, detail=str(e))
+            except LLMOverloadedError as e:
+                raise _too_many_requests(str(e), e.retry_after)
+            except LLMUnavailableError as e:
+                # Circuit open: answer immediately, still handling any expenses locally
+                if not has_expenses:
+                    raise HTTPException(status_code=503, detail=str(e),
+                                        headers={"Retry-After": str(math.ceil(e.retry_after))})
+                ai_response = FALLBACK_CHAT_RESPONSE
+                degraded = True
+                fallbacks_total.inc(kind="chat")
+            if cache_key and not degraded:
+                await chat_cache.put(cache_key, ai_response)
         
-        excel_data = None
+        report = None
         if has_expenses:
             # Extract expenses from the user message and AI response
-            expenses = extract_expenses_from_text(request.message, ai_response)
-            
-            if expenses:
-                # Create Excel file
-                excel_bytes = create_excel_response(expenses)
-                if excel_bytes:
-                    import base64
-                    excel_data = base64.b64encode(excel_bytes).decode('utf-8')
-                    
-                    # Enhance AI response with expense summary
-                    total_amount = sum(exp.amount for exp in expenses)
-                    expense_summary = f"\n\n📊 **Expense Summary:**\n"
-                    expense_summary += f"• Total Amount: ₹{total_amount:.2f}\n"
-                    expense_summary += f"• Number of Items: {len(expenses)}\n"
-                    expense_summary += "• Expenses extracted and Excel file generated!\n"
-                    expense_summary += "Click the download button below to get your expense report."
-                    
-                    ai_response += expense_summary
+            report = await run_in_threadpool(build_expense_report, request.message, ai_response, request.user_id)
+            if report:
+                # Enhance AI response with expense summary
+                ai_response += report["summary"]
         
         return ChatResponse(
             response=ai_response,
-            status="success",
-            has_expenses=has_expenses and excel_data is not None,
-            excel_data=excel_data
+            status="degraded" if degraded else "success",
+            has_expenses=has_expenses and report is not None,
+            report_id=report["report_id"] if report else None,
+            download_url=report["download_url"] if report else None,
+            excel_data=_encode_excel(report["excel_bytes"]) if report and request.include_excel_data else None,
+            cached=cached,
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """Stream model tokens as Server-Sent Events, then the expense summary and report.
+
+    Events: ``token`` ({"text"}) per chunk, ``expenses`` ({"summary", "count", "total_amount",
+    "expenses"}) and ``report`` ({"excel_data"}) when expenses were found, ``error`` ({"detail"})
+    on failure and a final ``done`` ({"has_expenses"}).
+    """
+    if not llm_client.configured:
+        raise HTTPException(status_code=500, detail="Gemini API key not configured")
+    _admit(http_request)
+    _reject_if_overloaded()
+    
+    async def event_stream():
+        parts = []
+        try:
+            async for chunk in llm_client.stream(
+                request.message,
+                max_tokens=request.max_tokens,
+                temperature=request.temperature,
+            ):
+                parts.append(chunk)
+                yield _sse_event("token", {"text": chunk})
+        except LLMUnavailableError as e:
+            # Circuit open: report it, but still extract any expenses below
+            yield _sse_event("error", {"detail": str(e), "retry_after": math.ceil(e.retry_after)})
+            parts = [FALLBACK_CHAT_RESPONSE]
+            fallbacks_total.inc(kind="chat")
+        except (LLMTimeoutError, LLMOverloadedError) as e:
+            yield _sse_event("error", {"detail": str(e)})
+            yield _sse_event("done", {"has_expenses": False})
+            return
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"Error generating response: {str(e)}"})
+            yield _sse_event("done", {"has_expenses": False})
+            return
+        
+        report = None
+        if message_has_expenses(request.message):
+            try:
+                # Extraction and the workbook build are CPU-bound; keep them off the event loop
+                report = await run_in_threadpool(
+                    build_expense_report, request.message, "".join(parts), request.user_id
+                )
+            except Exception as e:
+                print(f"Streaming expense report error: {str(e)}")
+        
+        if report:
+            yield _sse_event("expenses", {
+                "summary": report["summary"],
+                "count": len(report["expenses"]),
+                "total_amount": report["total_amount"],
+                "expenses": jsonable_encoder(report["expenses"]),
+            })
+            payload = {"report_id": report["report_id"], "download_url": report["download_url"]}
+            if request.include_excel_data:
+                payload["excel_data"] = _encode_excel(report["excel_bytes"])
+            yield _sse_event("report", payload)
+        yield _sse_event("done", {"has_expenses": report is not None})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def record_session_expenses(session, message: str, ai_response: str) -> List[ExpenseItem]:
+    """Extract a turn's expenses, record them in the user's ledger (anonymous sessions have none)
+    and merge them into the session's report"""
+    with time_stage("extract_expenses"):
+        # Once the conversation is about expenses, "and 200 for the cab back" is one too
+        expenses = extract_expenses_from_text(
+            message, ai_response, implicit_amounts=bool(session.expenses), default_date=session.last_expense_date
+        )
+    if not expenses:
+        return []
+    expenses_extracted_total.inc(len(expenses), source="chat")
+    if session.user_id != DEFAULT_USER_ID:
+        try:
+            with time_stage("ledger_write"):
+                ledger.add_expenses(expenses, session.user_id, source="chat")
+        except Exception as e:
+            print(f"Ledger write error: {str(e)}")
+    session.add_expenses(expenses)
+    return expenses
+
+def build_session_report(session) -> Optional[str]:
+    """Report ID for the session's expenses; the workbook is only rebuilt after they changed"""
+    if session.report_id is None and session.expenses:
+        with time_stage("excel_report"):
+            excel_bytes = create_excel_response(session.expenses)
+        if excel_bytes:
+            session.report_id = report_store.put(excel_bytes).report_id
+            chat_sessions.save(session)
+    return session.report_id
+
+def _ws_client_id(websocket: WebSocket) -> str:
+    client_id = websocket.headers.get("x-client-id")
+    if client_id:
+        return client_id[:128]
+    return websocket.client.host if websocket.client else "unknown"
+
+async def _fail_turn(websocket: WebSocket, frame: dict):
+    """End a turn with an ``error`` frame followed by the ``done`` every turn ends with"""
+    await websocket.send_json({"type": "error", **frame})
+    await websocket.send_json({"type": "done", "has_expenses": False})
+
+async def _session_turn(websocket: WebSocket, session, payload: dict, client_id: str):
+    message = payload.get("message")
+    if not isinstance(message, str) or not message.strip():
+        await _fail_turn(websocket, {"detail": "message is required"})
+        return
+    try:
+        # Same validation as the body of POST /chat
+        request = ChatRequest(**{key: payload[key] for key in ("message", "max_tokens", "temperature") if key in payload})
+    except ValidationError as e:
+        await _fail_turn(websocket, {"detail": jsonable_encoder(e.errors(include_url=False))})
+        return
+    detail, retry_after = "Rate limit exceeded", rate_limiter.check(client_id)
+    if retry_after is None and llm_client.overloaded():
+        llm_client.rejected += 1
+        detail, retry_after = "Server is busy, please retry", llm_client.retry_after()
+    if retry_after is not None:
+        await _fail_turn(websocket, {"detail": detail, "retry_after": max(1, math.ceil(retry_after))})
+        return
+
+    parts = []
+    degraded = False
+    try:
+        with time_stage("model_call"):
+            async for chunk in llm_client.stream(
+                session.prompt(message),
+                max_tokens=request.max_tokens,
+                temperature=request.temperature,
+            ):
+                parts.append(chunk)
+                await websocket.send_json({"type": "token", "text": chunk})
+    except LLMUnavailableError as e:
+        # Circuit open: report it, but still merge any expenses below
+        await websocket.send_json({"type": "error", "detail": str(e), "retry_after": math.ceil(e.retry_after)})
+        parts = [FALLBACK_CHAT_RESPONSE]
+        degraded = True
+        fallbacks_total.inc(kind="chat")
+    except (LLMTimeoutError, LLMOverloadedError) as e:
+        await _fail_turn(websocket, {"detail": str(e)})
+        return
+    except WebSocketDisconnect:
+        raise
+    except Exception as e:
+        await _fail_turn(websocket, {"detail": f"Error generating response: {str(e)}"})
+        return
+
+    reply = "".join(parts)
+    expenses = []
+    if message_has_expenses(message) or (session.expenses and any(ch.isdigit() for ch in message)):
+        try:
+            expenses = await run_in_threadpool(record_session_expenses, session, message, reply)
+        except Exception as e:
+            print(f"Session expense error: {str(e)}")
+    if not degraded:
+        session.add_turn(message, reply)
+    chat_sessions.touch(session)
+    await run_in_threadpool(chat_sessions.save, session)
+
+    if expenses:
+        summary = session.summary()
+        await websocket.send_json({
+            "type": "expenses",
+            "new": jsonable_encoder(expenses),
+            "count": summary["count"],
+            "total_amount": summary["total_amount"],
+            "by_category": summary["by_category"],
+            "summary": f"📊 Added {len(expenses)} item(s); running total ₹{session.total_amount:.2f} "
+                       f"across {summary['count']} item(s).",
+        })
+    await websocket.send_json({"type": "done", "has_expenses": bool(expenses)})
+
+@app.websocket("/chat/ws")
+async def chat_websocket(websocket: WebSocket, session_id: Optional[str] = None, user_id: str = DEFAULT_USER_ID):
+    """Chat over one WebSocket, with history and a running expense report kept per session.
+
+    Pass ``session_id`` (from the first ``session`` frame) to resume after a reconnect.
+    Client frames are JSON: ``{"message", "max_tokens"?, "temperature"?}`` (or plain
+    text) for a turn, ``{"type": "report", "include_excel_data"?}`` for the running
+    report and ``{"type": "reset"}`` to start over. Server frames: ``session`` (the
+    session summary) on connect and after a reset, then per turn ``token`` ({"text"})
+    chunks, ``expenses`` ({"new", "count", "total_amount", "by_category", "summary"})
+    when the turn added expenses, ``error`` ({"detail", "retry_after"?}) and a final
+    ``done`` ({"has_expenses"}), which every turn ends with, rejected ones included;
+    ``report`` answers a report request.
+    """
+    if not llm_client.configured:
+        await websocket.close(code=1011, reason="Gemini API key not configured")
+        return
+    await websocket.accept()
+    session = await run_in_threadpool(chat_sessions.open, session_id, user_id or DEFAULT_USER_ID)
+    client_id = _ws_client_id(websocket)
+    try:
+        await websocket.send_json({"type": "session", **session.summary()})
+        while True:
+            text = await websocket.receive_text()
+            try:
+                payload = json.loads(text)
+            except ValueError:
+                payload = {"message": text}
+            if not isinstance(payload, dict):
+                payload = {"message": text}
+            kind = payload.get("type", "message")
+            async with session.lock:
+                if kind == "report":
+                    report_id = await run_in_threadpool(build_session_report, session)
+                    if report_id is None:
+                        await websocket.send_json({"type": "error", "detail": "No expenses in this session yet"})
+                        continue
+                    frame = {"type": "report", "report_id": report_id, "download_url": report_download_url(report_id),
+                             "count": len(session.expenses), "total_amount": round(session.total_amount, 2)}
+                    if payload.get("include_excel_data"):
+                        stored = report_store.get(report_id)
+                        if stored is not None:
+                            frame["excel_data"] = _encode_excel(stored.data)
+                    await websocket.send_json(frame)
+                elif kind == "reset":
+                    session.reset()
+                    await run_in_threadpool(chat_sessions.save, session)
+                    await websocket.send_json({"type": "session", **session.summary()})
+                elif kind == "message":
+                    await _session_turn(websocket, session, payload, client_id)
+                else:
+                    await websocket.send_json({"type": "error", "detail": f"unknown frame type: {kind}"})
+    except WebSocketDisconnect:
+        pass
+
+def _job_view(job: dict) -> dict:
+    view = {key: value for key, value in job.items() if key != "params"}
+    view["status_url"] = f"/reports/jobs/{job['id']}"
+    if job["status"] == JOB_DONE:
+        view["download_url"] = f"/reports/jobs/{job['id']}/download"
+    return view
+
+@app.post("/reports/jobs", status_code=202)
+async def submit_report_job(request: ReportJobRequest):
+    """Queue a ledger export (Excel or CSV) built in the background; poll ``status_url`` for progress"""
+    params = {
+        "user_id": request.user_id,
+        "start_date": request.start_date,
+        "end_date": request.end_date,
+        "category": request.category,
+    }
+    try:
+        job = await run_in_threadpool(report_jobs.submit, params, request.format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFullError as e:
+        raise _too_many_requests(str(e), e.retry_after)
+    return _job_view(job)
+
+@app.get("/reports/jobs/{job_id}")
+async def get_report_job(job_id: str):
+    """Status and progress of a report job"""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return _job_view(job)
+
+@app.delete("/reports/jobs/{job_id}")
+async def cancel_report_job(job_id: str):
+    """Cancel a queued or running report job"""
+    job = report_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return _job_view(job)
+
+@app.get("/reports/jobs/{job_id}/download")
+async def download_report_job(job_id: str):
+    """Download a finished report job's file"""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    if job["status"] != JOB_DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    stored = report_store.get(job["report_id"])
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Report expired")
+    media_type, filename = REPORT_JOB_FORMATS[job["format"]]
+    return Response(
+        content=stored.data,
+        media_type=media_type,
+        headers={"ETag": stored.etag, "Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+@app.api_route("/reports/{report_id}", methods=["GET", "HEAD"])
+async def get_report(report_id: str, request: Request):
+    """Download a stored report by ID, with ETag revalidation and single byte-range support"""
+    stored = report_store.get(report_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Report not found or expired")
+    
+    headers = {
+        "ETag": stored.etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=3600, immutable",
+        "Content-Disposition": f"attachment; filename={stored.filename}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or stored.etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        byte_range = parse_range(request.headers.get("range"), stored.size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stored.size}"})
+    
+    body = stored.data
+    status_code = 200
+    if byte_range is not None:
+        start, end = byte_range
+        body = stored.data[start:end + 1]
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{stored.size}"
+    if request.method == "HEAD":
+        headers["Content-Length"] = str(len(body))
+        body = b""
+    return Response(content=body, status_code=status_code, media_type=stored.media_type, headers=headers)
+
 @app.post("/download-excel")
 async def download_excel(request: dict):
-    """Download Excel file endpoint using POST"""
+    """Download Excel file endpoint using POST (prefer GET /reports/{report_id})"""
     try:
-        import base64
-        excel_data = request.get('excel_data')
-        if not excel_data:
+        excel_bytes = _resolve_report_bytes(request)
+        if not excel_bytes:
             raise HTTPException(status_code=400, detail="No excel data provided")
-            
-        excel_bytes = base64.b64decode(excel_data)
         
         # Create BytesIO object
         excel_io = io.BytesIO(excel_bytes)
@@ -366,23 +645,19 @@ async def download_excel(request: dict):
                 "Content-Length": str(len(excel_bytes))
             }
         )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Download error: {str(e)}")  # Debug log
         raise HTTPException(status_code=500, detail=f"Error downloading file: {str(e)}")
 
 @app.get("/download/excel")
-async def download_excel_get():
-    """Download Excel file endpoint using GET"""
+async def download_excel_get(user_id: str, start_date: Optional[str] = None,
+                             end_date: Optional[str] = None, category: Optional[str] = None):
+    """Download the ledger (optionally filtered by date range and category) as Excel"""
     try:
-        # Sample expenses for demo
-        sample_expenses = [
-            ExpenseItem(date="2025-08-20", description="Gaming Purchase", amount=1500.0, category="Entertainment"),
-            ExpenseItem(date="2025-08-20", description="Restaurant Bill", amount=850.0, category="Food & Dining"),
-            ExpenseItem(date="2025-08-20", description="Subscription", amount=299.0, category="Entertainment")
-        ]
-        
-        # Generate Excel file
-        excel_bytes = create_excel_response(sample_expenses)
+        expenses = ledger.iter_expenses(user_id, start_date, end_date, category)
+        excel_bytes = await run_in_threadpool(create_excel_response, expenses)
         
         if excel_bytes:
             return Response(
@@ -391,61 +666,60 @@ async def download_excel_get():
                 headers={"Content-Disposition": "attachment; filename=expenses.xlsx"}
             )
         else:
-            raise HTTPException(status_code=500, detail="Failed to generate Excel file")
+            raise HTTPException(status_code=404, detail="No expenses recorded")
             
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Download error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error downloading file: {str(e)}")
 
 @app.get("/download/csv")
-async def download_csv_get():
-    """Download CSV file endpoint using GET"""
-    try:
-        # Sample expenses for demo
-        sample_expenses = [
-            ExpenseItem(date="2025-08-20", description="Gaming Purchase", amount=1500.0, category="Entertainment"),
-            ExpenseItem(date="2025-08-20", description="Restaurant Bill", amount=850.0, category="Food & Dining"),
-            ExpenseItem(date="2025-08-20", description="Subscription", amount=299.0, category="Entertainment")
-        ]
-        
-        # Generate CSV content
-        csv_content = "Date,Description,Amount,Category\n"
-        for expense in sample_expenses:
-            csv_content += f"{expense.date},{expense.description},{expense.amount},{expense.category}\n"
-        
-        return Response(
-            content=csv_content.encode('utf-8'),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=expenses.csv"}
-        )
-            
-    except Exception as e:
-        print(f"CSV download error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error downloading CSV file: {str(e)}")
+async def download_csv_get(user_id: str, start_date: Optional[str] = None,
+                           end_date: Optional[str] = None, category: Optional[str] = None,
+                           gzip: bool = False):
+    """Stream the ledger as CSV, optionally filtered and gzip-compressed (``expenses.csv.gz``)"""
+    rows = ledger.iter_expenses(user_id, start_date, end_date, category)
+    filename = "expenses.csv.gz" if gzip else "expenses.csv"
+    return StreamingResponse(
+        iter_csv(rows, compress=gzip),
+        media_type="application/gzip" if gzip else "text/csv; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+def generate_message_report(message: str):
+    """Extract expenses from ``message`` and store their Excel report; ``(expenses, stored report or None)``"""
+    with time_stage("extract_expenses"):
+        expenses = extract_expenses_from_text(message, '')
+    if not expenses:
+        return expenses, None
+    with time_stage("excel_report"):
+        excel_bytes = create_excel_response(expenses)
+    return expenses, report_store.put(excel_bytes) if excel_bytes else None
 
 @app.post("/generate-excel")
 async def generate_excel(request: dict):
-    """Generate and return Excel file as base64"""
+    """Generate an Excel report and return its ID and download URL (base64 only on request)"""
     try:
         user_message = request.get('message', '')
         
-        # Extract expenses from message
-        expenses = extract_expenses_from_text(user_message, '')
+        # Extraction, the workbook and the store write all block; keep them off the event loop
+        expenses, stored = await run_in_threadpool(generate_message_report, user_message)
         
         if not expenses:
             return {"error": "No expenses found in message"}
             
-        # Generate Excel
-        excel_bytes = create_excel_response(expenses)
-        if excel_bytes:
-            import base64
-            excel_data = base64.b64encode(excel_bytes).decode('utf-8')
-            return {
+        if stored is not None:
+            result = {
                 "success": True,
-                "excel_data": excel_data,
+                "report_id": stored.report_id,
+                "download_url": report_download_url(stored.report_id),
                 "expenses_count": len(expenses),
                 "total_amount": sum(exp.amount for exp in expenses)
             }
+            if request.get('include_excel_data'):
+                result["excel_data"] = await run_in_threadpool(_encode_excel, stored.data)
+            return result
         else:
             return {"error": "Failed to generate Excel"}
             
@@ -453,71 +727,177 @@ async def generate_excel(request: dict):
         print(f"Generate Excel error: {str(e)}")
         return {"error": str(e)}
 
+class _RequestStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body is produced while the request body is still being read.
+
+    StreamingResponse otherwise watches for a disconnect by calling ``receive()``
+    alongside the body, which would swallow request chunks; here reading the
+    request stream reports the disconnect instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+@app.post("/expenses/extract-batch")
+async def extract_expenses_batch(request: Request):
+    """Extract expenses from many messages at once (e.g. a bank SMS inbox import).
+
+    Accepts NDJSON (``application/x-ndjson``, one message string or
+    ``{"id", "message"|"body", "date", "sender"|"address"}`` object per line) or a JSON
+    array of the same. Bank SMS are parsed with the per-bank templates in
+    ``expenses.sms``; everything else goes through the conversational extractor.
+    Streams back one NDJSON line per message, ``{"index", "id", "expenses"}`` (plus
+    ``"transaction"`` for bank SMS) or ``{"index", "id", "error"}``, followed by a
+    ``{"done": true, ...}`` summary line.
+    """
+    try:
+        items = await read_request_items(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return _RequestStreamingResponse(stream_extraction(items), media_type="application/x-ndjson")
+
+@app.post("/expenses")
+async def add_expenses(request: LedgerInsertRequest):
+    """Record expenses in the ledger in one bulk insert; items sent without a category are categorized"""
+    expenses = [
+        expense if expense.category and "category" in expense.model_fields_set
+        else expense.model_copy(update={"category": categorize_expense(expense.description)})
+        for expense in request.expenses
+    ]
+    inserted = await run_in_threadpool(ledger.add_expenses, expenses, request.user_id, "api")
+    return {"inserted": inserted}
+
+@app.get("/expenses")
+async def list_expenses(user_id: str, start_date: Optional[str] = None,
+                        end_date: Optional[str] = None, category: Optional[str] = None,
+                        limit: int = 100, cursor: Optional[str] = None):
+    """Page through the ledger newest first; pass ``next_cursor`` back as ``cursor`` for the next page"""
+    try:
+        expenses, next_cursor = await run_in_threadpool(
+            ledger.query_expenses, user_id, start_date, end_date, category, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"expenses": expenses, "next_cursor": next_cursor}
+
+@app.get("/expenses/summary")
+async def expenses_summary(user_id: str, start_date: Optional[str] = None,
+                           end_date: Optional[str] = None, category: Optional[str] = None):
+    """Ledger totals by category, day and month"""
+    return await run_in_threadpool(ledger.summarize, user_id, start_date, end_date, category)
+
+def _store_upload(excel_data: str):
+    import base64
+    return report_store.put(base64.b64decode(excel_data))
+
 @app.post("/view-summary")
 async def view_summary(request: dict):
+    """Summarize a report by ``report_id`` or an uploaded base64 XLSX/CSV in ``excel_data``.
+
+    Returns up to ``limit`` (default 100) expense rows plus totals by category, day and month.
+    With only a ``user_id``, the totals come from that user's ledger instead.
+    """
     try:
+        report_id = request.get("report_id")
         excel_data = request.get("excel_data")
-        if not excel_data:
+        if not excel_data and not report_id:
+            if request.get("user_id"):
+                return await run_in_threadpool(ledger.summarize, request["user_id"])
             return {"error": "No excel data provided"}
         
-        # For demo purposes, return mock data based on the excel_data
-        # In a real implementation, you would decode and parse the Excel data
-        mock_expenses = [
-            {
-                "date": "2025-08-21",
-                "description": "Books",
-                "category": "Education", 
-                "amount": 150.0
-            },
-            {
-                "date": "2025-08-21",
-                "description": "Snacks",
-                "category": "Food & Dining",
-                "amount": 80.0
-            },
-            {
-                "date": "2025-08-21",
-                "description": "Bus fare",
-                "category": "Transportation",
-                "amount": 25.0
-            },
-            {
-                "date": "2025-08-20",
-                "description": "Coffee",
-                "category": "Food & Dining",
-                "amount": 120.0
-            },
-            {
-                "date": "2025-08-20",
-                "description": "Stationery",
-                "category": "Education",
-                "amount": 200.0
-            }
-        ]
-        
-        total_amount = sum(expense["amount"] for expense in mock_expenses)
+        # Both may hit the shared cache (SQLite) and the disk tier
+        if report_id:
+            stored = await run_in_threadpool(report_store.get, report_id)
+            if stored is None:
+                return {"error": "Report not found or expired"}
+        else:
+            stored = await run_in_threadpool(_store_upload, excel_data)
         
-        return {
-            "expenses": mock_expenses,
-            "total": total_amount,
-            "currency": "INR",
-            "excel_data": excel_data
-        }
+        limit = int(request.get("limit", 100))
+        with time_stage("summarize_report"):
+            summary = await run_in_threadpool(
+                summarize_report, stored.data, limit, stored.etag.strip('"')
+            )
+        return {**summary, "report_id": stored.report_id}
         
     except Exception as e:
         print(f"View summary error: {str(e)}")
         return {"error": str(e)}
 
+def _component_metrics():
+    """Counters kept by the caches, LLM client and limiters, exported at scrape time"""
+    cache = chat_cache.stats()
+    yield "chat_cache_lookups_total", "counter", "Chat response cache lookups by result.", [
+        ({"result": "hit"}, cache["hits"]), ({"result": "disk_hit"}, cache["disk_hits"]),
+        ({"result": "miss"}, cache["misses"]), ({"result": "bypass"}, cache["bypassed"]),
+    ]
+    coalescing = chat_coalescer.stats()
+    yield "chat_coalesced_total", "counter", "Chat requests that shared another request's model call.", [
+        ({}, coalescing["coalesced"] + coalescing["window_hits"]),
+    ]
+    llm = llm_client.stats()
+    yield "llm_in_flight", "gauge", "Model calls in progress.", [({}, llm["in_flight"])]
+    yield "llm_waiting", "gauge", "Model calls waiting for a slot.", [({}, llm["waiting"])]
+    yield "llm_rejected_total", "counter", "Model calls rejected because the queue was full.", [({}, llm["rejected"])]
+    breaker = llm_client.breaker.stats()
+    yield "circuit_breaker_open", "gauge", "1 while the model circuit breaker is open or half-open.", [
+        ({}, 0 if breaker["state"] == "closed" else 1),
+    ]
+    yield "circuit_breaker_short_circuited_total", "counter", "Model calls refused by the circuit breaker.", [
+        ({}, breaker["short_circuited"]),
+    ]
+    yield "rate_limited_total", "counter", "Requests rejected by per-client rate limiting.", [
+        ({}, rate_limiter.stats()["limited"]),
+    ]
+    pool = tip_pool.stats()
+    yield "tip_pool_available", "gauge", "Ready tips per category.", [
+        ({"category": category}, count) for category, count in pool["available"].items()
+    ]
+    yield "tip_pool_requests_total", "counter", "Tip pool pops by result.", [
+        ({"result": "hit"}, pool["hits"]), ({"result": "miss"}, pool["misses"]),
+    ]
+
+metrics_registry.register_collector(_component_metrics)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text-format metrics"""
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "gemini_configured": bool(GEMINI_API_KEY)}
+    return {
+        "status": "healthy",
+        "gemini_configured": bool(GEMINI_API_KEY),
+        "llm": llm_client.stats(),
+        "circuit_breaker": llm_client.breaker.stats(),
+        "tip_pool": tip_pool.stats(),
+        "shared_cache": shared_cache.stats(),
+        "report_jobs": report_jobs.stats(),
+        "chat_cache": chat_cache.stats(),
+        "chat_coalescing": chat_coalescer.stats(),
+        "chat_sessions": chat_sessions.stats(),
+        "rate_limit": rate_limiter.stats(),
+    }
+
 
+@app.post("/models/reload")
+async def reload_models():
+    """Re-read MODEL_CONFIG_FILE now instead of waiting for the periodic check"""
+    return {"models": await run_in_threadpool(model_registry.reload)}
 
 @app.get("/daily-tip")
 async def daily_tip():
     """Return a short daily tip (cached per day)."""
     try:
-        tip_data = generate_daily_tip()
+        # Cache hits are a dict lookup; only a refresh needs the threadpool
+        tip_data = get_cached_tip() or await run_in_threadpool(generate_daily_tip)
         return {
             "status": "success", 
             "tip": tip_data,
@@ -542,7 +922,7 @@ async def daily_tip():
 async def daily_tip_varied(request: DailyTipRequest):
     """Return a varied daily tip based on category."""
     try:
-        tip_data = generate_daily_tip(category=request.category)
+        tip_data = await run_in_threadpool(generate_daily_tip, category=request.category)
         return {
             "status": "success", 
             "tip": tip_data,
@@ -0,0 +1,64 @@
+"""Per-client token buckets for endpoints that reach the model.
+
+Each client (``X-Client-Id`` header, else the peer address) gets a bucket of
+``RATE_LIMIT_BURST`` tokens refilled at ``RATE_LIMIT_PER_MINUTE``. Buckets are
+kept in an LRU capped at ``RATE_LIMIT_MAX_CLIENTS`` so memory stays bounded.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from backend.config import RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST, RATE_LIMIT_MAX_CLIENTS
+
+
+class RateLimiter:
+    def __init__(self, per_minute: float = RATE_LIMIT_PER_MINUTE, burst: int = RATE_LIMIT_BURST,
+                 max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        # client -> (tokens, last refill time)
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def check(self, client_id: str) -> Optional[float]:
+        """Take a token for ``client_id``; returns None if allowed, else seconds until the next token."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client_id, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+            if tokens >= 1.0:
+                tokens -= 1.0
+                retry_after = None
+                self.allowed += 1
+            else:
+                retry_after = (1.0 - tokens) / self.rate
+                self.limited += 1
+            self._buckets[client_id] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def stats(self) -> dict:
+        with self._lock:
+            clients = len(self._buckets)
+        return {
+            "enabled": self.enabled,
+            "per_minute": round(self.rate * 60, 2),
+            "burst": self.burst,
+            "clients": clients,
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1 @@
+# reports package
@@ -0,0 +1,50 @@
+"""Streaming CSV export.
+
+Rows are pulled from an iterator (normally the ledger's keyset scan) and encoded
+in small blocks, optionally gzip-compressed on the fly, so an export starts
+sending bytes immediately and never holds the whole file in memory.
+"""
+import csv
+import io
+import zlib
+from typing import Iterable, Iterator
+
+from backend.reports.excel import _expense_fields
+
+CSV_HEADERS = ("Date", "Description", "Amount", "Category")
+ROWS_PER_CHUNK = 500
+
+
+def iter_csv(expenses: Iterable, compress: bool = False, rows_per_chunk: int = ROWS_PER_CHUNK) -> Iterator[bytes]:
+    """Yield the CSV for ``expenses`` (ExpenseItem, dict or tuple rows) in chunks.
+
+    Fields are quoted as needed by the ``csv`` module, so descriptions with commas,
+    quotes or newlines survive the round trip.
+    """
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    def flush() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    writer.writerow(CSV_HEADERS)
+    pending = 0
+    for expense in expenses:
+        writer.writerow(_expense_fields(expense))
+        pending += 1
+        if pending >= rows_per_chunk:
+            chunk = flush()
+            if chunk:
+                yield chunk
+            pending = 0
+
+    chunk = flush()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
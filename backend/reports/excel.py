@@ -0,0 +1,183 @@
+"""Streaming XLSX writer for expense reports.
+
+Rows are serialized straight to SpreadsheetML as they are consumed, with column
+widths tracked on the way. The sheet body is buffered in a spooled temp file
+(``<cols>`` has to precede ``<sheetData>`` in the sheet XML) and then copied into
+the zip, so memory stays bounded regardless of ledger size.
+"""
+import io
+import re
+import shutil
+import tempfile
+import zipfile
+from typing import BinaryIO, Iterable, Optional, Tuple
+from xml.sax.saxutils import escape
+
+HEADERS = ("Date", "Description", "Amount (₹)", "Category")
+COLUMNS = ("A", "B", "C", "D")
+MAX_COLUMN_WIDTH = 50
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+# cellXfs indices in STYLES_XML
+STYLE_HEADER = 1
+STYLE_BOLD = 2
+
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Expenses" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Same look as the old pandas/openpyxl report: bordered header in bold white on
+# blue (4472C4), centered; bold "Total:" row
+STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="3">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '</fonts>'
+    '<fills count="3">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FF4472C4"/><bgColor rgb="FF4472C4"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="2">'
+    '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="1" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center"/></xf>'
+    '<xf numFmtId="0" fontId="2" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+)
+
+
+def _expense_fields(expense) -> Tuple[str, str, float, str]:
+    if isinstance(expense, dict):
+        return expense["date"], expense["description"], expense["amount"], expense.get("category") or "Other"
+    if isinstance(expense, (tuple, list)):
+        return expense[0], expense[1], expense[2], expense[3]
+    return expense.date, expense.description, expense.amount, expense.category
+
+
+def _text_cell(ref: str, value, style: int = 0) -> str:
+    text = escape(_INVALID_XML_CHARS.sub("", str(value)))
+    style_attr = f' s="{style}"' if style else ""
+    return f'<c r="{ref}"{style_attr} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _number_cell(ref: str, value: float) -> str:
+    return f'<c r="{ref}"><v>{value!r}</v></c>'
+
+
+def write_expense_report(expenses: Iterable, output: BinaryIO) -> int:
+    """Stream ``expenses`` (ExpenseItem, dict or tuple rows) into ``output`` as XLSX.
+
+    Returns the number of expense rows written; nothing is written when it is 0.
+    """
+    widths = [len(header) for header in HEADERS]
+    total = 0.0
+    count = 0
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as body:
+        header = "".join(_text_cell(f"{col}1", name, STYLE_HEADER) for col, name in zip(COLUMNS, HEADERS))
+        body.write(f'<row r="1">{header}</row>'.encode("utf-8"))
+
+        for expense in expenses:
+            date, description, amount, category = _expense_fields(expense)
+            amount = float(amount)
+            row = count + 2
+            values = (date, description, amount, category)
+            for i, value in enumerate(values):
+                size = len(str(value))
+                if size > widths[i]:
+                    widths[i] = size
+            body.write((
+                f'<row r="{row}">'
+                f'{_text_cell(f"A{row}", date)}'
+                f'{_text_cell(f"B{row}", description)}'
+                f'{_number_cell(f"C{row}", amount)}'
+                f'{_text_cell(f"D{row}", category)}'
+                '</row>'
+            ).encode("utf-8"))
+            total += amount
+            count += 1
+
+        if count == 0:
+            return 0
+
+        total_row = count + 2
+        body.write((
+            f'<row r="{total_row}">'
+            f'{_text_cell(f"C{total_row}", "Total:", STYLE_BOLD)}'
+            f'{_text_cell(f"D{total_row}", f"₹{total:.2f}", STYLE_BOLD)}'
+            '</row>'
+        ).encode("utf-8"))
+        body.seek(0)
+
+        cols = "".join(
+            f'<col min="{i}" max="{i}" width="{min(width + 2, MAX_COLUMN_WIDTH)}" customWidth="1"/>'
+            for i, width in enumerate(widths, start=1)
+        )
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("[Content_Types].xml", CONTENT_TYPES_XML)
+            archive.writestr("_rels/.rels", ROOT_RELS_XML)
+            archive.writestr("xl/workbook.xml", WORKBOOK_XML)
+            archive.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS_XML)
+            archive.writestr("xl/styles.xml", STYLES_XML)
+            with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+                sheet.write(f"{SHEET_HEAD}<cols>{cols}</cols><sheetData>".encode("utf-8"))
+                shutil.copyfileobj(body, sheet)
+                sheet.write(b"</sheetData></worksheet>")
+    return count
+
+
+def create_excel_response(expenses: Iterable) -> Optional[bytes]:
+    """Create Excel file from expenses list"""
+    output = io.BytesIO()
+    if not write_expense_report(expenses, output):
+        return None
+    return output.getvalue()
@@ -0,0 +1,237 @@
+"""Background generation of large ledger exports.
+
+Exports submitted as jobs are built by a dedicated pool of ``REPORT_JOB_WORKERS``
+processes (0: one background thread). They never hold the GIL, the event loop
+or the request threadpool that ``/chat`` depends on. Job records (status,
+progress, result) are kept in the shared cache, so a status poll or a cancel
+request can reach any server worker. The finished file goes into the report
+store. At most ``REPORT_JOB_MAX_PENDING`` jobs may be queued or running per
+server process, and records and results expire after
+``REPORT_JOB_RESULT_TTL_SECONDS``.
+"""
+import io
+import multiprocessing
+import secrets
+import sqlite3
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from backend.config import REPORT_JOB_WORKERS, REPORT_JOB_MAX_PENDING, REPORT_JOB_RESULT_TTL_SECONDS
+from backend.reports.store import REPORT_FORMATS
+from backend.shared_cache import shared_cache
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# (media type, download filename) per job format
+FORMATS = {extension: (media_type, f"expenses.{extension}") for extension, media_type in REPORT_FORMATS.items()}
+
+JOB_NAMESPACE = "report_job"
+# Progress is published (and cancellation checked) every this many rows
+PROGRESS_EVERY_ROWS = 2000
+
+
+class JobQueueFullError(Exception):
+    """Raised when a server process already has ``max_pending`` unfinished jobs."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _cancel_key(job_id: str) -> str:
+    return f"{job_id}:cancel"
+
+
+def load_job(job_id: str) -> Optional[dict]:
+    return shared_cache.get_json(JOB_NAMESPACE, job_id)
+
+
+def _save_job(job: dict):
+    job["updated_at"] = time.time()
+    shared_cache.set_json(JOB_NAMESPACE, job["id"], job, ttl=REPORT_JOB_RESULT_TTL_SECONDS)
+
+
+def _cancel_requested(job_id: str) -> bool:
+    return shared_cache.get(JOB_NAMESPACE, _cancel_key(job_id)) is not None
+
+
+def _tracked(rows, job: dict):
+    """Pass rows through, publishing progress and honouring cancellation along the way."""
+    for row in rows:
+        yield row
+        job["rows"] += 1
+        if job["rows"] % PROGRESS_EVERY_ROWS == 0:
+            if _cancel_requested(job["id"]):
+                raise JobCancelled()
+            if job["total_rows"]:
+                job["progress"] = round(min(job["rows"] / job["total_rows"], 0.99), 3)
+            _save_job(job)
+
+
+def run_report_job(job_id: str):
+    """Build the export described by job ``job_id``; runs in a job worker."""
+    from backend.ledger.store import ledger
+    from backend.reports.csv_export import iter_csv
+    from backend.reports.excel import write_expense_report
+    from backend.reports.store import ReportStore
+
+    job = load_job(job_id)
+    if job is None or job["status"] != QUEUED:
+        return
+    if _cancel_requested(job_id):
+        job["status"] = CANCELLED
+        _save_job(job)
+        return
+
+    params = job["params"]
+    job["status"] = RUNNING
+    job["started_at"] = time.time()
+    try:
+        job["total_rows"] = ledger.count(params["user_id"], params.get("start_date"), params.get("end_date"),
+                                         params.get("category"))
+        _save_job(job)
+        rows = _tracked(ledger.iter_expenses(params["user_id"], params.get("start_date"),
+                                             params.get("end_date"), params.get("category")), job)
+        if job["format"] == "xlsx":
+            output = io.BytesIO()
+            write_expense_report(rows, output)
+            data = output.getvalue()
+        else:
+            data = b"".join(iter_csv(rows, compress=job["format"] == "csv.gz"))
+        # Only the shared (and disk) tiers matter here; this process never serves it
+        store = ReportStore(max_items=0, ttl_seconds=REPORT_JOB_RESULT_TTL_SECONDS)
+        stored = store.put(data, FORMATS[job["format"]][0])
+        job.update(status=DONE, progress=1.0, report_id=stored.report_id, size=len(data))
+    except JobCancelled:
+        job["status"] = CANCELLED
+    except Exception as e:
+        print(f"Report job {job_id} failed: {e}")
+        job.update(status=FAILED, error=str(e))
+    job["finished_at"] = time.time()
+    _save_job(job)
+
+
+class ReportJobs:
+    def __init__(self, workers: int = REPORT_JOB_WORKERS, max_pending: int = REPORT_JOB_MAX_PENDING):
+        self.workers = max(0, workers)
+        self.max_pending = max(1, max_pending)
+        self._executor: Optional[Executor] = None
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers:
+                # spawn, not fork: forked children would inherit the parent's open SQLite connections
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(1, thread_name_prefix="report-job")
+        return self._executor
+
+    def submit(self, params: dict, report_format: str = "xlsx") -> dict:
+        """Queue an export of the ledger rows matching ``params``; returns the job record."""
+        if report_format not in FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+        with self._lock:
+            if len(self._futures) >= self.max_pending:
+                self.rejected += 1
+                raise JobQueueFullError(f"{len(self._futures)} report jobs already pending", 5.0)
+            job = {
+                "id": secrets.token_hex(8),
+                "status": QUEUED,
+                "format": report_format,
+                "params": params,
+                "progress": 0.0,
+                "rows": 0,
+                "total_rows": None,
+                "report_id": None,
+                "error": None,
+                "created_at": time.time(),
+            }
+            _save_job(job)
+            try:
+                future = self._get_executor().submit(run_report_job, job["id"])
+            except BrokenProcessPool:
+                self._executor = None
+                future = self._get_executor().submit(run_report_job, job["id"])
+            self._futures[job["id"]] = future
+            self.submitted += 1
+        future.add_done_callback(lambda f, job_id=job["id"]: self._finished(job_id, f))
+        return job
+
+    def _finished(self, job_id: str, future: Future):
+        with self._lock:
+            self._futures.pop(job_id, None)
+            self.completed += 1
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            return
+        # The worker died before it could record the outcome
+        print(f"Report job {job_id} crashed: {error}")
+        if isinstance(error, BrokenProcessPool):
+            with self._lock:
+                self._executor = None
+        try:
+            job = load_job(job_id)
+            if job is not None and job["status"] not in FINISHED:
+                job.update(status=FAILED, error=str(error) or type(error).__name__, finished_at=time.time())
+                _save_job(job)
+        except sqlite3.Error as e:
+            print(f"Report job {job_id} state error: {e}")
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return load_job(job_id)
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """Cancel a job; a queued one is dropped here, a running one stops at its next progress check."""
+        job = load_job(job_id)
+        if job is None or job["status"] in FINISHED:
+            return job
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            job.update(status=CANCELLED, finished_at=time.time())
+            _save_job(job)
+            return job
+        # Running here, or owned by another server worker
+        shared_cache.set(JOB_NAMESPACE, _cancel_key(job_id), b"1", ttl=REPORT_JOB_RESULT_TTL_SECONDS)
+        job["cancel_requested"] = True
+        return job
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._futures)
+        return {
+            "workers": self.workers,
+            "pending": pending,
+            "max_pending": self.max_pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+report_jobs = ReportJobs()
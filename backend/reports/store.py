@@ -0,0 +1,255 @@
+"""Content-addressed store for generated reports.
+
+Reports are kept in memory under a short ID derived from their SHA-256, with LRU
+eviction bounded by item count and total bytes plus a TTL. Every report is also
+written to the shared cache, so a report created by one worker can be
+downloaded from any other. When ``REPORT_STORE_DIR`` is set, reports are also
+written to disk so they survive eviction and restarts. Both tiers keep the media
+type next to the bytes, so a CSV stays a CSV whichever worker serves it.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from backend.config import (
+    REPORT_STORE_DIR,
+    REPORT_STORE_MAX_ITEMS,
+    REPORT_STORE_MAX_BYTES,
+    REPORT_TTL_SECONDS,
+)
+from backend.shared_cache import shared_cache
+
+SHARED_NAMESPACE = "report"
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+GZIP_MEDIA_TYPE = "application/gzip"
+# Media type of each report format, keyed by its file extension
+REPORT_FORMATS = {"xlsx": XLSX_MEDIA_TYPE, "csv": CSV_MEDIA_TYPE, "csv.gz": GZIP_MEDIA_TYPE}
+REPORT_ID_LENGTH = 16
+
+
+def report_extension(media_type: str) -> str:
+    """File extension for a report's media type (XLSX when unknown)."""
+    for extension, known in REPORT_FORMATS.items():
+        if known == media_type:
+            return extension
+    return "xlsx"
+
+
+class StoredReport:
+    __slots__ = ("report_id", "data", "etag", "media_type", "created_at")
+
+    def __init__(self, report_id: str, data: bytes, etag: str, media_type: str, created_at: float):
+        self.report_id = report_id
+        self.data = data
+        self.etag = etag
+        self.media_type = media_type
+        self.created_at = created_at
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @property
+    def filename(self) -> str:
+        return f"expenses_{self.report_id}.{report_extension(self.media_type)}"
+
+
+class ReportStore:
+    def __init__(self, max_items: int = REPORT_STORE_MAX_ITEMS, max_bytes: int = REPORT_STORE_MAX_BYTES,
+                 ttl_seconds: float = REPORT_TTL_SECONDS, directory: Optional[str] = REPORT_STORE_DIR,
+                 shared=shared_cache):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.directory = directory
+        self.shared = shared
+        self._items: "OrderedDict[str, StoredReport]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def put(self, data: bytes, media_type: str = XLSX_MEDIA_TYPE) -> StoredReport:
+        """Store ``data`` and return its entry; identical content maps to the same ID."""
+        digest = hashlib.sha256(data).hexdigest()
+        report_id = digest[:REPORT_ID_LENGTH]
+        report = StoredReport(report_id, data, f'"{digest}"', media_type, time.time())
+        with self._lock:
+            existing = self._items.pop(report_id, None)
+            if existing is not None:
+                self._bytes -= existing.size
+            self._items[report_id] = report
+            self._bytes += report.size
+            self._evict_locked()
+        if self.shared is not None:
+            self._write_shared(report)
+        if self.directory:
+            self._write_disk(report)
+        return report
+
+    def get(self, report_id: str) -> Optional[StoredReport]:
+        if not _valid_id(report_id):
+            return None
+        with self._lock:
+            report = self._items.get(report_id)
+            if report is not None:
+                if self._expired(report.created_at):
+                    self._drop_locked(report_id)
+                    report = None
+                else:
+                    self._items.move_to_end(report_id)
+                    return report
+        if self.shared is not None:
+            report = self._read_shared(report_id)
+            if report is not None:
+                return report
+        if self.directory:
+            return self._read_disk(report_id)
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"items": len(self._items), "bytes": self._bytes, "disk": bool(self.directory),
+                    "shared": self.shared is not None}
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _drop_locked(self, report_id: str):
+        report = self._items.pop(report_id, None)
+        if report is not None:
+            self._bytes -= report.size
+
+    def _evict_locked(self):
+        while self._items and (len(self._items) > self.max_items or self._bytes > self.max_bytes):
+            _, report = self._items.popitem(last=False)
+            self._bytes -= report.size
+
+    def _remember(self, report: StoredReport):
+        with self._lock:
+            self._drop_locked(report.report_id)
+            self._items[report.report_id] = report
+            self._bytes += report.size
+            self._evict_locked()
+
+    def _write_shared(self, report: StoredReport):
+        # One entry holds "<media type>\n<bytes>", so the two can't be evicted separately
+        value = report.media_type.encode("ascii") + b"\n" + report.data
+        try:
+            self.shared.set(SHARED_NAMESPACE, report.report_id, value, ttl=self.ttl_seconds or None)
+        except sqlite3.Error as e:
+            print(f"Report store shared cache write error: {e}")
+
+    def _read_shared(self, report_id: str) -> Optional[StoredReport]:
+        try:
+            value = self.shared.get(SHARED_NAMESPACE, report_id)
+        except sqlite3.Error as e:
+            print(f"Report store shared cache read error: {e}")
+            return None
+        if value is None:
+            return None
+        media_type, _, data = value.partition(b"\n")
+        digest = hashlib.sha256(data).hexdigest()
+        if digest.startswith(report_id):
+            media_type = media_type.decode("ascii", "replace")
+        else:
+            # Entries written before the media type was stored hold just the XLSX bytes
+            data, media_type = value, XLSX_MEDIA_TYPE
+            digest = hashlib.sha256(data).hexdigest()
+            if not digest.startswith(report_id):
+                return None
+        report = StoredReport(report_id, data, f'"{digest}"', media_type, time.time())
+        self._remember(report)
+        return report
+
+    def _path(self, report_id: str, media_type: str) -> str:
+        return os.path.join(self.directory, f"{report_id}.{report_extension(media_type)}")
+
+    def _media_type_path(self, report_id: str) -> str:
+        return os.path.join(self.directory, f"{report_id}.media_type")
+
+    def _write_disk(self, report: StoredReport):
+        path = self._path(report.report_id, report.media_type)
+        if os.path.exists(path):
+            return
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            # The media type goes first, so a report file never exists without it
+            media_type_path = self._media_type_path(report.report_id)
+            with open(media_type_path + suffix, "w", encoding="ascii") as f:
+                f.write(report.media_type)
+            os.replace(media_type_path + suffix, media_type_path)
+            with open(path + suffix, "wb") as f:
+                f.write(report.data)
+            os.replace(path + suffix, path)
+        except OSError as e:
+            print(f"Report store write error: {e}")
+
+    def _read_disk(self, report_id: str) -> Optional[StoredReport]:
+        media_type = self._read_media_type(report_id)
+        path = self._path(report_id, media_type)
+        try:
+            created_at = os.path.getmtime(path)
+            if self._expired(created_at):
+                os.remove(path)
+                self._remove_media_type(report_id)
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        if not digest.startswith(report_id):
+            return None
+        report = StoredReport(report_id, data, f'"{digest}"', media_type, created_at)
+        self._remember(report)
+        return report
+
+    def _read_media_type(self, report_id: str) -> str:
+        # Reports written before the media type was stored are all XLSX
+        try:
+            with open(self._media_type_path(report_id), "r", encoding="ascii") as f:
+                return f.read().strip() or XLSX_MEDIA_TYPE
+        except (OSError, ValueError):
+            return XLSX_MEDIA_TYPE
+
+    def _remove_media_type(self, report_id: str):
+        try:
+            os.remove(self._media_type_path(report_id))
+        except OSError:
+            pass
+
+
+def _valid_id(report_id: str) -> bool:
+    return len(report_id) == REPORT_ID_LENGTH and all(c in "0123456789abcdef" for c in report_id)
+
+
+def parse_range(header: Optional[str], size: int):
+    """Parse a single ``bytes=`` range into inclusive ``(start, end)``.
+
+    Returns ``None`` when the whole body should be sent (no header, or a multi-range
+    request) and raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_text, _, end_text = header[len("bytes="):].strip().partition("-")
+    if not start_text:
+        # Suffix range: the last N bytes
+        length = int(end_text)
+        if length <= 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        raise ValueError("range not satisfiable")
+    return start, min(end, size - 1)
+
+
+report_store = ReportStore()
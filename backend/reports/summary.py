@@ -0,0 +1,281 @@
+"""Summaries of uploaded expense workbooks and CSV exports.
+
+Workbooks are decoded with python-calamine when it is installed, otherwise by
+scanning the first sheet's XML straight into columns (openpyxl's cell objects
+are far too slow for large ledgers; it remains the fallback for anything the
+fast reader cannot handle). All totals come from vectorized pandas group-bys,
+and results are cached by content hash, in this process and in the shared cache
+for other workers, so re-opening a report is a lookup.
+"""
+import hashlib
+import io
+import posixpath
+import re
+import sqlite3
+import threading
+import zipfile
+from html import unescape
+from collections import OrderedDict
+from typing import List, Optional
+from xml.etree.ElementTree import iterparse
+
+from backend.config import SUMMARY_CACHE_SIZE, REPORT_TTL_SECONDS
+from backend.shared_cache import shared_cache
+
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = "openpyxl"
+
+# Accepted spellings for each logical column, matched case-insensitively by prefix
+COLUMN_ALIASES = {
+    "date": ("date", "txn date", "transaction date"),
+    "description": ("description", "details", "narration", "merchant", "title"),
+    "amount": ("amount", "debit", "value"),
+    "category": ("category",),
+}
+
+SHARED_NAMESPACE = "report_summary"
+
+_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+# <c r="B7" s="1" t="inlineStr">...</c>, attributes in the order Excel, openpyxl and
+# backend.reports.excel all write them
+_CELL_RE = re.compile(
+    r'<c r="([A-Z]+)(\d+)"(?: s="(\d+)")?(?: t="(\w+)")?(?: s="(\d+)")?\s*'
+    r'(?:/>|>(?:<f>[^<]*</f>|<f[^>]*/>)?(?:<v>([^<]*)</v>)?(?:<is><t(?: [^>]*)?>([^<]*)</t></is>)?</c>)'
+)
+
+# Built-in number formats that display a date or time
+_DATE_FORMAT_IDS = frozenset([*range(14, 23), *range(27, 37), 45, 46, 47, *range(50, 59)])
+# Quoted text, [colour]/[locale] sections and escaped characters in a format code
+_FORMAT_LITERAL_RE = re.compile(r'"[^"]*"|\[[^\]]*\]|\\.')
+# Excel stores dates as days since 1899-12-30 (which absorbs its 1900 leap-year bug)
+EXCEL_EPOCH = "1899-12-30"
+
+
+def _first_sheet_path(archive: zipfile.ZipFile) -> str:
+    with archive.open("xl/workbook.xml") as f:
+        for _, element in iterparse(f):
+            if element.tag == f"{_NS}sheet":
+                rel_id = element.get(f"{_REL_NS}id")
+                break
+        else:
+            raise ValueError("workbook has no sheets")
+    with archive.open("xl/_rels/workbook.xml.rels") as f:
+        for _, element in iterparse(f):
+            if element.get("Id") == rel_id:
+                target = element.get("Target")
+                return target.lstrip("/") if target.startswith("/") else posixpath.join("xl", target)
+    raise ValueError("sheet relationship not found")
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings = []
+    with archive.open("xl/sharedStrings.xml") as f:
+        for _, element in iterparse(f):
+            if element.tag == f"{_NS}si":
+                strings.append("".join(t.text or "" for t in element.iter(f"{_NS}t")))
+                element.clear()
+    return strings
+
+
+def _date_styles(archive: zipfile.ZipFile) -> List[str]:
+    """Indices (as written in ``s=""``) of the cell styles whose number format is a date or time."""
+    if "xl/styles.xml" not in archive.namelist():
+        return []
+    from xml.etree.ElementTree import fromstring
+
+    root = fromstring(archive.read("xl/styles.xml"))
+    custom = {}
+    formats = root.find(f"{_NS}numFmts")
+    if formats is not None:
+        for element in formats:
+            code = _FORMAT_LITERAL_RE.sub("", element.get("formatCode", ""))
+            custom[int(element.get("numFmtId", "0"))] = re.search(r"[dmyhs]", code, re.I) is not None
+    styles = []
+    xfs = root.find(f"{_NS}cellXfs")
+    for index, xf in enumerate(xfs if xfs is not None else []):
+        format_id = int(xf.get("numFmtId", "0"))
+        if custom.get(format_id, format_id in _DATE_FORMAT_IDS):
+            styles.append(str(index))
+    return styles
+
+
+def _xml_unescape(series):
+    # Only the (usually few) values that contain an entity need the slow path
+    escaped = series.str.contains("&", regex=False)
+    if escaped.any():
+        series = series.copy()
+        series[escaped] = [unescape(text) for text in series[escaped]]
+    return series
+
+
+def _read_xlsx_fast(data: bytes):
+    """Read the first sheet into a DataFrame (first row = header).
+
+    All cells are pulled out of the sheet XML with one regex pass and decoded as
+    whole columns; sheets whose cells do not fit the expected shape raise so the
+    caller can fall back to openpyxl.
+    """
+    import numpy as np
+    import pandas as pd
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        strings = _shared_strings(archive)
+        date_styles = _date_styles(archive)
+        sheet = archive.read(_first_sheet_path(archive)).decode("utf-8")
+
+    cells = _CELL_RE.findall(sheet)
+    if len(cells) != sheet.count("<c ") + sheet.count("<c>"):
+        raise ValueError("unrecognised cell markup")
+    if not cells:
+        return pd.DataFrame()
+
+    raw = pd.DataFrame(cells, columns=["col", "row", "style", "type", "style_after", "value", "inline"])
+    value = pd.Series(None, index=raw.index, dtype=object)
+    kind = raw["type"]
+
+    shared = kind == "s"
+    if shared.any():
+        value[shared] = np.asarray(strings, dtype=object)[raw.loc[shared, "value"].astype(int).to_numpy()]
+    inline = kind == "inlineStr"
+    if inline.any():
+        value[inline] = _xml_unescape(raw.loc[inline, "inline"])
+    text = kind.isin(["str", "e"])
+    if text.any():
+        value[text] = _xml_unescape(raw.loc[text, "value"])
+    boolean = kind == "b"
+    if boolean.any():
+        value[boolean] = raw.loc[boolean, "value"] == "1"
+    numeric = (kind == "") | (kind == "n")
+    if numeric.any():
+        numbers = pd.to_numeric(raw.loc[numeric, "value"].replace("", None), errors="coerce")
+        value[numeric] = numbers
+        if date_styles:
+            # Date cells are serial numbers; the style says how they are meant to be read
+            style = raw["style"].where(raw["style"] != "", raw["style_after"])
+            dated = numeric & style.isin(date_styles)
+            if dated.any():
+                stamps = pd.to_datetime(numbers[dated[numeric]].astype(float), unit="D", origin=EXCEL_EPOCH)
+                value[dated] = stamps.dt.round("s").astype(object)
+
+    raw["value"] = value
+    raw["row"] = raw["row"].astype(int)
+    grid = raw.pivot(index="row", columns="col", values="value")
+    grid = grid[sorted(grid.columns, key=lambda ref: (len(ref), ref))]
+    header = [str(name) if name is not None and name == name else f"column_{i}"
+              for i, name in enumerate(grid.loc[1] if 1 in grid.index else [None] * len(grid.columns))]
+    body = grid.drop(index=1, errors="ignore")
+    body.columns = header
+    return body.reset_index(drop=True)
+
+
+def _read_frame(data: bytes):
+    import pandas as pd
+
+    if data[:2] == b"PK":
+        if EXCEL_ENGINE == "calamine":
+            return pd.read_excel(io.BytesIO(data), engine="calamine")
+        try:
+            return _read_xlsx_fast(data)
+        except Exception as e:
+            print(f"Fast XLSX read failed, falling back to openpyxl: {e}")
+            return pd.read_excel(io.BytesIO(data), engine="openpyxl")
+    return pd.read_csv(io.BytesIO(data), encoding="utf-8-sig")
+
+
+def _normalize_columns(df):
+    """Rename recognised columns to date/description/amount/category."""
+    renames = {}
+    lowered = {column: str(column).strip().lower() for column in df.columns}
+    for target, aliases in COLUMN_ALIASES.items():
+        for column, name in lowered.items():
+            if column not in renames and name.startswith(aliases):
+                renames[column] = target
+                break
+    df = df.rename(columns=renames)
+    if "amount" not in df.columns:
+        raise ValueError("no amount column found")
+    for column in ("date", "description", "category"):
+        if column not in df.columns:
+            df[column] = None
+    return df[["date", "description", "amount", "category"]]
+
+
+def _summarize_frame(df, limit: int) -> dict:
+    import pandas as pd
+
+    df = _normalize_columns(df)
+    # Totals rows ("Total:" / "₹1234.00") and blanks fall out here
+    df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
+    df = df[df["amount"].notna()].copy()
+    df["category"] = df["category"].fillna("Other").astype(str)
+    df["description"] = df["description"].fillna("").astype(str)
+    dates = pd.to_datetime(df["date"], errors="coerce")
+    df["date"] = dates.dt.strftime("%Y-%m-%d").fillna("")
+
+    by_category = (
+        df.groupby("category", sort=False)["amount"]
+        .agg(["sum", "count"])
+        .sort_values("sum", ascending=False)
+    )
+    dated = df.assign(day=dates.dt.normalize(), month=dates.dt.to_period("M"))[dates.notna()]
+    by_day = dated.groupby("day")["amount"].sum().sort_index()
+    by_month = dated.groupby("month")["amount"].sum().sort_index()
+
+    return {
+        "expenses": df.head(limit).to_dict(orient="records") if limit else [],
+        "count": int(len(df)),
+        "total": round(float(df["amount"].sum()), 2),
+        "currency": "INR",
+        "by_category": [
+            {"category": name, "total": round(float(row["sum"]), 2), "count": int(row["count"])}
+            for name, row in by_category.iterrows()
+        ],
+        "by_day": [
+            {"date": day.strftime("%Y-%m-%d"), "total": round(float(total), 2)}
+            for day, total in by_day.items()
+        ],
+        "by_month": [
+            {"month": str(month), "total": round(float(total), 2)}
+            for month, total in by_month.items()
+        ],
+    }
+
+
+def summarize_report(data: bytes, limit: int = 100, digest: Optional[str] = None) -> dict:
+    """Summarize an XLSX or CSV expense file; repeated calls with the same bytes are cached."""
+    key = (digest or hashlib.sha256(data).hexdigest(), limit)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    shared_key = f"{key[0]}:{limit}"
+    try:
+        summary = shared_cache.get_json(SHARED_NAMESPACE, shared_key)
+    except sqlite3.Error as e:
+        print(f"Summary shared cache read error: {e}")
+        summary = None
+    if summary is None:
+        summary = _summarize_frame(_read_frame(data), limit)
+        try:
+            shared_cache.set_json(SHARED_NAMESPACE, shared_key, summary, ttl=REPORT_TTL_SECONDS or None)
+        except sqlite3.Error as e:
+            print(f"Summary shared cache write error: {e}")
+
+    with _cache_lock:
+        _cache[key] = summary
+        while len(_cache) > SUMMARY_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return summary
@@ -0,0 +1,218 @@
+"""Cache shared by every worker process on the host, backed by one SQLite file.
+
+With ``uvicorn --workers N`` each worker has its own memory, so per-process
+caches make every worker repeat the same work. Entries here are visible to all
+workers. Lease rows (taken in ``BEGIN IMMEDIATE`` transactions, i.e. under
+SQLite's file lock) let one worker compute a value while the others wait for it
+or keep serving what they have. Leases expire after ``SHARED_CACHE_LEASE_SECONDS``
+so a crashed worker cannot block the rest.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from backend.config import SHARED_CACHE_PATH, SHARED_CACHE_MAX_BYTES, SHARED_CACHE_LEASE_SECONDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_updated ON entries (updated_at);
+CREATE TABLE IF NOT EXISTS leases (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+# Expired rows and the size cap are enforced at most this often per process
+PURGE_INTERVAL_SECONDS = 60
+
+
+class SharedCache:
+    def __init__(self, path: str = SHARED_CACHE_PATH, max_bytes: int = SHARED_CACHE_MAX_BYTES,
+                 lease_seconds: float = SHARED_CACHE_LEASE_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        self._next_purge = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.leases_won = 0
+        self.leases_lost = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Same per-thread connection scheme as the ledger
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _owner(self) -> str:
+        return f"{os.getpid()}:{threading.get_ident()}"
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT value FROM entries WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time()),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return bytes(row[0])
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None):
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        self._connection().execute(
+            "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, sqlite3.Binary(value), expires_at, now),
+        )
+        if now >= self._next_purge:
+            self._next_purge = now + PURGE_INTERVAL_SECONDS
+            self.purge()
+
+    def get_json(self, namespace: str, key: str):
+        value = self.get(namespace, key)
+        if value is None:
+            return None
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+
+    def set_json(self, namespace: str, key: str, value, ttl: Optional[float] = None):
+        self.set(namespace, key, json.dumps(value, ensure_ascii=False).encode("utf-8"), ttl)
+
+    def update_json(self, namespace: str, key: str, update, ttl: Optional[float] = None):
+        """Atomically replace ``key`` with ``update(current)[0]`` and return ``update(current)[1]``.
+
+        ``current`` is None when the entry is missing or expired. The read and the write
+        happen in one ``BEGIN IMMEDIATE`` transaction, so concurrent workers see each
+        other's updates instead of overwriting them.
+        """
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (namespace, key, now),
+            ).fetchone()
+            current = None
+            if row is not None:
+                try:
+                    current = json.loads(bytes(row[0]))
+                except ValueError:
+                    pass
+            value, result = update(current)
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, sqlite3.Binary(json.dumps(value, ensure_ascii=False).encode("utf-8")),
+                 now + ttl if ttl else None, now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def acquire(self, namespace: str, key: str, owner: Optional[str] = None) -> bool:
+        """Take the lease for computing ``key``; False while another worker holds it.
+
+        ``owner`` defaults to the calling process and thread; pass one explicitly when
+        the lease is taken and released from different threads.
+        """
+        owner = owner or self._owner()
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT owner, expires_at FROM leases WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is not None and row[1] > now and row[0] != owner:
+                conn.execute("COMMIT")
+                self.leases_lost += 1
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (namespace, key, owner, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, owner, now + self.lease_seconds),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.leases_won += 1
+        return True
+
+    def release(self, namespace: str, key: str, owner: Optional[str] = None):
+        self._connection().execute(
+            "DELETE FROM leases WHERE namespace = ? AND key = ? AND owner = ?", (namespace, key, owner or self._owner())
+        )
+
+    def wait_for(self, namespace: str, key: str, timeout: Optional[float] = None,
+                 poll_seconds: float = 0.05) -> Optional[bytes]:
+        """Poll for ``key`` while another worker computes it; None once the wait or its lease runs out."""
+        deadline = time.monotonic() + (self.lease_seconds if timeout is None else timeout)
+        while time.monotonic() < deadline:
+            value = self.get(namespace, key)
+            if value is not None:
+                return value
+            row = self._connection().execute(
+                "SELECT expires_at FROM leases WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None or row[0] <= time.time():
+                return self.get(namespace, key)
+            time.sleep(poll_seconds)
+        return None
+
+    def purge(self):
+        """Drop expired entries and leases, then the oldest entries while over ``max_bytes``."""
+        now = time.time()
+        conn = self._connection()
+        try:
+            conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+            if self.max_bytes > 0:
+                total = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM entries").fetchone()[0]
+                if total > self.max_bytes:
+                    excess = total - self.max_bytes
+                    cutoff = None
+                    for updated_at, size in conn.execute("SELECT updated_at, LENGTH(value) FROM entries ORDER BY updated_at"):
+                        excess -= size
+                        cutoff = updated_at
+                        if excess <= 0:
+                            break
+                    conn.execute("DELETE FROM entries WHERE updated_at <= ?", (cutoff,))
+        except sqlite3.Error as e:
+            print(f"Shared cache purge error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "leases_won": self.leases_won,
+            "leases_lost": self.leases_lost,
+        }
+
+
+shared_cache = SharedCache()
@@ -0,0 +1,84 @@
+"""Generate tips for several categories with one JSON-mode model call."""
+import json
+import re
+from typing import Dict, List
+
+from backend.config import TIP_TIMEOUT_SECONDS
+from backend.llm.client import llm_client
+
+TIP_MIN_CHARS = 10
+TIP_MAX_CHARS = 400
+# Rough output budget per requested tip, plus room for the JSON structure
+TOKENS_PER_TIP = 100
+MAX_BATCH_TOKENS = 4096
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def build_batch_prompt(counts: Dict[str, int], prompts: Dict[str, str]) -> str:
+    """Prompt asking for ``counts[category]`` tips per category as one JSON object.
+
+    The last line is the ``{"category": n}`` request itself, which keeps the
+    expected shape unambiguous for the model.
+    """
+    lines = [
+        "Write short personal finance tips for students in India.",
+        "Reply with only a JSON object mapping each category key to a list of distinct tips, "
+        "each tip 1-2 sentences. Categories:",
+    ]
+    for category in counts:
+        lines.append(f"- {category}: {prompts[category]}")
+    lines.append("Number of tips wanted per category:")
+    lines.append(json.dumps(counts))
+    return "\n".join(lines)
+
+
+def parse_batch_response(text: str, counts: Dict[str, int]) -> Dict[str, List[str]]:
+    """Valid tips per requested category; categories that fail validation are left out."""
+    text = _FENCE_RE.sub("", (text or "").strip())
+    try:
+        data = json.loads(text)
+    except ValueError:
+        # Tolerate prose around the object
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end <= start:
+            return {}
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError:
+            return {}
+    if not isinstance(data, dict):
+        return {}
+
+    result = {}
+    for category, wanted in counts.items():
+        tips = data.get(category)
+        if isinstance(tips, str):
+            tips = [tips]
+        if not isinstance(tips, list):
+            continue
+        valid = [
+            tip.strip() for tip in tips
+            if isinstance(tip, str) and TIP_MIN_CHARS <= len(tip.strip()) <= TIP_MAX_CHARS
+        ]
+        if valid:
+            result[category] = valid[:wanted]
+    return result
+
+
+async def generate_tip_batch(counts: Dict[str, int], prompts: Dict[str, str],
+                             temperature: float = 1.0) -> Dict[str, List[str]]:
+    """One model call for every category in ``counts``; raises on call failure."""
+    counts = {category: n for category, n in counts.items() if n > 0}
+    if not counts:
+        return {}
+    max_tokens = min(MAX_BATCH_TOKENS, TOKENS_PER_TIP * sum(counts.values()) + 100)
+    text = await llm_client.generate(
+        build_batch_prompt(counts, prompts),
+        max_tokens=max_tokens,
+        temperature=temperature,
+        json_mode=True,
+        use_case="tips",
+        timeout=TIP_TIMEOUT_SECONDS,
+    )
+    return parse_batch_response(text, counts)
@@ -0,0 +1,249 @@
+"""Per-category pools of pre-generated tips, shared by every worker process.
+
+The pools live in ``shared_cache``, so a tip generated by one uvicorn worker can be
+served by any other and the workers don't each keep ``size`` tips per category
+topped up. Each worker runs a refill task, but a category is only refilled by the
+worker holding its shared-cache lease; the others skip it. Refills go through
+``llm_client``, so serving a varied tip is a pop instead of a model round trip.
+When several categories run short they are refilled with a single batched JSON
+call, and only what that call failed to deliver is requested one tip at a time.
+Tips are deduplicated against a window of recently generated ones per category.
+"""
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from backend.config import (
+    TIP_POOL_SIZE,
+    TIP_POOL_LOW_WATER,
+    TIP_POOL_REFILL_SECONDS,
+    TIP_POOL_DEDUP_WINDOW,
+    TIP_BATCH_ENABLED,
+    TIP_TIMEOUT_SECONDS,
+)
+from backend.llm.client import llm_client
+from backend.shared_cache import shared_cache
+from backend.tips.batch import generate_tip_batch
+
+TIP_MAX_TOKENS = 80
+TIP_TEMPERATURE = 1.0
+TIP_POOL_NAMESPACE = "tip_pool"
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def _normalize(tip: str) -> str:
+    return _NON_WORD.sub(" ", tip.lower()).strip()
+
+
+class TipPool:
+    def __init__(self, prompts: Dict[str, str], size: int = TIP_POOL_SIZE, low_water: int = TIP_POOL_LOW_WATER,
+                 refill_seconds: float = TIP_POOL_REFILL_SECONDS, dedup_window: int = TIP_POOL_DEDUP_WINDOW,
+                 batch: bool = TIP_BATCH_ENABLED, namespace: str = TIP_POOL_NAMESPACE):
+        self.prompts = prompts
+        self.batch = batch
+        self.size = max(1, size)
+        self.low_water = min(low_water, self.size)
+        self.refill_seconds = refill_seconds
+        self.dedup_window = dedup_window
+        self.namespace = namespace
+        # Refill leases are taken on threadpool workers, so the owner can't be the thread
+        self._owner = f"{os.getpid()}:pool-{id(self)}"
+        # Pool sizes as last seen by this worker, so stats() needs no I/O
+        self._seen = {category: 0 for category in prompts}
+        # pop() runs on threadpool workers, the refill task on the event loop
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.model_calls = 0
+        self.batch_calls = 0
+        self.batch_tips = 0
+        self.refills_skipped = 0
+
+    def _update(self, category: str, update):
+        """Run ``update(entry) -> (entry, result)`` on the shared pool entry of ``category``."""
+        def apply(entry):
+            entry = entry or {"tips": [], "recent": []}
+            entry, result = update(entry)
+            with self._lock:
+                self._seen[category] = len(entry["tips"])
+            return entry, result
+        return shared_cache.update_json(self.namespace, category, apply)
+
+    def pop(self, category: str) -> Optional[str]:
+        """Take a ready tip for ``category``, or None when its pool is empty."""
+        tip = None
+        if category in self.prompts:
+            def take(entry):
+                return entry, (entry["tips"].pop(0) if entry["tips"] else None)
+            try:
+                tip = self._update(category, take)
+            except sqlite3.Error as e:
+                print(f"Tip pool read error ({category}): {e}")
+        with self._lock:
+            if tip is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            running_low = category in self._seen and self._seen[category] < self.low_water
+        if running_low:
+            self._request_refill()
+        return tip
+
+    def add(self, category: str, tip: str) -> bool:
+        """Queue ``tip`` unless it repeats a recent tip for the same category."""
+        key = _normalize(tip)
+
+        def append(entry):
+            if not key or key in entry["recent"]:
+                return entry, False
+            entry["recent"] = (entry["recent"] + [key])[-self.dedup_window:] if self.dedup_window > 0 else []
+            entry["tips"].append(tip)
+            return entry, True
+
+        added = self._update(category, append)
+        with self._lock:
+            if added:
+                self.generated += 1
+            else:
+                self.duplicates += 1
+        return added
+
+    def available(self, category: str) -> int:
+        entry = shared_cache.get_json(self.namespace, category) or {"tips": []}
+        with self._lock:
+            self._seen[category] = len(entry["tips"])
+        return len(entry["tips"])
+
+    def _claim(self, category: str) -> int:
+        """Take or renew this worker's refill lease on ``category``; returns the tips still
+        needed, or 0 when another worker is refilling it."""
+        try:
+            if not shared_cache.acquire(self.namespace, category, owner=self._owner):
+                with self._lock:
+                    self.refills_skipped += 1
+                return 0
+            missing = self.size - self.available(category)
+        except sqlite3.Error as e:
+            # The pools live in the same database, so there is nothing to refill into
+            print(f"Tip pool lease error ({category}): {e}")
+            return 0
+        if missing <= 0:
+            self._release([category])
+        return max(0, missing)
+
+    def _release(self, categories: List[str]):
+        for category in categories:
+            try:
+                shared_cache.release(self.namespace, category, owner=self._owner)
+            except sqlite3.Error as e:
+                print(f"Error releasing tip pool lease ({category}): {e}")
+
+    async def _refill_category(self, category: str, missing: int) -> bool:
+        prompt = self.prompts[category]
+        # Duplicates don't count towards the pool, so cap the attempts per round
+        attempts = 0
+        while missing > 0 and attempts < 2 * self.size:
+            attempts += 1
+            self.model_calls += 1
+            try:
+                text = await llm_client.generate(
+                    prompt, max_tokens=TIP_MAX_TOKENS, temperature=TIP_TEMPERATURE, use_case="tips",
+                    timeout=TIP_TIMEOUT_SECONDS,
+                )
+                if text and text.strip():
+                    await asyncio.to_thread(self.add, category, text.strip())
+            except Exception as e:
+                print(f"Tip pool refill error ({category}): {e}")
+                return False
+            # Renewing the lease also picks up pops made by other workers meanwhile
+            missing = await asyncio.to_thread(self._claim, category)
+        return True
+
+    async def _refill_batch(self, deficits: Dict[str, int]):
+        if len(deficits) < 2:
+            return
+        self.model_calls += 1
+        self.batch_calls += 1
+        try:
+            tips = await generate_tip_batch(deficits, self.prompts, temperature=TIP_TEMPERATURE)
+            for category, items in tips.items():
+                for tip in items:
+                    self.batch_tips += await asyncio.to_thread(self.add, category, tip)
+        except Exception as e:
+            print(f"Tip pool batch refill error: {e}")
+
+    async def refill(self) -> bool:
+        """Top up every category no other worker is refilling; returns False if any model call failed."""
+        claims = {category: await asyncio.to_thread(self._claim, category) for category in self.prompts}
+        deficits = {category: missing for category, missing in claims.items() if missing > 0}
+        try:
+            if self.batch:
+                await self._refill_batch(deficits)
+                deficits = {category: await asyncio.to_thread(self._claim, category) for category in deficits}
+            results = await asyncio.gather(
+                *(self._refill_category(category, missing) for category, missing in deficits.items())
+            )
+            return all(results)
+        finally:
+            await asyncio.to_thread(self._release, list(deficits))
+
+    async def _run(self):
+        while True:
+            if not await self.refill():
+                # Don't let pops hammer a failing model; wait out the full interval
+                await asyncio.sleep(self.refill_seconds)
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.refill_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _request_refill(self):
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    def start(self):
+        """Start the refill task on the running loop (no-op without a configured model)."""
+        if self._task is not None or not llm_client.configured:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        self._loop = self._wake = None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                # As last seen by this worker; the pools themselves are shared
+                "available": dict(self._seen),
+                "hits": self.hits,
+                "misses": self.misses,
+                "generated": self.generated,
+                "duplicates": self.duplicates,
+                "model_calls": self.model_calls,
+                "batch_calls": self.batch_calls,
+                # Each batched tip would otherwise have been its own call
+                "calls_saved": max(0, self.batch_tips - self.batch_calls),
+                "refills_skipped": self.refills_skipped,
+                "running": self._task is not None,
+            }
@@ -1,12 +1,14 @@
 from typing import Optional
-import os
-import json
+import sqlite3
 from datetime import datetime
 import random
-from backend.config import GEMINI_API_KEY
-import google.generativeai as genai
-
-CACHE_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "daily_tip_cache.json")
+import threading
+import time
+from backend.config import DAILY_TIP_RETRY_SECONDS, TIP_TIMEOUT_SECONDS
+from backend.tips.pool import TipPool, TIP_MAX_TOKENS
+from backend.llm.client import llm_client, LLMUnavailableError
+from backend.metrics import fallbacks_total
+from backend.shared_cache import shared_cache
 
 # Fallback tips for different categories
 FALLBACK_TIPS = [
@@ -22,32 +24,89 @@ FALLBACK_TIPS = [
     "Learn one new financial concept every week to improve money skills.",
 ]
 
-def _ensure_cache_dir():
-    cache_dir = os.path.dirname(CACHE_FILE)
-    if not os.path.exists(cache_dir):
-        os.makedirs(cache_dir, exist_ok=True)
+# Category-specific prompts for varied notification tips
+CATEGORY_PROMPTS = {
+    'saving': "Give a practical money-saving tip for students in India in 1-2 sentences. Focus on daily savings habits.",
+    'budgeting': "Provide a budgeting tip for college students in 1-2 sentences. Make it actionable and simple.",
+    'investing': "Share an investment tip for beginners in India in 1-2 sentences. Keep it simple and safe.",
+    'goals': "Give advice on setting and achieving financial goals for young people in 1-2 sentences.",
+    'quick_tip': "Provide a quick money management hack for students in 1-2 sentences.",
+    'spending': "Share advice on smart spending habits for young adults in 1-2 sentences.",
+    'banking': "Give a banking or digital payments tip for students in India in 1-2 sentences."
+}
+DEFAULT_TIP_CATEGORY = 'saving'
 
-def get_cached_tip() -> Optional[dict]:
+tip_pool = TipPool(CATEGORY_PROMPTS)
+
+# Today's tip is kept in the shared cache as one entry per day, visible to every
+# worker: {"tip": {...}, "retry_at": epoch seconds or None}. Fallback tips carry a
+# retry_at so the model is tried again later in the day (by one worker).
+DAILY_TIP_NAMESPACE = "daily_tip"
+DAILY_TIP_TTL_SECONDS = 2 * 24 * 3600
+
+# The entry is mirrored in memory so cache hits never leave the process
+_cached_tip: Optional[dict] = None
+_retry_at: Optional[float] = None
+_shared_loaded = False
+_load_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+
+def _today() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+def _needs_retry(retry_at: Optional[float]) -> bool:
+    return retry_at is not None and time.time() >= retry_at
+
+def _remember(entry: dict) -> dict:
+    global _cached_tip, _retry_at
+    _cached_tip = entry["tip"]
+    _retry_at = entry.get("retry_at")
+    return _cached_tip
+
+def _load_shared_tip() -> Optional[dict]:
     try:
-        if os.path.exists(CACHE_FILE):
-            with open(CACHE_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # Ensure it's for today
-                if data.get("date") == datetime.utcnow().strftime("%Y-%m-%d"):
-                    return data
-    except Exception:
-        pass
+        entry = shared_cache.get_json(DAILY_TIP_NAMESPACE, _today())
+    except sqlite3.Error as e:
+        print(f"Error reading shared daily tip: {e}")
+        return None
+    if isinstance(entry, dict) and isinstance(entry.get("tip"), dict) and entry["tip"].get("tip"):
+        return entry
     return None
 
-def cache_tip(tip_text: str) -> dict:
-    _ensure_cache_dir()
+def _load_initial_tip():
+    global _shared_loaded
+    with _load_lock:
+        if _shared_loaded:
+            return
+        entry = _load_shared_tip()
+        if entry:
+            _remember(entry)
+        _shared_loaded = True
+
+def get_cached_tip() -> Optional[dict]:
+    """Today's tip if it is cached and does not need a retry, without leaving the process."""
+    if not _shared_loaded:
+        _load_initial_tip()
+    tip = _cached_tip
+    if tip is None or tip.get("date") != _today():
+        return None
+    if _needs_retry(_retry_at):
+        return None
+    return tip
+
+def cache_tip(tip_text: str, fallback: bool = False) -> dict:
+    """Make ``tip_text`` today's tip for every worker; fallback tips are retried after DAILY_TIP_RETRY_SECONDS."""
     data = {
-        "date": datetime.utcnow().strftime("%Y-%m-%d"),
+        "date": _today(),
         "tip": tip_text,
         "cached_at": datetime.utcnow().isoformat()
     }
-    with open(CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    entry = {"tip": data, "retry_at": time.time() + DAILY_TIP_RETRY_SECONDS if fallback else None}
+    _remember(entry)
+    try:
+        shared_cache.set_json(DAILY_TIP_NAMESPACE, data["date"], entry, ttl=DAILY_TIP_TTL_SECONDS)
+    except sqlite3.Error as e:
+        print(f"Error persisting daily tip: {e}")
     return data
 
 def generate_daily_tip(user_context: Optional[str] = None, category: str = "general") -> dict:
@@ -59,94 +118,127 @@ def generate_daily_tip(user_context: Optional[str] = None, category: str = "gene
     cached = get_cached_tip()
     if cached:
         return cached
+    return _refresh_daily_tip(user_context)
 
-    if not GEMINI_API_KEY:
-        # Random fallback tip
-        tip = random.choice(FALLBACK_TIPS)
-        return cache_tip(tip)
+def _acquire_refresh_lease(day: str) -> bool:
+    try:
+        return shared_cache.acquire(DAILY_TIP_NAMESPACE, day)
+    except sqlite3.Error as e:
+        # Without the shared cache each worker refreshes on its own
+        print(f"Error taking daily tip lease: {e}")
+        return True
 
+def _release_refresh_lease(day: str):
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        # Create varied prompts for different days
-        day_of_week = datetime.utcnow().weekday()
-        prompts = [
-            "Provide one short actionable personal finance tip for students about saving money in 1-2 sentences.",
-            "Give a quick budgeting tip for college students in 1-2 sentences.",
-            "Share a simple investment tip for beginners in India in 1-2 sentences.",
-            "Suggest a practical way for students to track expenses in 1-2 sentences.",
-            "Give advice on avoiding unnecessary spending for young people in 1-2 sentences.",
-            "Share a tip about building an emergency fund for students in 1-2 sentences.",
-            "Provide advice on smart money habits for teenagers in 1-2 sentences."
-        ]
-        
-        prompt = prompts[day_of_week % len(prompts)]
-        if user_context:
-            prompt += f" Context: {user_context}"
-
-        response = model.generate_content(
-            prompt, 
-            generation_config=genai.types.GenerationConfig(max_output_tokens=80)
-        )
-        tip_text = response.text.strip()
-        return cache_tip(tip_text)
-    except Exception as e:
-        # On errors, return random fallback
-        print(f"Error generating tip: {e}")
-        tip = random.choice(FALLBACK_TIPS)
-        return cache_tip(tip)
+        shared_cache.release(DAILY_TIP_NAMESPACE, day)
+    except sqlite3.Error as e:
+        print(f"Error releasing daily tip lease: {e}")
 
-def _generate_varied_tip(user_context: Optional[str] = None, category: str = "general") -> dict:
-    """Generate category-specific tips without caching for variety."""
-    if not GEMINI_API_KEY:
-        # Random fallback tip
-        tip = random.choice(FALLBACK_TIPS)
-        return {
-            "date": datetime.utcnow().strftime("%Y-%m-%d"),
-            "tip": tip,
-            "category": category,
-            "generated_at": datetime.utcnow().isoformat()
-        }
+def _wait_for_shared_tip(day: str) -> Optional[dict]:
+    try:
+        shared_cache.wait_for(DAILY_TIP_NAMESPACE, day)
+    except sqlite3.Error as e:
+        print(f"Error waiting for shared daily tip: {e}")
+        return None
+    return _load_shared_tip()
+
+def _refresh_daily_tip(user_context: Optional[str] = None) -> dict:
+    """Single-flight refresh across threads and workers: one caller asks the model,
+    the rest are served the previous tip or wait for the new one."""
+    stale = _cached_tip
+    if stale is not None:
+        if not _refresh_lock.acquire(blocking=False):
+            return stale
+    else:
+        # Nothing to serve yet; wait for whoever is generating the first tip
+        _refresh_lock.acquire()
+    try:
+        cached = get_cached_tip()
+        if cached:
+            return cached
+        # Another worker may have refreshed it already
+        entry = _load_shared_tip()
+        if entry and not _needs_retry(entry.get("retry_at")):
+            return _remember(entry)
+        day = _today()
+        if not _acquire_refresh_lease(day):
+            if entry:
+                return _remember(entry)
+            if stale is not None:
+                return stale
+            entry = _wait_for_shared_tip(day)
+            if entry:
+                return _remember(entry)
+            # The lease holder gave up or died; generate it here
+        try:
+            entry = _load_shared_tip()
+            if entry and not _needs_retry(entry.get("retry_at")):
+                return _remember(entry)
+            tip_text, fallback = _ask_for_daily_tip(user_context)
+            return cache_tip(tip_text, fallback=fallback)
+        finally:
+            _release_refresh_lease(day)
+    finally:
+        _refresh_lock.release()
 
+def _ask_tip_model(prompt: str) -> Optional[str]:
+    """Blocking call to the tips model through ``llm_client``; None when it is unavailable,
+    failing or the breaker is open. Must run on a threadpool worker, not the event loop."""
+    if not llm_client.configured:
+        return None
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        # Category-specific prompts
-        category_prompts = {
-            'saving': "Give a practical money-saving tip for students in India in 1-2 sentences. Focus on daily savings habits.",
-            'budgeting': "Provide a budgeting tip for college students in 1-2 sentences. Make it actionable and simple.",
-            'investing': "Share an investment tip for beginners in India in 1-2 sentences. Keep it simple and safe.",
-            'goals': "Give advice on setting and achieving financial goals for young people in 1-2 sentences.",
-            'quick_tip': "Provide a quick money management hack for students in 1-2 sentences.",
-            'spending': "Share advice on smart spending habits for young adults in 1-2 sentences.",
-            'banking': "Give a banking or digital payments tip for students in India in 1-2 sentences."
-        }
-        
-        prompt = category_prompts.get(category, category_prompts['saving'])
-        if user_context:
-            prompt += f" Context: {user_context}"
-
-        response = model.generate_content(
-            prompt, 
-            generation_config=genai.types.GenerationConfig(max_output_tokens=80)
+        tip_text = llm_client.generate_blocking(
+            prompt, max_tokens=TIP_MAX_TOKENS, use_case="tips", timeout=TIP_TIMEOUT_SECONDS
         )
-        tip_text = response.text.strip()
-        
-        return {
-            "date": datetime.utcnow().strftime("%Y-%m-%d"),
-            "tip": tip_text,
-            "category": category,
-            "generated_at": datetime.utcnow().isoformat()
-        }
+    except LLMUnavailableError:
+        return None
     except Exception as e:
-        # On errors, return random fallback
-        print(f"Error generating varied tip: {e}")
+        print(f"Error generating tip: {e}")
+        return None
+    return tip_text.strip() or None
+
+def _ask_for_daily_tip(user_context: Optional[str] = None):
+    """Return ``(tip_text, is_fallback)``"""
+    # Create varied prompts for different days
+    day_of_week = datetime.utcnow().weekday()
+    prompts = [
+        "Provide one short actionable personal finance tip for students about saving money in 1-2 sentences.",
+        "Give a quick budgeting tip for college students in 1-2 sentences.",
+        "Share a simple investment tip for beginners in India in 1-2 sentences.",
+        "Suggest a practical way for students to track expenses in 1-2 sentences.",
+        "Give advice on avoiding unnecessary spending for young people in 1-2 sentences.",
+        "Share a tip about building an emergency fund for students in 1-2 sentences.",
+        "Provide advice on smart money habits for teenagers in 1-2 sentences."
+    ]
+    
+    prompt = prompts[day_of_week % len(prompts)]
+    if user_context:
+        prompt += f" Context: {user_context}"
+
+    tip_text = _ask_tip_model(prompt)
+    if tip_text:
+        return tip_text, False
+    # Random fallback tip
+    fallbacks_total.inc(kind="daily_tip")
+    return random.choice(FALLBACK_TIPS), True
+
+def _varied_tip(tip: str, category: str) -> dict:
+    return {
+        "date": datetime.utcnow().strftime("%Y-%m-%d"),
+        "tip": tip,
+        "category": category,
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+def _generate_varied_tip(user_context: Optional[str] = None, category: str = "general") -> dict:
+    """Category-specific tip from the pre-generated pool; personalised requests go to the model."""
+    if not user_context:
+        pool_category = category if category in CATEGORY_PROMPTS else DEFAULT_TIP_CATEGORY
+        tip = tip_pool.pop(pool_category)
+    else:
+        prompt = CATEGORY_PROMPTS.get(category, CATEGORY_PROMPTS[DEFAULT_TIP_CATEGORY])
+        tip = _ask_tip_model(f"{prompt} Context: {user_context}")
+    if not tip:
+        fallbacks_total.inc(kind="tip")
         tip = random.choice(FALLBACK_TIPS)
-        return {
-            "date": datetime.utcnow().strftime("%Y-%m-%d"),
-            "tip": tip,
-            "category": category,
-            "generated_at": datetime.utcnow().isoformat()
-        }
+    return _varied_tip(tip, category)
@@ -0,0 +1,58 @@
+"""Selective preloading of lazily loaded dependencies.
+
+google.generativeai, pandas and openpyxl are imported on first use so a cold
+container answers /health, tips and CSV exports without paying for them.
+``WARMUP_MODULES`` names the ones worth loading up front instead, e.g.
+``WARMUP_MODULES=genai,extract_pool`` for a deployment that mostly serves chat
+and SMS imports.
+"""
+import time
+from typing import Dict, Iterable
+
+
+def _warm_genai():
+    from backend.llm.registry import model_registry
+    for use_case in model_registry.names():
+        model_registry.model(use_case)
+
+
+def _warm_pandas():
+    import pandas  # noqa: F401
+
+
+def _warm_openpyxl():
+    import openpyxl  # noqa: F401
+
+
+def _warm_extract_pool():
+    from backend.expenses.batch import extract_chunk, get_process_pool
+    pool = get_process_pool()
+    if pool is not None:
+        # Workers are only spawned on first submit
+        pool.submit(extract_chunk, [(0, "spent 1 on tea")]).result()
+
+
+WARMUPS = {
+    "genai": _warm_genai,
+    "pandas": _warm_pandas,
+    "openpyxl": _warm_openpyxl,
+    "extract_pool": _warm_extract_pool,
+}
+
+
+def warm_up(names: Iterable[str]) -> Dict[str, float]:
+    """Load each named dependency; returns milliseconds spent per name."""
+    timings = {}
+    for name in names:
+        warm = WARMUPS.get(name)
+        if warm is None:
+            print(f"Unknown warm-up target '{name}' (expected one of: {', '.join(WARMUPS)})")
+            continue
+        started = time.perf_counter()
+        try:
+            warm()
+        except Exception as e:
+            print(f"Warm-up of {name} failed: {e}")
+            continue
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+    return timings
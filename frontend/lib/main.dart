@@ -12,6 +12,7 @@ import 'src/download_helper.dart';
 import 'services/notification_service.dart';
 import 'services/auth_service.dart';
 import 'services/database_service.dart';
+import 'services/ledger_user.dart';
 import 'widgets/permission_dialog.dart';
 import 'screens/auth_screen.dart';
 import 'widgets/enhanced_main_navigation.dart';
@@ -483,6 +484,7 @@ class _FinanceAssistantHomeState extends State<FinanceAssistantHome> {
           'message': message,
           'max_tokens': 1000,
           'temperature': 0.7,
+          'user_id': await ledgerUserId(),
         }),
       );
 
@@ -1396,7 +1398,9 @@ class _FinanceAssistantHomeState extends State<FinanceAssistantHome> {
   Future<void> _downloadFile(String format) async {
     try {
       final response = await http.get(
-        Uri.parse('${backendBaseUrl()}/download/$format'),
+        Uri.parse('${backendBaseUrl()}/download/$format').replace(
+          queryParameters: {'user_id': await ledgerUserId()},
+        ),
       );
 
       if (response.statusCode == 200) {
@@ -6,6 +6,7 @@ import 'package:http/http.dart' as http;
 import 'package:shared_preferences/shared_preferences.dart';
 import '../models/message.dart';
 import '../services/database_service.dart';
+import '../services/ledger_user.dart';
 // ...existing code...
 
 enum AppTheme { light, dark, market }
@@ -215,6 +216,7 @@ class AppState extends ChangeNotifier {
           'message': messageText,
           'max_tokens': 1000,
           'temperature': 0.7,
+          'user_id': await ledgerUserId(),
         }),
       );
 
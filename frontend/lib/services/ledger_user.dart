@@ -0,0 +1,18 @@
+import 'package:shared_preferences/shared_preferences.dart';
+import 'package:uuid/uuid.dart';
+
+const String _ledgerUserIdKey = 'ledger_user_id';
+
+/// Stable per-install ID the backend ledger records this device's expenses under.
+///
+/// The backend only writes chat expenses to the ledger (and only serves
+/// `/download/*`) for an explicit `user_id`.
+Future<String> ledgerUserId() async {
+  final prefs = await SharedPreferences.getInstance();
+  var userId = prefs.getString(_ledgerUserIdKey);
+  if (userId == null) {
+    userId = const Uuid().v4();
+    await prefs.setString(_ledgerUserIdKey, userId);
+  }
+  return userId;
+}